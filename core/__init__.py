@@ -4,6 +4,19 @@ from .file_joiner import FileJoiner
 from .column_merger import ColumnMerger
 from .row_splitter import RowSplitter
 from .duplicate_finder import DuplicateFinder
-from .excel_utils import ExcelUtils
+from .excel_utils import ExcelUtils, ShardedExcelWriter
+from .expression_engine import ColumnExpression
+from .pipeline import Pipeline
+from .job_manager import JobManager
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from .process_pool import ProcessRunner
+from .chunked_upload import ChunkedUploadManager
+from .upload_store import UploadStore
+from .storage_manager import StorageManager
+from .result_cache import ResultCache
 
-__all__ = ['FileComparator', 'FileJoiner', 'ColumnMerger', 'RowSplitter', 'DuplicateFinder', 'ExcelUtils']
\ No newline at end of file
+__all__ = ['FileComparator', 'FileJoiner', 'ColumnMerger', 'RowSplitter', 'DuplicateFinder', 'ExcelUtils',
+           'ShardedExcelWriter', 'ColumnExpression', 'Pipeline', 'JobManager',
+           'ProgressTracker', 'CancelToken', 'OperationCancelled', 'ProcessRunner',
+           'ChunkedUploadManager', 'UploadStore', 'StorageManager',
+           'ResultCache']
\ No newline at end of file
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Callable, BinaryIO
+
+class ChunkedUploadManager:
+    """
+    Receive large files as numbered chunks written straight to disk
+
+    init() reserves a partial file of the announced size; each chunk is
+    streamed into its slot (so chunks may arrive in any order and be sent
+    again after a dropped connection) and checked against its CRC32. The
+    upload state is kept in a small JSON file next to the data, so an
+    interrupted upload can resume with its upload_id even after a restart.
+    When the last chunk lands the file is renamed into place, hashed, and
+    probe(file_path, filename, sha256) (e.g. storing it and reading sheet
+    metadata) starts in the background; finalize() waits for it and
+    returns its result together with the SHA-256. The probe may move the
+    file, returning its new file_path. Uploads untouched for STALE_TTL
+    (unfinished, or complete but never finalized) are removed by init()
+    and by discard(), the StorageManager hook.
+    """
+
+    # Size of each chunk unless the client asks for another one
+    DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+    # Bytes copied from the request stream at a time
+    COPY_BUFFER = 1024 * 1024
+    # Unfinished uploads untouched for this long are removed
+    STALE_TTL = 24 * 3600
+
+    def __init__(self, folder: str, probe: Optional[Callable[[str, str, str], Dict[str, Any]]] = None,
+                 max_chunk_size: int = 15 * 1024 * 1024, max_size: Optional[int] = None):
+        self.folder = folder
+        self.probe = probe
+        self.max_chunk_size = max_chunk_size
+        # Largest file accepted (None: only the free disk space limits it)
+        self.max_size = max_size
+        os.makedirs(folder, exist_ok=True)
+        self.probes: Dict[str, Future] = {}
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='upload-probe')
+        self.lock = threading.Lock()
+
+    def init(self, filename: str, size: int, chunk_size: Optional[int] = None,
+             sha256: Optional[str] = None, upload_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start an upload, or resume upload_id if it is still unfinished
+
+        Args:
+            filename: Original file name (its extension is kept)
+            size: Total size in bytes
+            chunk_size: Requested chunk size (capped at max_chunk_size)
+            sha256: Optional hex digest of the whole file, checked on finalize
+            upload_id: Id of an earlier, interrupted upload of the same file
+
+        Returns:
+            Upload status with upload_id, chunk_size, total_chunks and the
+            indexes already received
+        """
+        try:
+            self._purge()
+            if upload_id:
+                state = self._load(upload_id)
+                if state is not None and state['size'] == size and state['filename'] == filename:
+                    return self._status(state)
+
+            size = int(size)
+            if size <= 0:
+                return {'success': False, 'error': 'Kích thước file không hợp lệ'}
+            if self.max_size is not None and size > self.max_size:
+                return {'success': False, 'error': f"File quá lớn. Kích thước tối đa là {self.max_size // (1024 * 1024)}MB"}
+            if size > shutil.disk_usage(self.folder).free:
+                return {'success': False, 'error': 'Không đủ dung lượng đĩa để nhận file này'}
+            chunk_size = min(int(chunk_size or self.DEFAULT_CHUNK_SIZE), self.max_chunk_size)
+            if chunk_size <= 0:
+                return {'success': False, 'error': 'Kích thước phần không hợp lệ'}
+
+            state = {
+                'upload_id': uuid.uuid4().hex,
+                'filename': filename,
+                'size': size,
+                'chunk_size': chunk_size,
+                'total_chunks': (size + chunk_size - 1) // chunk_size,
+                'sha256': sha256.lower() if sha256 else None,
+                'received': [],
+                'complete': False,
+                'updated_at': time.time()
+            }
+            with open(self._part_path(state['upload_id']), 'wb') as f:
+                f.truncate(size)
+            self._save(state)
+            return self._status(state)
+
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi khởi tạo tải lên: {str(e)}"}
+
+    def write_chunk(self, upload_id: str, index: int, stream: BinaryIO, length: Optional[int],
+                    crc32: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Copy chunk `index` from stream into place
+
+        Args:
+            upload_id: Upload returned by init()
+            index: Zero-based chunk number
+            stream: Request body stream
+            length: Declared body length (Content-Length)
+            crc32: Hex CRC32 of the chunk; the chunk is rejected on mismatch
+
+        Returns:
+            Upload status; once every chunk is in, metadata probing has started
+        """
+        try:
+            state = self._load(upload_id)
+            if state is None:
+                return {'success': False, 'error': 'Không tìm thấy phiên tải lên'}
+            if state['complete']:
+                return self._status(state)
+            if not 0 <= index < state['total_chunks']:
+                return {'success': False, 'error': f"Phần {index} nằm ngoài phạm vi"}
+
+            offset = index * state['chunk_size']
+            expected = min(state['chunk_size'], state['size'] - offset)
+            if length is not None and length != expected:
+                return {'success': False, 'error': f"Phần {index} phải có {expected} byte, nhận {length} byte"}
+
+            written = 0
+            checksum = 0
+            with open(self._part_path(upload_id), 'r+b') as f:
+                f.seek(offset)
+                while written < expected:
+                    data = stream.read(min(self.COPY_BUFFER, expected - written))
+                    if not data:
+                        break
+                    f.write(data)
+                    checksum = zlib.crc32(data, checksum)
+                    written += len(data)
+
+            if written != expected:
+                return {'success': False, 'error': f"Phần {index} bị thiếu dữ liệu ({written}/{expected} byte)"}
+            if crc32 is not None and int(crc32, 16) != checksum:
+                return {'success': False, 'error': f"Phần {index} sai checksum, vui lòng gửi lại"}
+
+            with self.lock:
+                # Re-read: other chunks may have been recorded meanwhile
+                state = self._load(upload_id)
+                if state is None:
+                    return {'success': False, 'error': 'Phiên tải lên đã bị hủy'}
+                if index not in state['received']:
+                    state['received'].append(index)
+                state['updated_at'] = time.time()
+                if len(state['received']) == state['total_chunks'] and not state['complete']:
+                    state['complete'] = True
+                    os.replace(self._part_path(upload_id), self.file_path(state))
+                    self.probes[upload_id] = self.executor.submit(self._probe, state)
+                self._save(state)
+            return self._status(state)
+
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi ghi phần {index}: {str(e)}"}
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        """Current status of an upload (which chunks are still missing)"""
+        state = self._load(upload_id)
+        if state is None:
+            return {'success': False, 'error': 'Không tìm thấy phiên tải lên'}
+        return self._status(state)
+
+    def finalize(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Wait for the probe of a complete upload and return its result
+
+        Returns:
+            probe result plus the original filename, file_path, sha256 and
+            size; on a checksum mismatch or a failed probe the file is
+            removed
+        """
+        try:
+            state = self._load(upload_id)
+            if state is None:
+                return {'success': False, 'error': 'Không tìm thấy phiên tải lên'}
+            if not state['complete']:
+                status = self._status(state)
+                return {'success': False, 'resumable': True, 'missing': status['missing'],
+                        'error': f"Còn thiếu {len(status['missing'])} phần, chưa thể hoàn tất"}
+
+            with self.lock:
+                future = self.probes.get(upload_id)
+                if future is None:
+                    # Completed before a restart: probe again
+                    future = self.probes[upload_id] = self.executor.submit(self._probe, state)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'success': False, 'error': f"Lỗi đọc file đã tải lên: {str(e)}"}
+
+            with self.lock:
+                self.probes.pop(upload_id, None)
+                self._remove_state(upload_id)
+            if not result.get('success'):
+                self._remove_file(self.file_path(state))
+            return result
+
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi hoàn tất tải lên: {str(e)}"}
+
+    def abort(self, upload_id: str) -> bool:
+        """Drop an unfinished upload and its data; False if unknown"""
+        with self.lock:
+            state = self._load(upload_id)
+            if state is None or state['complete']:
+                return False
+            self._remove_state(upload_id)
+        self._remove_file(self._part_path(upload_id))
+        return True
+
+    def discard(self, path: str):
+        """Drop the upload owning a file of the folder, or just the file (for StorageManager eviction)"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        upload_id = name[len('upload_'):] if name.startswith('upload_') else name
+        if self._load(upload_id) is None:
+            os.remove(path)
+        else:
+            self._drop(upload_id)
+
+    def file_path(self, state: Dict[str, Any]) -> str:
+        """Path of the assembled file"""
+        ext = os.path.splitext(state['filename'])[1].lower()
+        return os.path.join(self.folder, f"upload_{state['upload_id']}{ext}")
+
+    def _probe(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        file_path = self.file_path(state)
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(self.COPY_BUFFER), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+        if state['sha256'] and state['sha256'] != sha256:
+            return {'success': False, 'error': 'Checksum SHA-256 của file không khớp, vui lòng tải lên lại'}
+
+        result = self.probe(file_path, state['filename'], sha256) if self.probe else {'success': True}
+        result.setdefault('file_path', file_path)
+        result.update({'filename': state['filename'], 'sha256': sha256, 'size': state['size']})
+        return result
+
+    def _status(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        received = set(state['received'])
+        return {
+            'success': True,
+            'upload_id': state['upload_id'],
+            'filename': state['filename'],
+            'size': state['size'],
+            'chunk_size': state['chunk_size'],
+            'total_chunks': state['total_chunks'],
+            'received': sorted(received),
+            'missing': [i for i in range(state['total_chunks']) if i not in received],
+            'complete': state['complete']
+        }
+
+    def _purge(self):
+        """Remove uploads idle for longer than STALE_TTL, finished or not"""
+        limit = time.time() - self.STALE_TTL
+        for name in os.listdir(self.folder):
+            if name.endswith('.json'):
+                state = self._load(name[:-5])
+                if state is not None and state['updated_at'] < limit:
+                    self._drop(state['upload_id'])
+
+    def _drop(self, upload_id: str):
+        """Forget an upload: its state, partial or assembled file and pending probe"""
+        with self.lock:
+            state = self._load(upload_id)
+            self.probes.pop(upload_id, None)
+            self._remove_state(upload_id)
+        self._remove_file(self._part_path(upload_id))
+        if state is not None:
+            self._remove_file(self.file_path(state))
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f"{upload_id}.part")
+
+    def _state_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f"{upload_id}.json")
+
+    def _load(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        # upload_id comes from clients: accept only our own hex ids
+        if not upload_id or not all(c in '0123456789abcdef' for c in upload_id):
+            return None
+        try:
+            with open(self._state_path(upload_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, state: Dict[str, Any]):
+        path = self._state_path(state['upload_id'])
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    def _remove_state(self, upload_id: str):
+        self._remove_file(self._state_path(upload_id))
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,16 +1,24 @@
 import pandas as pd
+import numpy as np
 from .excel_utils import ExcelUtils  # THÊM IMPORT NÀY
-from typing import Dict, Any, List, Tuple
+from .expression_engine import parse_expressions
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from typing import Dict, Any, List, Tuple, Optional, Callable
 import os
 
 class ColumnMerger:
     """Class for merging columns in Excel files"""
     
+    # How empty cells are treated when merging
+    NULL_MODES = ('skip', 'empty', 'placeholder')
+    
     def __init__(self):
         self.utils = ExcelUtils()  # SỬ DỤNG ExcelUtils
     
     def merge_columns(self, file_path: str, merge_configs: List[Tuple[List[str], str, str]], 
-                     output_path: str) -> Dict[str, Any]:
+                     output_path: str, null_mode: str = 'skip', placeholder: str = '',
+                     progress_callback: Optional[Callable] = None,
+                     cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """
         Merge multiple columns in Excel file
         
@@ -18,18 +26,27 @@ class ColumnMerger:
             file_path: Path to input Excel file
             merge_configs: List of tuples (columns_to_merge, new_column_name, separator)
             output_path: Path for output file
+            null_mode: 'skip' leaves empty cells (and their separator) out,
+                       'empty' keeps them as empty text, 'placeholder'
+                       replaces them with `placeholder`
+            placeholder: Text used for empty cells in 'placeholder' mode
         
         Returns:
             Dictionary with success status and results
         """
         try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            if null_mode not in self.NULL_MODES:
+                return {'success': False, 'error': f"Chế độ xử lý ô trống không hợp lệ: {null_mode}"}
+            
             # Validate file
             valid, msg = self.utils.validate_excel_file(file_path)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
             # Read the file
-            df = self.utils.read_excel(file_path)
+            df = self.utils.read_excel(file_path, progress=progress)
             original_columns = list(df.columns)
             
             # Validate merge configurations
@@ -43,29 +60,11 @@ class ColumnMerger:
                 if not new_column_name.strip():
                     return {'success': False, 'error': "Tên cột mới không được để trống"}
             
-            # Create a copy of the dataframe
-            df_result = df.copy()
-            merged_columns_info = []
-            
-            # Perform merging for each configuration
-            for columns_to_merge, new_column_name, separator in merge_configs:
-                # Merge columns
-                df_result[new_column_name] = df[columns_to_merge].astype(str).agg(separator.join, axis=1)
-                
-                # Remove original columns
-                for col in columns_to_merge:
-                    if col in df_result.columns:
-                        df_result = df_result.drop(columns=[col])
-                
-                merged_columns_info.append({
-                    'original_columns': columns_to_merge,
-                    'new_column': new_column_name,
-                    'separator': separator,
-                    'sample_data': df_result[new_column_name].head(3).tolist()
-                })
+            progress.phase('compute', len(df))
+            df_result, merged_columns_info = self.merge_frame(df, merge_configs, null_mode, placeholder)
             
             # Save the result
-            self.utils.save_excel_safe(df_result, output_path, "Merged_Columns")
+            self.utils.save_excel_safe(df_result, output_path, "Merged_Columns", progress=progress)
             
             # Statistics
             stats = {
@@ -88,9 +87,191 @@ class ColumnMerger:
                 'file_info': self.utils.get_file_info(file_path)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi gộp cột: {str(e)}"}
     
+    def compute_columns(self, file_path: str, expressions: List[Tuple[str, str]],
+                        output_path: str, progress_callback: Optional[Callable] = None,
+                        cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Add computed columns defined by expressions
+        
+        Args:
+            file_path: Path to input Excel file
+            expressions: List of (new_column_name, expression), e.g.
+                         ('Họ tên', "upper(Ho) + ' ' + Ten"), ('Thành tiền', 'Gia * SoLuong');
+                         later expressions may use columns created by earlier ones
+            output_path: Path for output file
+        
+        Returns:
+            Dictionary with success status and results
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            # Parse everything before touching the file
+            try:
+                parsed = parse_expressions(expressions)
+            except ValueError as parse_error:
+                return {'success': False, 'error': str(parse_error)}
+            
+            # Validate file
+            valid, msg = self.utils.validate_excel_file(file_path)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            df = self.utils.read_excel(file_path, progress=progress)
+            original_columns = list(df.columns)
+            
+            progress.phase('compute', len(df))
+            try:
+                df, computed_info = self.compute_frame(df, parsed)
+            except ValueError as eval_error:
+                return {'success': False, 'error': str(eval_error)}
+            
+            self.utils.save_excel_safe(df, output_path, "Computed_Columns", progress=progress)
+            
+            stats = {
+                'original_rows': len(df),
+                'original_columns': len(original_columns),
+                'final_columns': len(df.columns),
+                'computed_columns': len(parsed),
+                'computed_columns_info': computed_info,
+                'output_file': output_path,
+                'note': f'Đã tạo {len(parsed)} cột tính toán'
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'message': 'Tạo cột tính toán hoàn tất',
+                'file_info': self.utils.get_file_info(file_path)
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi tạo cột tính toán: {str(e)}"}
+    
+    def preview_compute(self, file_path: str, expressions: List[Tuple[str, str]],
+                        preview_rows: int = 5) -> Dict[str, Any]:
+        """Preview computed columns on the first rows without saving"""
+        try:
+            try:
+                parsed = parse_expressions(expressions)
+            except ValueError as parse_error:
+                return {'success': False, 'error': str(parse_error)}
+            
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            # Only columns read from the file (not ones computed earlier in the list)
+            all_columns = self.utils.get_column_names(file_path)
+            new_columns = {name for name, _ in parsed}
+            needed_columns = [col for col in all_columns
+                              if any(col in expression.columns for _, expression in parsed)]
+            for _, expression in parsed:
+                for col in expression.columns:
+                    if col not in all_columns and col not in new_columns:
+                        return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
+            
+            df_head = self.utils.read_excel_head(file_path, preview_rows, needed_columns)
+            for new_column_name, expression in parsed:
+                df_head[new_column_name] = expression.evaluate(df_head)
+            
+            return {
+                'success': True,
+                'columns': needed_columns + [name for name, _ in parsed],
+                'preview_data': self.utils.dataframe_to_dict_safe(df_head),
+                'computed_columns': [name for name, _ in parsed]
+            }
+            
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
+    
+    def merge_frame(self, df: pd.DataFrame, merge_configs: List[Tuple[List[str], str, str]],
+                    null_mode: str = 'skip', placeholder: str = ''):
+        """
+        Merge columns of an in-memory frame
+        
+        Returns (result frame, merged_columns_info). Columns must exist.
+        """
+        merged_columns = {}
+        merged_columns_info = []
+        
+        # Perform merging for each configuration
+        for columns_to_merge, new_column_name, separator in merge_configs:
+            merged = self._merge_series(df, columns_to_merge, separator, null_mode, placeholder)
+            merged_columns[new_column_name] = merged
+            
+            merged_columns_info.append({
+                'original_columns': columns_to_merge,
+                'new_column': new_column_name,
+                'separator': separator,
+                'sample_data': merged.head(3).tolist()
+            })
+        
+        # Single projection: drop every merged source column, then append the new ones
+        used_columns = {col for columns_to_merge, _, _ in merge_configs for col in columns_to_merge}
+        df_result = df[[col for col in df.columns if col not in used_columns]].copy()
+        for new_column_name, merged in merged_columns.items():
+            # Item assignment: column names need not be strings (unlike assign keywords)
+            df_result[new_column_name] = merged
+        
+        return df_result, merged_columns_info
+    
+    def compute_frame(self, df: pd.DataFrame, parsed: List[Tuple[str, Any]]):
+        """
+        Add parsed expressions (see parse_expressions) to an in-memory frame
+        
+        Returns (result frame, computed_info); raises ValueError for a
+        missing column.
+        """
+        df = df.copy()
+        computed_info = []
+        
+        # All expressions are evaluated column-wise over the one loaded frame
+        for new_column_name, expression in parsed:
+            df[new_column_name] = expression.evaluate(df)
+            
+            computed_info.append({
+                'new_column': new_column_name,
+                'expression': expression.text,
+                'source_columns': sorted(expression.columns),
+                'sample_data': self.utils.dataframe_to_dict_safe(df[[new_column_name]].head(3))
+            })
+        
+        return df, computed_info
+    
+    def _merge_series(self, df: pd.DataFrame, columns: List[str], separator: str,
+                      null_mode: str = 'skip', placeholder: str = '') -> pd.Series:
+        """Concatenate columns column-wise with vectorized string operations"""
+        result = None
+        result_empty = None
+        fill = '' if null_mode != 'placeholder' else placeholder
+        
+        for col in columns:
+            values = df[col]
+            text = values.astype(str).to_numpy(dtype=object)
+            # Cells are stripped on read, so blank cells are already ''
+            missing = values.isna().to_numpy() | (text == '')
+            text = np.where(missing, '' if null_mode == 'skip' else fill, text)
+            
+            if result is None:
+                result, result_empty = text, missing
+            elif null_mode == 'skip':
+                # Separator only between two non-empty parts
+                joined = result + separator + text
+                result = np.where(missing, result, np.where(result_empty, text, joined))
+                result_empty = result_empty & missing
+            else:
+                result = result + separator + text
+        
+        return pd.Series(result, index=df.index, dtype=object)
+    
     def get_columns(self, file_path: str) -> Dict[str, Any]:
         """Get column names from file"""
         try:
@@ -109,38 +290,41 @@ class ColumnMerger:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def preview_merge(self, file_path: str, merge_configs: List[Tuple[List[str], str, str]]) -> Dict[str, Any]:
-        """Preview the merge result without saving"""
+    def preview_merge(self, file_path: str, merge_configs: List[Tuple[List[str], str, str]],
+                      null_mode: str = 'skip', placeholder: str = '', preview_rows: int = 5) -> Dict[str, Any]:
+        """
+        Preview the merge result without saving
+        
+        Only the header and the first preview_rows rows of the columns
+        involved are read, so the cost does not depend on file size.
+        """
         try:
-            # Validate file
-            valid, msg = self.utils.validate_excel_file(file_path)
+            # Validate file (the head read below parses it)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
-            # Read the file
-            df = self.utils.read_excel(file_path)
+            all_columns = self.utils.get_column_names(file_path)
             
             # Validate merge configurations
             for columns_to_merge, new_column_name, separator in merge_configs:
                 for col in columns_to_merge:
-                    if col not in df.columns:
+                    if col not in all_columns:
                         return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
             
-            # Create preview
-            df_preview = df.copy()
+            # Read just the needed columns of the first rows
+            needed_columns = list(dict.fromkeys(col for config in merge_configs for col in config[0]))
+            df_head = self.utils.read_excel_head(file_path, preview_rows, needed_columns)
             preview_data = []
             
             for columns_to_merge, new_column_name, separator in merge_configs:
-                # Create merged column for preview
-                df_preview[new_column_name] = df[columns_to_merge].astype(str).agg(separator.join, axis=1)
+                merged = self._merge_series(df_head, columns_to_merge, separator, null_mode, placeholder)
+                originals = df_head[columns_to_merge].to_dict('records')
                 
-                # Get sample data
-                sample_data = []
-                for idx, row in df_preview[[new_column_name] + columns_to_merge].head(5).iterrows():
-                    sample_data.append({
-                        'new_value': row[new_column_name],
-                        'original_values': {col: row[col] for col in columns_to_merge}
-                    })
+                sample_data = [
+                    {'new_value': new_value, 'original_values': original_values}
+                    for new_value, original_values in zip(merged.tolist(), originals)
+                ]
                 
                 preview_data.append({
                     'original_columns': columns_to_merge,
@@ -148,17 +332,14 @@ class ColumnMerger:
                     'separator': separator,
                     'sample_data': sample_data
                 })
-                
-                # Remove the temporary column
-                df_preview = df_preview.drop(columns=[new_column_name])
             
             return {
                 'success': True,
                 'preview_data': preview_data,
-                'original_columns_count': len(df.columns),
-                'final_columns_count': len(df.columns) - sum(len(config[0]) for config in merge_configs) + len(merge_configs),
+                'original_columns_count': len(all_columns),
+                'final_columns_count': len(all_columns) - sum(len(config[0]) for config in merge_configs) + len(merge_configs),
                 'total_merge_operations': len(merge_configs)
             }
             
         except Exception as e:
-            return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
\ No newline at end of file
+            return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
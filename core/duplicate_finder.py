@@ -1,15 +1,35 @@
 import pandas as pd
-from .excel_utils import ExcelUtils
-from typing import Dict, Any, List, Tuple
+import numpy as np
+from .excel_utils import ExcelUtils, ShardedExcelWriter
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from typing import Dict, Any, List, Tuple, Optional, Callable
+import datetime
 import os
 
 class DuplicateFinder:
     """Class for finding duplicate data in Excel files"""
     
+    # MinHash / LSH settings for near-duplicate detection
+    MINHASH_PRIME = (1 << 31) - 1
+    SHINGLE_SIZE = 3
+    SIGNATURE_BATCH_ROWS = 50000
+    
+    # Rows per chunk for streaming operations
+    CHUNK_ROWS = 50000
+    
+    # Mixed into cell hashes by kind of value so 1, '1' and True stay apart (see _cell_hashes)
+    TEXT_HASH_SALT = np.uint64(0x9E3779B97F4A7C15)
+    DATE_HASH_SALT = np.uint64(0xC2B2AE3D27D4EB4F)
+    OTHER_HASH_SALT = np.uint64(0x165667B19E3779F9)
+    # Hash of every blank cell, whatever the column dtype
+    MISSING_HASH = np.uint64(0x27D4EB2F165667C5)
+    
     def __init__(self):
         self.utils = ExcelUtils()
     
-    def find_duplicate_values(self, file_path: str, columns: List[str], output_path: str) -> Dict[str, Any]:
+    def find_duplicate_values(self, file_path: str, columns: List[str], output_path: str,
+                              progress_callback: Optional[Callable] = None,
+                              cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """
         Find duplicate values in specific columns
         
@@ -22,13 +42,15 @@ class DuplicateFinder:
             Dictionary with success status and results
         """
         try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
             # Validate file
             valid, msg = self.utils.validate_excel_file(file_path)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
             # Read the file
-            df = self.utils.read_excel(file_path)
+            df = self.utils.read_excel(file_path, progress=progress)
             original_rows = len(df)
             
             # Validate columns
@@ -36,41 +58,49 @@ class DuplicateFinder:
                 if col not in df.columns:
                     return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
             
-            # Find duplicates
+            progress.phase('compute', original_rows)
+            
+            # Find duplicates - one factorize pass per column, everything else on arrays
             duplicate_results = {}
-            all_duplicates = []
+            detail_frames = {}
+            any_duplicate = np.zeros(original_rows, dtype=bool)
             
             for col in columns:
-                # Find duplicate values in this column
-                duplicates = df[df.duplicated(subset=[col], keep=False)]
+                progress.check()
+                dup = self._factorize_duplicates(df[col])
+                if len(dup['rows']) == 0:
+                    continue
                 
-                if len(duplicates) > 0:
-                    # Group by value to get duplicate groups
-                    grouped = duplicates.groupby(col)
-                    duplicate_groups = []
-                    
-                    for value, group in grouped:
-                        if len(group) > 1:  # Only include actual duplicates
-                            duplicate_groups.append({
-                                'value': value,
-                                'count': len(group),
-                                'rows': group.index.tolist(),
-                                'excel_rows': [idx + 2 for idx in group.index]  # +2 for Excel row numbers
-                            })
-                    
-                    if duplicate_groups:
-                        duplicate_results[col] = {
-                            'total_duplicates': len(duplicates),
-                            'unique_duplicate_values': len(duplicate_groups),
-                            'duplicate_groups': duplicate_groups
-                        }
-                        
-                        # Add to all duplicates list
-                        for group in duplicate_groups:
-                            all_duplicates.extend(group['excel_rows'])
+                any_duplicate[dup['rows']] = True
+                
+                group_starts, group_rows = self._split_groups(dup)
+                group_values = dup['values'][group_starts].tolist()
+                group_counts = dup['counts'][group_starts].tolist()
+                
+                duplicate_groups = [
+                    {
+                        'value': value,
+                        'count': count,
+                        'rows': rows.tolist(),
+                        'excel_rows': (rows + 2).tolist()  # +2 for Excel row numbers
+                    }
+                    for value, count, rows in zip(group_values, group_counts, group_rows)
+                ]
+                
+                duplicate_results[col] = {
+                    'total_duplicates': len(dup['rows']),
+                    'unique_duplicate_values': len(duplicate_groups),
+                    'duplicate_groups': duplicate_groups
+                }
+                
+                detail_frames[col] = pd.DataFrame({
+                    'Column': col,
+                    'Duplicate_Value': dup['values'],
+                    'Excel_Row': dup['rows'] + 2,
+                    'Duplicate_Count': dup['counts']
+                })
             
-            # Remove duplicates from all_duplicates list
-            all_duplicates = list(set(all_duplicates))
+            total_duplicate_rows = int(any_duplicate.sum())
             
             # Create summary dataframe
             summary_data = []
@@ -84,34 +114,24 @@ class DuplicateFinder:
             df_summary = pd.DataFrame(summary_data)
             
             # Save results
+            progress.phase('write', total_duplicate_rows)
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
                 df_summary.to_excel(writer, sheet_name='Summary', index=False)
                 
-                # Save detailed results for each column
-                for col, result in duplicate_results.items():
-                    detailed_data = []
-                    for group in result['duplicate_groups']:
-                        for excel_row in group['excel_rows']:
-                            detailed_data.append({
-                                'Column': col,
-                                'Duplicate_Value': group['value'],
-                                'Excel_Row': excel_row,
-                                'Duplicate_Count': group['count']
-                            })
-                    
-                    if detailed_data:
-                        df_detail = pd.DataFrame(detailed_data)
-                        df_detail.to_excel(writer, sheet_name=f'Duplicates_{col}', index=False)
+                # Detail sheets come straight from the duplicate arrays
+                for col, df_detail in detail_frames.items():
+                    sheet_name = self.utils.sanitize_sheet_name(f'Duplicates_{col}')
+                    df_detail.to_excel(writer, sheet_name=sheet_name, index=False)
             
             # Statistics
             stats = {
                 'original_rows': original_rows,
                 'checked_columns': columns,
                 'columns_with_duplicates': list(duplicate_results.keys()),
-                'total_duplicate_rows': len(all_duplicates),
+                'total_duplicate_rows': total_duplicate_rows,
                 'duplicate_results': duplicate_results,
                 'output_file': output_path,
-                'note': f'Đã tìm thấy {len(all_duplicates)} dòng trùng lặp trong {len(duplicate_results)} cột'
+                'note': f'Đã tìm thấy {total_duplicate_rows} dòng trùng lặp trong {len(duplicate_results)} cột'
             }
             
             return {
@@ -121,34 +141,254 @@ class DuplicateFinder:
                 'file_info': self.utils.get_file_info(file_path)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi tìm giá trị trùng lặp: {str(e)}"}
     
-    def find_duplicate_rows(self, file_path: str, output_path: str) -> Dict[str, Any]:
+    def _factorize_column(self, series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Find completely duplicate rows
+        Factorize one column into integer codes and unique values
+        
+        Only missing values (NaN/None) get code -1 and are left out of
+        groups, as groupby did before; sanitized blank cells are '' and
+        form a group like any other value.
+        """
+        try:
+            codes, uniques = pd.factorize(series, sort=True)
+        except TypeError:
+            # Mixed, unorderable values - keep first-seen group order
+            codes, uniques = pd.factorize(series, sort=False)
+        return codes, np.asarray(uniques, dtype=object)
+    
+    def _factorize_key_columns(self, df: pd.DataFrame, columns: List[str]) -> Tuple[np.ndarray, int]:
+        """
+        Combine several columns into one integer code per row
+        
+        Per-column codes are folded pairwise (code * n + next_code) and
+        re-factorized after each step, so the combined code never overflows
+        and the whole key costs one linear pass per column.
+        """
+        codes, uniques = self._factorize_column(df[columns[0]])
+        codes = codes.astype(np.int64)
+        n_groups = len(uniques)
+        
+        for col in columns[1:]:
+            col_codes, col_uniques = self._factorize_column(df[col])
+            valid = (codes >= 0) & (col_codes >= 0)
+            combined = codes[valid] * len(col_uniques) + col_codes[valid]
+            
+            key_codes, key_uniques = pd.factorize(combined, sort=True)
+            codes = np.full(len(df), -1, dtype=np.int64)
+            codes[valid] = key_codes
+            n_groups = len(key_uniques)
+        
+        return codes, n_groups
+    
+    def _duplicate_arrays(self, codes: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+        """
+        Locate duplicated group codes with array operations only
+        
+        Returns row positions of every duplicated row ordered by group
+        (rows in file order within a group), with the group code and
+        group size of each of those rows.
+        """
+        valid = codes >= 0  # Missing values never form a group
+        counts = np.bincount(codes[valid], minlength=n_groups)
+        
+        rows = np.flatnonzero(valid & (counts[np.where(valid, codes, 0)] > 1))
+        rows = rows[np.argsort(codes[rows], kind='stable')]
+        row_codes = codes[rows]
+        
+        return {
+            'rows': rows,
+            'codes': row_codes,
+            'counts': counts[row_codes]
+        }
+    
+    def _split_groups(self, dup: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Split code-sorted duplicate rows into one block per group"""
+        if len(dup['rows']) == 0:
+            return np.empty(0, dtype=np.int64), []
+        boundaries = np.flatnonzero(np.diff(dup['codes'])) + 1
+        group_starts = np.concatenate(([0], boundaries)).astype(np.int64)
+        return group_starts, np.split(dup['rows'], boundaries)
+    
+    def _factorize_duplicates(self, series: pd.Series) -> Dict[str, Any]:
+        """Duplicate arrays for a single column, plus the value of each duplicated row"""
+        codes, uniques = self._factorize_column(series)
+        dup = self._duplicate_arrays(codes, len(uniques))
+        dup['values'] = uniques[dup['codes']]
+        return dup
+    
+    def find_duplicate_keys(self, file_path: str, columns: List[str], output_path: str,
+                            progress_callback: Optional[Callable] = None,
+                            cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Find rows that share the same combination of values in several columns
         
         Args:
             file_path: Path to input Excel file
+            columns: Columns forming the composite key, e.g. ['Mã NV', 'Ngày']
             output_path: Path for output file
         
         Returns:
             Dictionary with success status and results
         """
         try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
             # Validate file
             valid, msg = self.utils.validate_excel_file(file_path)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
             # Read the file
+            df = self.utils.read_excel(file_path, progress=progress)
+            original_rows = len(df)
+            
+            # Validate columns
+            for col in columns:
+                if col not in df.columns:
+                    return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
+            
+            progress.phase('compute', original_rows)
+            codes, n_groups = self._factorize_key_columns(df, columns)
+            dup = self._duplicate_arrays(codes, n_groups)
+            group_starts, group_rows = self._split_groups(dup)
+            
+            # Key values of each group, taken from its first row
+            df_keys = df[columns].iloc[dup['rows']].reset_index(drop=True)
+            first_keys = df_keys.iloc[group_starts].to_dict('records')
+            group_counts = dup['counts'][group_starts].tolist()
+            
+            duplicate_groups = [
+                {
+                    'key': key,
+                    'count': count,
+                    'rows': rows.tolist(),
+                    'excel_rows': (rows + 2).tolist()  # +2 for Excel row numbers
+                }
+                for key, count, rows in zip(first_keys, group_counts, group_rows)
+            ]
+            
+            duplicate_rows = len(dup['rows'])
+            
+            # Save results
+            progress.phase('write', duplicate_rows)
+            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+                df_summary = pd.DataFrame([{
+                    'Key_Columns': ', '.join(columns),
+                    'Total_Duplicate_Rows': duplicate_rows,
+                    'Unique_Duplicate_Keys': len(duplicate_groups),
+                    'Original_Rows': original_rows,
+                    'Duplicate_Percentage': round((duplicate_rows / original_rows) * 100, 2) if original_rows else 0
+                }])
+                df_summary.to_excel(writer, sheet_name='Summary', index=False)
+                
+                if duplicate_rows:
+                    df_detail = df_keys.copy()
+                    df_detail['Excel_Row'] = dup['rows'] + 2
+                    df_detail['Duplicate_Count'] = dup['counts']
+                    df_detail.to_excel(writer, sheet_name='Duplicate_Keys', index=False)
+            
+            stats = {
+                'original_rows': original_rows,
+                'key_columns': columns,
+                'duplicate_rows': duplicate_rows,
+                'unique_duplicate_keys': len(duplicate_groups),
+                'duplicate_percentage': round((duplicate_rows / original_rows) * 100, 2) if original_rows else 0,
+                'duplicate_groups': duplicate_groups,
+                'output_file': output_path,
+                'note': f'Đã tìm thấy {duplicate_rows} dòng trùng khóa ({", ".join(columns)}) trong {len(duplicate_groups)} nhóm'
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'message': 'Tìm trùng lặp theo khóa kết hợp hoàn tất',
+                'file_info': self.utils.get_file_info(file_path)
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi tìm trùng lặp theo khóa: {str(e)}"}
+    
+    def preview_duplicate_keys(self, file_path: str, columns: List[str], max_groups: int = 10) -> Dict[str, Any]:
+        """Preview the largest composite-key duplicate groups without saving"""
+        try:
+            # Validate file
+            valid, msg = self.utils.validate_excel_file(file_path)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
             df = self.utils.read_excel(file_path)
+            
+            for col in columns:
+                if col not in df.columns:
+                    return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
+            
+            codes, n_groups = self._factorize_key_columns(df, columns)
+            dup = self._duplicate_arrays(codes, n_groups)
+            
+            group_starts, group_rows = self._split_groups(dup)
+            group_counts = dup['counts'][group_starts]
+            
+            # Largest groups first
+            sample_duplicates = []
+            for g in np.argsort(-group_counts, kind='stable')[:max_groups]:
+                rows = group_rows[g]
+                sample_duplicates.append({
+                    'key': df[columns].iloc[rows[0]].to_dict(),
+                    'count': int(group_counts[g]),
+                    'sample_rows': (rows[:3] + 2).tolist()
+                })
+            
+            return {
+                'success': True,
+                'key_columns': columns,
+                'duplicate_rows': len(dup['rows']),
+                'unique_duplicate_keys': len(group_rows),
+                'sample_duplicates': sample_duplicates,
+                'sample_size': len(df)
+            }
+            
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
+    
+    def find_duplicate_rows(self, file_path: str, output_path: str,
+                            progress_callback: Optional[Callable] = None,
+                            cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Find completely duplicate rows
+        
+        Args:
+            file_path: Path to input Excel file
+            output_path: Path for output file
+        
+        Returns:
+            Dictionary with success status and results
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            # Validate file
+            valid, msg = self.utils.validate_excel_file(file_path)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            # Read the file
+            df = self.utils.read_excel(file_path, progress=progress)
             original_rows = len(df)
             
+            progress.phase('compute', original_rows)
+            
             # Find duplicate rows (all columns)
-            duplicates = df[df.duplicated(keep=False)]
+            dup = self._duplicate_row_arrays(df, list(df.columns))
+            duplicate_count = len(dup['rows'])
             
-            if len(duplicates) == 0:
+            if duplicate_count == 0:
                 stats = {
                     'original_rows': original_rows,
                     'duplicate_rows': 0,
@@ -164,68 +404,52 @@ class DuplicateFinder:
                     'file_info': self.utils.get_file_info(file_path)
                 }
             
-            # Group duplicate rows
-            duplicate_groups = []
-            
-            # Convert dataframe to string for grouping
-            df_str = df.astype(str)
-            duplicates_str = df_str[df_str.duplicated(keep=False)]
+            # Group duplicate rows by fingerprint group id
+            group_starts, group_rows = self._split_groups(dup)
+            df_duplicates = df.iloc[dup['rows']].reset_index(drop=True)
+            group_data = df_duplicates.iloc[group_starts].to_dict('records')
+            group_counts = dup['counts'][group_starts].tolist()
             
-            # Group by all columns
-            grouped = duplicates_str.groupby(list(df_str.columns))
-            
-            for values, group in grouped:
-                if len(group) > 1:  # Only include actual duplicates
-                    # Convert tuple back to dict
-                    value_dict = dict(zip(df.columns, values))
-                    
-                    duplicate_groups.append({
-                        'row_data': value_dict,
-                        'count': len(group),
-                        'rows': group.index.tolist(),
-                        'excel_rows': [idx + 2 for idx in group.index]  # +2 for Excel row numbers
-                    })
+            duplicate_groups = [
+                {
+                    'row_data': {str(k): v for k, v in row_data.items()},
+                    'count': count,
+                    'rows': rows.tolist(),
+                    'excel_rows': (rows + 2).tolist()  # +2 for Excel row numbers
+                }
+                for row_data, count, rows in zip(group_data, group_counts, group_rows)
+            ]
             
             # Save results
+            progress.phase('write', duplicate_count)
             with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
                 # Save summary
                 summary_data = [{
-                    'Total_Duplicate_Rows': len(duplicates),
+                    'Total_Duplicate_Rows': duplicate_count,
                     'Unique_Duplicate_Groups': len(duplicate_groups),
                     'Original_Rows': original_rows,
-                    'Duplicate_Percentage': round((len(duplicates) / original_rows) * 100, 2)
+                    'Duplicate_Percentage': round((duplicate_count / original_rows) * 100, 2)
                 }]
                 
                 df_summary = pd.DataFrame(summary_data)
                 df_summary.to_excel(writer, sheet_name='Summary', index=False)
                 
-                # Save detailed results
-                detailed_data = []
-                for group in duplicate_groups:
-                    for excel_row in group['excel_rows']:
-                        row_data = group['row_data'].copy()
-                        row_data['Excel_Row'] = excel_row
-                        row_data['Duplicate_Count'] = group['count']
-                        detailed_data.append(row_data)
-                
-                if detailed_data:
-                    df_detail = pd.DataFrame(detailed_data)
-                    df_detail.to_excel(writer, sheet_name='Duplicate_Rows', index=False)
+                # Save detailed results straight from the group arrays
+                df_detail = df_duplicates.copy()
+                df_detail['Excel_Row'] = dup['rows'] + 2
+                df_detail['Duplicate_Count'] = dup['counts']
+                df_detail.to_excel(writer, sheet_name='Duplicate_Rows', index=False)
             
             # Statistics
-            all_duplicate_rows = []
-            for group in duplicate_groups:
-                all_duplicate_rows.extend(group['excel_rows'])
-            
             stats = {
                 'original_rows': original_rows,
-                'duplicate_rows': len(duplicates),
+                'duplicate_rows': duplicate_count,
                 'duplicate_groups': duplicate_groups,
                 'unique_duplicate_groups': len(duplicate_groups),
-                'duplicate_percentage': round((len(duplicates) / original_rows) * 100, 2),
-                'all_duplicate_rows': list(set(all_duplicate_rows)),
+                'duplicate_percentage': round((duplicate_count / original_rows) * 100, 2),
+                'all_duplicate_rows': np.sort(dup['rows'] + 2).tolist(),
                 'output_file': output_path,
-                'note': f'Đã tìm thấy {len(duplicates)} dòng trùng lặp trong {len(duplicate_groups)} nhóm'
+                'note': f'Đã tìm thấy {duplicate_count} dòng trùng lặp trong {len(duplicate_groups)} nhóm'
             }
             
             return {
@@ -235,56 +459,704 @@ class DuplicateFinder:
                 'file_info': self.utils.get_file_info(file_path)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi tìm dòng trùng lặp: {str(e)}"}
     
-    def preview_duplicate_values(self, file_path: str, columns: List[str]) -> Dict[str, Any]:
-        """Preview duplicate values without saving"""
+    def find_near_duplicate_rows(self, file_path: str, output_path: str, columns: Optional[List[str]] = None,
+                                 threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                                 progress_callback: Optional[Callable] = None,
+                                 cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Find rows that are almost identical (whitespace, diacritics, typos)
+        
+        Row text is normalized and cut into character shingles, each row gets
+        a MinHash signature, and LSH bands propose candidate pairs that are
+        kept when their estimated Jaccard similarity reaches the threshold.
+        Work is linear in the number of rows; no all-pairs comparison is done.
+        
+        Args:
+            file_path: Path to input Excel file
+            output_path: Path for output file
+            columns: Columns used to build row text (default: all columns)
+            threshold: Minimum estimated similarity (0-1) to link two rows
+            num_perm: MinHash signature length
+            bands: Number of LSH bands (must divide num_perm)
+        
+        Returns:
+            Dictionary with success status and clusters
+        """
         try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
             # Validate file
             valid, msg = self.utils.validate_excel_file(file_path)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
+            if not 0 < threshold <= 1:
+                return {'success': False, 'error': "Ngưỡng tương đồng phải nằm trong khoảng (0, 1]"}
+            if num_perm % bands != 0:
+                return {'success': False, 'error': "Số band phải chia hết độ dài chữ ký MinHash"}
+            
             # Read the file
-            df = self.utils.read_excel(file_path)
+            df = self.utils.read_excel(file_path, progress=progress)
+            original_rows = len(df)
+            columns = columns or list(df.columns)
             
-            # Validate columns
             for col in columns:
                 if col not in df.columns:
                     return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
             
-            # Find duplicates for preview (first 50 rows)
-            df_preview = df.head(50)
-            preview_results = {}
+            progress.phase('compute', original_rows)
+            text = self._normalize_row_text(df, columns)
+            has_text = (text.str.strip() != '').to_numpy()
             
-            for col in columns:
-                duplicates = df_preview[df_preview.duplicated(subset=[col], keep=False)]
+            signatures = self._minhash_signatures(text, num_perm, progress)
+            labels, similarity = self._lsh_clusters(signatures, has_text, bands, threshold)
+            
+            # Keep clusters with at least two rows, ordered by their first row
+            cluster_sizes = np.bincount(labels, minlength=original_rows)
+            rows = np.flatnonzero(has_text & (cluster_sizes[labels] > 1))
+            rows = rows[np.argsort(labels[rows], kind='stable')]
+            row_labels = labels[rows]
+            _, cluster_ids = np.unique(row_labels, return_inverse=True)
+            cluster_ids = cluster_ids + 1
+            
+            boundaries = np.flatnonzero(np.diff(row_labels)) + 1
+            cluster_rows_list = np.split(rows, boundaries) if len(rows) else []
+            
+            clusters = []
+            for cluster_rows in cluster_rows_list:
+                scores = np.round(similarity[cluster_rows], 3)
+                clusters.append({
+                    'cluster_id': len(clusters) + 1,
+                    'count': len(cluster_rows),
+                    'rows': cluster_rows.tolist(),
+                    'excel_rows': (cluster_rows + 2).tolist(),  # +2 for Excel row numbers
+                    'similarities': scores.tolist(),
+                    'min_similarity': float(scores.min()),
+                    'row_data': df[columns].iloc[cluster_rows[0]].to_dict()
+                })
+            
+            near_duplicate_rows = len(rows)
+            
+            # Save results
+            progress.phase('write', near_duplicate_rows)
+            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+                df_summary = pd.DataFrame([{
+                    'Near_Duplicate_Rows': near_duplicate_rows,
+                    'Clusters': len(clusters),
+                    'Original_Rows': original_rows,
+                    'Similarity_Threshold': threshold
+                }])
+                df_summary.to_excel(writer, sheet_name='Summary', index=False)
                 
-                if len(duplicates) > 0:
-                    grouped = duplicates.groupby(col)
-                    duplicate_groups = []
+                if near_duplicate_rows:
+                    df_detail = pd.DataFrame({
+                        'Cluster_ID': cluster_ids,
+                        'Excel_Row': rows + 2,
+                        'Similarity': np.round(similarity[rows], 3)
+                    })
+                    df_rows = df.iloc[rows].reset_index(drop=True)
+                    df_detail = pd.concat([df_detail, df_rows], axis=1)
+                    df_detail.to_excel(writer, sheet_name='Near_Duplicates', index=False)
+            
+            stats = {
+                'original_rows': original_rows,
+                'checked_columns': columns,
+                'near_duplicate_rows': near_duplicate_rows,
+                'cluster_count': len(clusters),
+                'threshold': threshold,
+                'clusters': clusters,
+                'output_file': output_path,
+                'note': f'Đã tìm thấy {near_duplicate_rows} dòng gần trùng trong {len(clusters)} cụm (ngưỡng {threshold})'
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'message': 'Tìm dòng gần trùng hoàn tất',
+                'file_info': self.utils.get_file_info(file_path)
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi tìm dòng gần trùng: {str(e)}"}
+    
+    def _normalize_row_text(self, df: pd.DataFrame, columns: List[str]) -> pd.Series:
+        """Join row values and fold case, diacritics, punctuation and whitespace"""
+        text = df[columns[0]].astype(str)
+        if len(columns) > 1:
+            text = text.str.cat([df[col].astype(str) for col in columns[1:]], sep=' ')
+        
+        text = (text.str.lower()
+                    .str.replace('đ', 'd', regex=False)
+                    .str.normalize('NFKD')
+                    .str.replace(r'[\u0300-\u036f]', '', regex=True)
+                    .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+                    .str.strip())
+        return text
+    
+    def _minhash_signatures(self, text: pd.Series, num_perm: int,
+                            progress: Optional[ProgressTracker] = None) -> np.ndarray:
+        """
+        MinHash signature of every row's character shingles
+        
+        Rows are processed in batches: the batch is laid out as one byte
+        buffer, all k-shingles are encoded as integers at once, and the
+        per-row minimum of each hash function is taken with minimum.reduceat.
+        """
+        k = self.SHINGLE_SIZE
+        prime = np.uint64(self.MINHASH_PRIME)
+        rng = np.random.default_rng(1)
+        a = rng.integers(1, self.MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        b = rng.integers(0, self.MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        
+        values = text.str.pad(k, side='right').tolist()  # Short rows still yield one shingle
+        signatures = np.empty((len(values), num_perm), dtype=np.uint32)
+        
+        for start in range(0, len(values), self.SIGNATURE_BATCH_ROWS):
+            batch = values[start:start + self.SIGNATURE_BATCH_ROWS]
+            lengths = np.fromiter((len(v) for v in batch), dtype=np.int64, count=len(batch))
+            buffer = np.frombuffer(''.join(batch).encode('ascii'), dtype=np.uint8).astype(np.uint64)
+            
+            row_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            row_of = np.repeat(np.arange(len(batch)), lengths)
+            positions = np.arange(len(buffer) - k + 1)
+            positions = positions[positions - row_starts[row_of[positions]] + k <= lengths[row_of[positions]]]
+            
+            shingles = np.zeros(len(positions), dtype=np.uint64)
+            for offset in range(k):
+                shingles = (shingles << np.uint64(8)) | buffer[positions + offset]
+            
+            # Each row owns at least one shingle, so segment starts are strictly increasing
+            segment_starts = np.searchsorted(row_of[positions], np.arange(len(batch)))
+            for p in range(num_perm):
+                hashed = (a[p] * shingles + b[p]) % prime
+                signatures[start:start + len(batch), p] = np.minimum.reduceat(hashed, segment_starts)
+            
+            if progress:
+                progress.advance(len(batch))
+        
+        return signatures
+    
+    def _lsh_clusters(self, signatures: np.ndarray, active: np.ndarray, bands: int,
+                      threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cluster rows through LSH banding
+        
+        Rows sharing a band bucket are linked to the bucket's first row when
+        their signatures agree on at least `threshold` of the positions.
+        Connected components are resolved by vectorized label propagation.
+        Returns the cluster label of each row (its smallest member) and the
+        estimated similarity of each row to that representative.
+        """
+        n_rows, num_perm = signatures.shape
+        rows_per_band = num_perm // bands
+        candidates = np.flatnonzero(active)
+        rng = np.random.default_rng(2)
+        multipliers = rng.integers(1, 1 << 62, size=rows_per_band, dtype=np.uint64) | np.uint64(1)
+        
+        edge_u, edge_v = [], []
+        for band in range(bands):
+            block = signatures[candidates, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+            bucket = (block * multipliers).sum(axis=1)  # Wrapping uint64 hash of the band
+            
+            order = np.argsort(bucket, kind='stable')
+            sorted_bucket = bucket[order]
+            is_start = np.concatenate(([True], sorted_bucket[1:] != sorted_bucket[:-1]))
+            leader = order[np.maximum.accumulate(np.where(is_start, np.arange(len(order)), 0))]
+            
+            members = ~is_start
+            u = candidates[leader[members]]
+            v = candidates[order[members]]
+            agree = (signatures[u] == signatures[v]).mean(axis=1)
+            keep = agree >= threshold
+            edge_u.append(u[keep])
+            edge_v.append(v[keep])
+        
+        labels = np.arange(n_rows)
+        if edge_u:
+            edge_u = np.concatenate(edge_u)
+            edge_v = np.concatenate(edge_v)
+            while True:
+                lowest = np.minimum(labels[edge_u], labels[edge_v])
+                updated = labels.copy()
+                np.minimum.at(updated, edge_u, lowest)
+                np.minimum.at(updated, edge_v, lowest)
+                updated = updated[updated]  # Pointer jumping
+                if np.array_equal(updated, labels):
+                    break
+                labels = updated
+        
+        similarity = (signatures == signatures[labels]).mean(axis=1)
+        return labels, similarity
+    
+    def find_cross_file_duplicates(self, file_paths: List[str], output_path: str,
+                                   columns: Optional[List[str]] = None,
+                                   file_names: Optional[List[str]] = None,
+                                   progress_callback: Optional[Callable] = None,
+                                   cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Find records that appear in more than one of several files
+        
+        Files are streamed one chunk at a time and never held whole: each
+        chunk is reduced to one entry per distinct key (fingerprint, first
+        row, count and key values), merged into the file's table, and each
+        file's table into the shared index with array operations. Memory
+        therefore grows with the number of distinct keys, not total rows.
+        
+        Args:
+            file_paths: Paths to the input Excel files
+            output_path: Path for output file
+            columns: Key columns (default: all columns of the first file)
+            file_names: Display names for the files (default: base names)
+        
+        Returns:
+            Dictionary with success status and cross-file duplicate groups
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            if len(file_paths) < 2:
+                return {'success': False, 'error': "Cần ít nhất 2 file để tìm trùng lặp giữa các file"}
+            
+            file_names = file_names or [os.path.basename(path) for path in file_paths]
+            
+            # One entry per distinct key, in order of first appearance: fingerprints, first file,
+            # first row, count in that file, key values
+            index = None
+            # Whether each index entry has been seen in more than one file
+            shared = None
+            # Later occurrences of index entries, per file: (entry positions, files, first rows, counts)
+            occurrences = []
+            file_stats = []
+            
+            for file_idx, file_path in enumerate(file_paths):
+                valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+                if not valid:
+                    return {'success': False, 'error': f"File '{file_names[file_idx]}' không hợp lệ: {msg}"}
+                
+                all_columns = self.utils.get_column_names(file_path)
+                columns = columns or all_columns
+                for col in columns:
+                    if col not in all_columns:
+                        return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file '{file_names[file_idx]}'"}
+                
+                progress.phase('compute', self.utils.estimate_data_rows(file_path))
+                table = None
+                rows = 0
+                for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS, columns):
+                    # Text-normalized so that 1 (int) in one file matches "1" in another
+                    fingerprints = self._row_fingerprints(chunk, columns, normalize_text=True)
+                    codes, unique_fps = pd.factorize(fingerprints)
+                    _, first_rows = np.unique(codes, return_index=True)
+                    chunk_table = {
+                        'fps': np.asarray(unique_fps, dtype=np.uint64),
+                        'rows': first_rows + rows,
+                        'counts': np.bincount(codes),
+                        'keys': chunk[columns].iloc[first_rows].reset_index(drop=True)
+                    }
+                    table = chunk_table if table is None else self._combine_key_tables(table, chunk_table)
+                    rows += len(chunk)
+                    progress.advance(len(chunk))
+                
+                if table is None:
+                    table = {'fps': np.empty(0, dtype=np.uint64), 'rows': np.empty(0, dtype=np.int64),
+                             'counts': np.empty(0, dtype=np.int64), 'keys': pd.DataFrame(columns=columns)}
+                table['files'] = np.full(len(table['fps']), file_idx)
+                
+                new_shared = 0
+                if index is None:
+                    index = table
+                    shared = np.zeros(len(table['fps']), dtype=bool)
+                else:
+                    known = np.isin(table['fps'], index['fps'])
+                    sorter = np.argsort(index['fps'], kind='stable')
+                    positions = sorter[np.searchsorted(index['fps'], table['fps'][known], sorter=sorter)]
+                    occurrences.append((positions, np.full(len(positions), file_idx),
+                                        table['rows'][known], table['counts'][known]))
+                    new_shared = int((~shared[positions]).sum())
+                    shared[positions] = True
                     
-                    for value, group in grouped.head(3).groupby(col):  # Limit to 3 groups for preview
-                        if len(group) > 1:
-                            duplicate_groups.append({
-                                'value': value,
-                                'count': len(group),
-                                'sample_rows': group.index.tolist()[:3]  # Show first 3 rows
-                            })
+                    fresh = ~known
+                    index = {
+                        name: (pd.concat([index[name], table[name].iloc[fresh]], ignore_index=True)
+                               if name == 'keys' else np.concatenate([index[name], table[name][fresh]]))
+                        for name in index
+                    }
+                    shared = np.concatenate([shared, np.zeros(int(fresh.sum()), dtype=bool)])
+                
+                file_stats.append({
+                    'File': file_names[file_idx],
+                    'Rows': rows,
+                    'Distinct_Keys': len(table['fps']),
+                    'New_Shared_Keys': new_shared
+                })
+                del table
+            
+            # Shared entries in the order they became shared, with their later occurrences in file order
+            duplicate_groups = []
+            detail_rows = []
+            if occurrences:
+                occ_positions, occ_files, occ_rows, occ_counts = (np.concatenate(parts) for parts in zip(*occurrences))
+                group_positions, first_seen = np.unique(occ_positions, return_index=True)
+                group_positions = group_positions[np.argsort(first_seen)]
+                rank = np.empty(len(index['fps']), dtype=np.int64)
+                rank[group_positions] = np.arange(len(group_positions))
+                order = np.argsort(rank[occ_positions], kind='stable')
+                occ_files, occ_rows, occ_counts = occ_files[order].tolist(), occ_rows[order].tolist(), occ_counts[order].tolist()
+                ends = np.cumsum(np.bincount(rank[occ_positions], minlength=len(group_positions))).tolist()
+                keys = index['keys'].iloc[group_positions].to_dict('records')
+                
+                start = 0
+                for group_id, (position, key, end) in enumerate(zip(group_positions.tolist(), keys, ends), 1):
+                    found = [(int(index['files'][position]), int(index['rows'][position]), int(index['counts'][position]))]
+                    found += zip(occ_files[start:end], occ_rows[start:end], occ_counts[start:end])
+                    start = end
                     
-                    if duplicate_groups:
-                        preview_results[col] = {
-                            'total_duplicates': len(duplicates),
-                            'sample_duplicates': duplicate_groups
+                    group_occurrences = [
+                        {
+                            'file': file_names[file_idx],
+                            'excel_row': row + 2,  # +2 for Excel row numbers
+                            'count': count
                         }
+                        for file_idx, row, count in found
+                    ]
+                    duplicate_groups.append({
+                        'key': key,
+                        'file_count': len(group_occurrences),
+                        'total_count': sum(o['count'] for o in group_occurrences),
+                        'occurrences': group_occurrences
+                    })
+                    for occurrence in group_occurrences:
+                        detail = {'Group_ID': group_id}
+                        detail.update(key)
+                        detail['File'] = occurrence['file']
+                        detail['First_Excel_Row'] = occurrence['excel_row']
+                        detail['Occurrences'] = occurrence['count']
+                        detail_rows.append(detail)
+            
+            cross_file_rows = sum(group['total_count'] for group in duplicate_groups)
+            
+            # Save results
+            progress.phase('write', len(detail_rows))
+            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+                pd.DataFrame(file_stats).to_excel(writer, sheet_name='Summary', index=False)
+                if detail_rows:
+                    pd.DataFrame(detail_rows).to_excel(writer, sheet_name='Cross_File_Duplicates', index=False)
+            
+            stats = {
+                'file_count': len(file_paths),
+                'files': file_stats,
+                'key_columns': columns,
+                'total_rows': sum(f['Rows'] for f in file_stats),
+                'distinct_keys': len(index['fps']),
+                'cross_file_groups': len(duplicate_groups),
+                'cross_file_duplicate_rows': cross_file_rows,
+                'duplicate_groups': duplicate_groups,
+                'output_file': output_path,
+                'note': f'Đã tìm thấy {len(duplicate_groups)} bản ghi xuất hiện trong nhiều hơn một file'
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'message': 'Tìm trùng lặp giữa các file hoàn tất'
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi tìm trùng lặp giữa các file: {str(e)}"}
+    
+    def _combine_key_tables(self, first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge two per-key tables ({'fps', 'rows', 'counts', 'keys'}) of one file
+        
+        Keys keep their first row and values from `first` when present in
+        both, counts are summed, and entries stay in order of first appearance.
+        """
+        fps = np.concatenate([first['fps'], second['fps']])
+        _, take, inverse = np.unique(fps, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([first['counts'], second['counts']]))
+        order = np.argsort(take)
+        take = take[order]
+        return {
+            'fps': fps[take],
+            'rows': np.concatenate([first['rows'], second['rows']])[take],
+            'counts': counts[order].astype(np.int64),
+            'keys': pd.concat([first['keys'], second['keys']], ignore_index=True).iloc[take].reset_index(drop=True)
+        }
+    
+    def _row_fingerprints(self, df: pd.DataFrame, columns: List[str], normalize_text: bool = False) -> np.ndarray:
+        """
+        64-bit fingerprint of each row over the given columns
+        
+        Rows are hashed column-wise (see _cell_hashes); no string copy of the
+        frame is made unless normalize_text is requested. A row gets the same
+        fingerprint whatever dtype its chunk was read with, and 1 and '1'
+        stay apart.
+        
+        With normalize_text, values are compared by their trimmed text (with
+        integral floats written as integers, 3.0 -> 3) so fingerprints agree
+        across files whose column dtypes differ.
+        """
+        data = df[columns]
+        if normalize_text:
+            data = pd.DataFrame({
+                i: data.iloc[:, i].astype(str).where(data.iloc[:, i].notna(), '')
+                .str.strip().str.replace(r'^(-?\d+)\.0$', r'\1', regex=True)
+                for i in range(len(columns))
+            })
+            return pd.util.hash_pandas_object(data, index=False).to_numpy()
+        
+        hashes = {i: self._cell_hashes(data.iloc[:, i]) for i in range(len(columns))}
+        return pd.util.hash_pandas_object(pd.DataFrame(hashes, index=data.index), index=False).to_numpy()
+    
+    def _cell_hashes(self, column: pd.Series) -> np.ndarray:
+        """
+        64-bit hash of every cell of a column, independent of its dtype
+        
+        Chunks of one file are typed separately (a blank cell turns an int64
+        chunk into float64 or object), so cells hash by value: numbers as
+        float64 (3 and 3.0 agree), dates as timestamps, text and anything
+        else through its text with a salt per kind, blanks as MISSING_HASH.
+        """
+        hashes = np.full(len(column), self.MISSING_HASH, dtype=np.uint64)
+        present = column.notna().to_numpy()
+        if not present.any():
+            return hashes
+        values = column[present]
+        
+        if pd.api.types.is_bool_dtype(values.dtype):
+            kind = 'other'
+        elif pd.api.types.is_numeric_dtype(values.dtype):
+            kind = 'number'
+        elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+            kind = 'date'
+        else:
+            kind = {
+                'string': 'text',
+                'integer': 'number',
+                'floating': 'number',
+                'mixed-integer-float': 'number',
+                'decimal': 'number',
+                'datetime': 'date',
+                'datetime64': 'date',
+                'date': 'date'
+            }.get(pd.api.types.infer_dtype(values, skipna=True))
+        
+        if kind is not None:
+            hashes[present] = self._hash_values(values, kind)
+            return hashes
+        
+        # Mixed column: hash each kind of value separately
+        kinds = np.array([
+            'other' if isinstance(value, (bool, np.bool_))
+            else 'number' if isinstance(value, (int, float, np.number))
+            else 'text' if isinstance(value, str)
+            else 'date' if isinstance(value, (datetime.date, np.datetime64))
+            else 'other'
+            for value in values.to_numpy(dtype=object)
+        ])
+        present_hashes = np.empty(len(values), dtype=np.uint64)
+        for kind in np.unique(kinds):
+            mask = kinds == kind
+            present_hashes[mask] = self._hash_values(values[mask], kind)
+        hashes[present] = present_hashes
+        return hashes
+    
+    def _hash_values(self, values: pd.Series, kind: str) -> np.ndarray:
+        """Hash non-blank values of one kind ('number', 'date', 'text' or 'other')"""
+        if kind == 'number':
+            return pd.util.hash_array(pd.to_numeric(values).to_numpy(dtype=np.float64))
+        if kind == 'date':
+            stamps = pd.to_datetime(values).to_numpy(dtype='datetime64[ns]').view(np.int64)
+            return pd.util.hash_array(stamps) ^ self.DATE_HASH_SALT
+        text = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+        return text ^ (self.TEXT_HASH_SALT if kind == 'text' else self.OTHER_HASH_SALT)
+    
+    def _duplicate_row_arrays(self, df: pd.DataFrame, columns: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Duplicate arrays (see _duplicate_arrays) of rows with identical values in columns
+        
+        Fingerprints only pick the candidate rows; the candidates are then
+        grouped by their actual cell values, so a hash collision never
+        reports two different rows as duplicates.
+        """
+        fingerprints = self._row_fingerprints(df, columns)
+        codes, unique_fps = pd.factorize(fingerprints)
+        candidates = np.sort(self._duplicate_arrays(codes, len(unique_fps))['rows'])
+        
+        exact = df.iloc[candidates].groupby(columns, dropna=False, sort=False).ngroup().to_numpy()
+        dup = self._duplicate_arrays(exact, int(exact.max()) + 1 if len(exact) else 0)
+        dup['rows'] = candidates[dup['rows']]
+        return dup
+    
+    def deduplicate(self, file_path: str, output_path: str, columns: Optional[List[str]] = None,
+                    keep: str = 'first', progress_callback: Optional[Callable] = None,
+                    cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Remove duplicate rows and export the remaining rows
+        
+        The input is streamed in chunks and surviving rows are written
+        straight to the output writer; only fingerprints of seen keys are
+        held in memory. Rows are duplicates when their key cells hold the
+        same values, as in find_duplicate_rows; since streamed rows are not
+        kept, that is decided on the fingerprints alone.
+        
+        Args:
+            file_path: Path to input Excel file
+            output_path: Path for output file
+            columns: Key columns defining a duplicate (default: all columns)
+            keep: 'first' or 'last' to keep one row per key, 'none' to drop
+                  every row whose key occurs more than once
+        
+        Returns:
+            Dictionary with success status and results
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            if keep not in ('first', 'last', 'none'):
+                return {'success': False, 'error': f"Giá trị keep không hợp lệ: {keep} (first, last, none)"}
+            
+            # Validate file
+            valid, msg = self.utils.validate_excel_file(file_path)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            # Validate columns before any output is created
+            all_columns = self.utils.get_column_names(file_path)
+            key_columns = columns or all_columns
+            for col in key_columns:
+                if col not in all_columns:
+                    return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
+            
+            total_rows = self.utils.estimate_data_rows(file_path)
+            keep_mask = None
+            if keep != 'first':
+                # First pass: fingerprints only, to know which occurrence survives
+                progress.phase('read', total_rows)
+                parts = []
+                for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS, key_columns):
+                    parts.append(self._row_fingerprints(chunk, key_columns))
+                    progress.advance(len(chunk))
+                fingerprints = np.concatenate(parts or [np.empty(0, dtype=np.uint64)])
+                del parts
+                if keep == 'last':
+                    keep_mask = ~pd.Series(fingerprints).duplicated(keep='last').to_numpy()
+                else:
+                    keep_mask = ~pd.Series(fingerprints).duplicated(keep=False).to_numpy()
+                del fingerprints
+            
+            # Sorted fingerprints of the keys already written (8 bytes per distinct key)
+            seen = np.empty(0, dtype=np.uint64)
+            original_rows = 0
+            
+            progress.phase('compute', total_rows)
+            with ShardedExcelWriter(output_path, 'Deduplicated') as writer:
+                for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS):
+                    if keep_mask is not None:
+                        mask = keep_mask[original_rows:original_rows + len(chunk)]
+                    else:
+                        fingerprints = self._row_fingerprints(chunk, key_columns)
+                        mask = ~pd.Series(fingerprints).duplicated().to_numpy()
+                        if len(seen):
+                            slots = np.minimum(np.searchsorted(seen, fingerprints), len(seen) - 1)
+                            mask &= seen[slots] != fingerprints
+                        new = np.sort(fingerprints[mask])
+                        seen = np.insert(seen, np.searchsorted(seen, new), new)
+                    
+                    writer.write(chunk[mask])
+                    original_rows += len(chunk)
+                    progress.advance(len(chunk))
+                
+                progress.phase('write', writer.total_rows)
+            
+            kept_rows = writer.total_rows
+            removed_rows = original_rows - kept_rows
+            
+            stats = {
+                'original_rows': original_rows,
+                'kept_rows': kept_rows,
+                'removed_rows': removed_rows,
+                'removed_percentage': round((removed_rows / original_rows) * 100, 2) if original_rows else 0,
+                'key_columns': key_columns,
+                'keep': keep,
+                'output_file': writer.output_path,
+                'note': f'Đã loại bỏ {removed_rows} dòng trùng lặp, còn lại {kept_rows} dòng'
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'message': 'Loại bỏ trùng lặp hoàn tất'
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi loại bỏ trùng lặp: {str(e)}"}
+    
+    def deduplicate_frame(self, df: pd.DataFrame, columns: Optional[List[str]] = None,
+                          keep: str = 'first') -> pd.DataFrame:
+        """In-memory deduplicate (same key rules as deduplicate, compared exactly)"""
+        if keep not in ('first', 'last', 'none'):
+            raise ValueError(f"Giá trị keep không hợp lệ: {keep} (first, last, none)")
+        
+        duplicated = df.duplicated(subset=columns or list(df.columns), keep=False if keep == 'none' else keep)
+        return df[~duplicated.to_numpy()]
+    
+    def preview_duplicate_values(self, file_path: str, columns: List[str], max_values: int = 5) -> Dict[str, Any]:
+        """
+        Preview the most repeated values of each column over the whole file
+        
+        Only the selected columns are streamed, chunk by chunk, and their
+        value counts are accumulated, so the preview reflects every row
+        without building the full DataFrame.
+        """
+        try:
+            # Validate file (content is parsed by the stream below)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            totals = {col: pd.Series(dtype='int64') for col in columns}
+            total_rows = 0
+            
+            for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS, columns):
+                total_rows += len(chunk)
+                for col in columns:
+                    totals[col] = totals[col].add(chunk[col].value_counts(), fill_value=0)
+            
+            preview_results = {}
+            for col in columns:
+                counts = totals[col]
+                counts = counts[counts > 1].astype('int64')
+                if len(counts) == 0:
+                    continue
+                
+                top = counts.sort_values(ascending=False, kind='stable').head(max_values)
+                preview_results[col] = {
+                    'total_duplicates': int(counts.sum()),
+                    'unique_duplicate_values': len(counts),
+                    'sample_duplicates': [
+                        {'value': value, 'count': count}
+                        for value, count in zip(top.index.tolist(), top.tolist())
+                    ]
+                }
             
             return {
                 'success': True,
                 'preview_results': preview_results,
                 'checked_columns': columns,
                 'columns_with_duplicates': list(preview_results.keys()),
-                'sample_size': len(df_preview)
+                'sample_size': total_rows
             }
             
         except Exception as e:
@@ -1,16 +1,45 @@
 import pandas as pd
 import openpyxl
-from openpyxl.styles import PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font
 from openpyxl.utils.exceptions import IllegalCharacterError
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional, Iterator, Callable
 import os
 import re
 import tempfile
 import math
+import zipfile
+from .progress import ProgressTracker, OperationCancelled
 
 class ExcelUtils:
     """Utility class for Excel operations"""
     
+    # Excel hard limit per worksheet (header row included)
+    MAX_EXCEL_ROWS = 1048576
+    
+    STATUS_FILLS = {
+        'green': PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid"),
+        'yellow': PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid"),
+        'blue': PatternFill(start_color="00B0F0", end_color="00B0F0", fill_type="solid"),
+        'red': PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid"),
+        'orange': PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
+    }
+    
+    # file_path -> path of its parse cache, or None when the file is not cacheable (see set_parse_cache)
+    _parse_cache_path: Optional[Callable[[str], Optional[str]]] = None
+    
+    @classmethod
+    def set_parse_cache(cls, cache_path: Optional[Callable[[str], Optional[str]]]):
+        """
+        Let read_excel cache parsed frames
+        
+        cache_path(file_path) returns where the sanitized frame of that
+        file is pickled, or None for files whose content may change under
+        the same path (the web app passes UploadStore.parsed_cache_path).
+        None turns caching off.
+        """
+        cls._parse_cache_path = cache_path
+    
     @staticmethod
     def sanitize_sheet_name(name: str, max_length: int = 31) -> str:
         """Sanitize sheet name for Excel compatibility"""
@@ -89,102 +118,357 @@ class ExcelUtils:
             return []
     
     @staticmethod
-    def read_excel(file_path: str) -> pd.DataFrame:
-        """Read Excel file into DataFrame, support both .xls and .xlsx"""
+    def read_excel(file_path: str, usecols: Optional[List[str]] = None,
+                   progress: Optional[ProgressTracker] = None) -> pd.DataFrame:
+        """Read Excel file into DataFrame, support both .xls and .xlsx
+        
+        With usecols only those columns (named as in get_column_names) are
+        parsed and sanitized; they come back in file order. progress gets
+        the 'read' and 'sanitize' phases. With a parse cache configured
+        (see set_parse_cache), a cacheable file is parsed once and later
+        reads (of any columns) load the cached frame instead.
+        """
+        if progress:
+            progress.phase('read')
+        
+        positions = None
+        if usecols is not None:
+            all_columns = ExcelUtils.get_column_names(file_path)
+            missing = [col for col in usecols if col not in all_columns]
+            if missing:
+                raise Exception(f"Cột '{missing[0]}' không tồn tại trong file")
+            wanted = set(usecols)
+            positions = [i for i, col in enumerate(all_columns) if col in wanted]
+        
         try:
             # Check file extension to use appropriate engine
             file_ext = os.path.splitext(file_path)[1].lower()
             
-            if file_ext == '.xls':
-                # For .xls files, try xlrd first, then fallback to openpyxl
-                try:
-                    df = pd.read_excel(file_path, engine='xlrd')
-                except ImportError:
-                    # If xlrd not available, try openpyxl
-                    df = pd.read_excel(file_path, engine='openpyxl')
-            elif file_ext in ['.xlsx', '.xlsm']:
-                # Use openpyxl for .xlsx files
-                df = pd.read_excel(file_path, engine='openpyxl')
-            else:
-                # Try with default engine
-                df = pd.read_excel(file_path)
+            cache_path = ExcelUtils._parse_cache_path(file_path) if ExcelUtils._parse_cache_path else None
+            df = ExcelUtils._load_parsed(cache_path) if cache_path else None
+            if df is not None:
+                if positions is not None:
+                    df = df.iloc[:, positions]
+                    df.columns = [all_columns[i] for i in positions]
+                if progress:
+                    progress.phase('sanitize', len(df))
+                    progress.advance(len(df))
+                return df
+            
+            df = ExcelUtils._read_with_engine(file_path, file_ext, positions)
+            
+            if positions is not None:
+                # Keep the full-sheet names (duplicate headers are numbered over the whole sheet)
+                df.columns = [all_columns[i] for i in positions]
             
             # Clean the DataFrame after reading
-            return ExcelUtils.sanitize_dataframe(df)
+            if progress:
+                progress.phase('sanitize', len(df))
+            df = ExcelUtils.sanitize_dataframe(df)
+            if progress:
+                progress.advance(len(df))
+            
+            if cache_path and (positions is None or len(positions) == len(all_columns)):
+                ExcelUtils._store_parsed(df, cache_path)
+            return df
                 
+        except OperationCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Không thể đọc file {file_path}: {str(e)}")
     
     @staticmethod
-    def save_excel_safe(df: pd.DataFrame, output_path: str, sheet_name: str = 'Result') -> str:
-        """Safe method to save DataFrame to Excel - ALWAYS use .xlsx format"""
+    def _load_parsed(cache_path: str) -> Optional[pd.DataFrame]:
+        """Cached sanitized frame, or None if missing or unreadable"""
+        if not os.path.exists(cache_path):
+            return None
         try:
-            # Clean the DataFrame first
-            df_clean = ExcelUtils.sanitize_dataframe(df)
-            safe_sheet_name = ExcelUtils.sanitize_sheet_name(sheet_name)
+            return pd.read_pickle(cache_path)
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _store_parsed(df: pd.DataFrame, cache_path: str):
+        """Write the parse cache atomically; a failed write only loses the cache"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_pickle(temp_path)
+            os.replace(temp_path, cache_path)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _read_with_engine(file_path: str, file_ext: str, positions: Optional[List[int]]) -> pd.DataFrame:
+        """pandas read with the engine matching the extension"""
+        if file_ext == '.xls':
+            # For .xls files, try xlrd first, then fallback to openpyxl
+            try:
+                return pd.read_excel(file_path, engine='xlrd', usecols=positions)
+            except ImportError:
+                # If xlrd not available, try openpyxl
+                return pd.read_excel(file_path, engine='openpyxl', usecols=positions)
+        if file_ext in ['.xlsx', '.xlsm']:
+            # Use openpyxl for .xlsx files
+            return pd.read_excel(file_path, engine='openpyxl', usecols=positions)
+        # Try with default engine
+        return pd.read_excel(file_path, usecols=positions)
+    
+    @staticmethod
+    def _unique_column_names(header: Tuple) -> List[str]:
+        """Name header cells the way pandas does (Unnamed: i, duplicates as name.1)"""
+        names = []
+        seen = {}
+        for i, value in enumerate(header):
+            name = f"Unnamed: {i}" if value is None or str(value).strip() == '' else value
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        return names
+    
+    @staticmethod
+    def iter_excel_chunks(file_path: str, chunk_size: int = 50000,
+                          usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read the first sheet as a sequence of sanitized DataFrame chunks
+        
+        .xlsx/.xlsm files are streamed row by row through openpyxl's
+        read-only mode, so only one chunk is held in memory. Other formats
+        are read in full and sliced. Cell values are kept as read (no
+        float upcasting around blanks), so chunks agree with each other.
+        Chunk indexes continue across chunks (row i of the sheet keeps
+        index i, Excel row i + 2).
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext not in ['.xlsx', '.xlsm']:
+            df = ExcelUtils.read_excel(file_path, usecols)
+            if usecols is not None:
+                df = df[usecols]
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
+            return
+        
+        try:
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise Exception(f"Không thể đọc file {file_path}: {str(e)}")
+        
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            
+            columns = ExcelUtils._unique_column_names(header)
+            width = len(columns)
+            positions = list(range(width))
+            if usecols is not None:
+                missing = [col for col in usecols if col not in columns]
+                if missing:
+                    raise Exception(f"Cột '{missing[0]}' không tồn tại trong file")
+                positions = [columns.index(col) for col in usecols]
+                columns = list(usecols)
             
+            buffer = []
+            pending_blank = 0  # Blank rows count only if data follows them (as in pandas)
+            start_index = 0
+            
+            for row in rows:
+                if all(value is None for value in row):
+                    pending_blank += 1
+                    continue
+                
+                if pending_blank:
+                    buffer.extend([(None,) * len(positions)] * pending_blank)
+                    pending_blank = 0
+                
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                buffer.append(tuple(row[p] for p in positions))
+                
+                if len(buffer) >= chunk_size:
+                    chunk = pd.DataFrame(buffer[:chunk_size], columns=columns, dtype=object,
+                                         index=pd.RangeIndex(start_index, start_index + chunk_size))
+                    yield ExcelUtils.sanitize_dataframe(chunk)
+                    start_index += chunk_size
+                    buffer = buffer[chunk_size:]
+            
+            if buffer:
+                chunk = pd.DataFrame(buffer, columns=columns, dtype=object,
+                                     index=pd.RangeIndex(start_index, start_index + len(buffer)))
+                yield ExcelUtils.sanitize_dataframe(chunk)
+        finally:
+            wb.close()
+    
+    @staticmethod
+    def get_column_names(file_path: str) -> List[str]:
+        """Read only the header row of the first sheet"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext not in ['.xlsx', '.xlsm']:
+            return [col for col in ExcelUtils.read_excel_head(file_path, 0).columns]
+        
+        try:
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise Exception(f"Không thể đọc file {file_path}: {str(e)}")
+        try:
+            header = next(wb.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+            return ExcelUtils._unique_column_names(header)
+        finally:
+            wb.close()
+    
+    @staticmethod
+    def estimate_data_rows(file_path: str) -> Optional[int]:
+        """Estimated data rows of an .xlsx/.xlsm first sheet, from its dimension record
+
+        No cell is parsed, but the record is only what the writer claimed:
+        trailing rows that merely carry formatting are included. Good for
+        progress totals and counts shown as approximate (see
+        approximate_data_rows); use count_data_rows for an exact count.
+        None for other formats, and when the sheet has no dimension or one
+        covering the header row only (some writers always write "A1").
+        """
+        if os.path.splitext(file_path)[1].lower() not in ['.xlsx', '.xlsm']:
+            return None
+        try:
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise Exception(f"Không thể đọc file {file_path}: {str(e)}")
+        try:
+            max_row = wb.worksheets[0].max_row
+        finally:
+            wb.close()
+        if max_row is None or max_row <= 1:
+            return None
+        return max_row - 1
+
+    @staticmethod
+    def count_data_rows(file_path: str) -> int:
+        """Exact number of data rows (header excluded) of the first sheet
+
+        .xlsx/.xlsm rows are streamed (every cell is parsed, the sheet's
+        dimension record is not trusted); .xls files use xlrd's row count
+        when available.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+
+        if file_ext in ['.xlsx', '.xlsm']:
+            return sum(len(chunk) for chunk in ExcelUtils.iter_excel_chunks(file_path, usecols=[]))
+
+        if file_ext == '.xls':
+            try:
+                import xlrd
+                book = xlrd.open_workbook(file_path, on_demand=True)
+                try:
+                    return max(book.sheet_by_index(0).nrows - 1, 0)
+                finally:
+                    book.release_resources()
+            except ImportError:
+                pass
+
+        return len(ExcelUtils.read_excel(file_path))
+
+    @staticmethod
+    def approximate_data_rows(file_path: str) -> Tuple[int, bool]:
+        """Data rows for display without a full parse when possible
+
+        Returns (rows, estimated): the dimension estimate when the sheet
+        has a plausible one (estimated True), else the exact count.
+        """
+        estimate = ExcelUtils.estimate_data_rows(file_path)
+        if estimate is not None:
+            return estimate, True
+        return ExcelUtils.count_data_rows(file_path), False
+
+    @staticmethod
+    def read_excel_head(file_path: str, nrows: int, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read only the first nrows data rows (optionally only some columns)"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext not in ['.xlsx', '.xlsm']:
+            try:
+                engine = 'xlrd' if file_ext == '.xls' else None
+                df = pd.read_excel(file_path, engine=engine, nrows=nrows, usecols=usecols)
+            except Exception as e:
+                raise Exception(f"Không thể đọc file {file_path}: {str(e)}")
+            return ExcelUtils.sanitize_dataframe(df)
+        
+        if nrows <= 0:
+            columns = usecols if usecols is not None else ExcelUtils.get_column_names(file_path)
+            return pd.DataFrame(columns=columns)
+        
+        chunks = ExcelUtils.iter_excel_chunks(file_path, nrows, usecols)
+        try:
+            head = next(chunks, None)
+        finally:
+            chunks.close()  # Stop reading right after the first chunk
+        
+        if head is None:
+            columns = usecols if usecols is not None else ExcelUtils.get_column_names(file_path)
+            return pd.DataFrame(columns=columns)
+        return head
+    
+    @staticmethod
+    def save_excel_safe(df: pd.DataFrame, output_path: str, sheet_name: str = 'Result',
+                        shard_mode: str = 'sheets', progress: Optional[ProgressTracker] = None) -> str:
+        """Safe method to save DataFrame to Excel - ALWAYS use .xlsx format
+        
+        Output larger than one worksheet is sharded automatically
+        (see ShardedExcelWriter). Returns the path actually written.
+        progress gets the 'write' phase.
+        """
+        try:
             # ALWAYS save as .xlsx to avoid xlwt dependency
             if not output_path.lower().endswith('.xlsx'):
                 output_path = os.path.splitext(output_path)[0] + '.xlsx'
             
-            # Use openpyxl engine
-            df_clean.to_excel(output_path, sheet_name=safe_sheet_name, index=False, engine='openpyxl')
+            if progress:
+                progress.phase('write', len(df))
+            with ShardedExcelWriter(output_path, sheet_name, shard_mode=shard_mode, progress=progress) as writer:
+                writer.write(df)
             
-            return output_path
+            return writer.output_path
+        except OperationCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Lỗi khi lưu file: {str(e)}")
     
     @staticmethod
     def save_styled_excel(df: pd.DataFrame, output_path: str, styles: Dict[int, str] = None, 
-                         sheet_name: str = 'Result') -> str:
-        """Save DataFrame to Excel with optional styling"""
+                         sheet_name: str = 'Result', shard_mode: str = 'sheets',
+                         progress: Optional[ProgressTracker] = None) -> str:
+        """Save DataFrame to Excel with optional styling
+        
+        styles maps Excel row numbers (as if all data were on one sheet,
+        header = row 1) to a colour name in STATUS_FILLS. progress gets
+        the 'write' phase.
+        """
         try:
             # ALWAYS save as .xlsx for styling
             if not output_path.lower().endswith('.xlsx'):
                 output_path = os.path.splitext(output_path)[0] + '.xlsx'
             
-            safe_sheet_name = ExcelUtils.sanitize_sheet_name(sheet_name)
-            df_clean = ExcelUtils.sanitize_dataframe(df)
+            if progress:
+                progress.phase('write', len(df))
+            # Fills are applied while streaming, so no second load/save pass is needed
+            with ShardedExcelWriter(output_path, sheet_name, shard_mode=shard_mode, progress=progress) as writer:
+                writer.write(df, styles)
             
-            # First, create the Excel file without styling
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                df_clean.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-            
-            # Then apply styling if needed
-            if styles:
-                try:
-                    wb = openpyxl.load_workbook(output_path)
-                    ws = wb[safe_sheet_name]
-                    
-                    fills = {
-                        'green': PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid"),
-                        'yellow': PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid"),
-                        'blue': PatternFill(start_color="00B0F0", end_color="00B0F0", fill_type="solid"),
-                        'red': PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid"),
-                        'orange': PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-                    }
-                    
-                    for row_idx, color in styles.items():
-                        if color in fills and row_idx <= len(df_clean) + 1:  # Check row bounds
-                            for col in range(1, len(df_clean.columns) + 1):
-                                try:
-                                    cell = ws.cell(row=row_idx, column=col)
-                                    cell.fill = fills[color]
-                                except (IllegalCharacterError, Exception):
-                                    # Skip styling for problematic cells
-                                    continue
-                    
-                    wb.save(output_path)
-                except Exception as style_error:
-                    # If styling fails, keep the unstyled version
-                    print(f"Styling failed but file saved: {style_error}")
-            
-            return output_path
+            return writer.output_path
+        except OperationCancelled:
+            raise
         except Exception as e:
             # Final fallback: save without any styling
             try:
                 print(f"Advanced save failed, using basic save: {e}")
-                return ExcelUtils.save_excel_safe(df, output_path, sheet_name)
+                return ExcelUtils.save_excel_safe(df, output_path, sheet_name, shard_mode, progress)
             except Exception as final_error:
                 raise Exception(f"Lỗi nghiêm trọng khi lưu file: {str(final_error)}")
     
@@ -202,11 +486,7 @@ class ExcelUtils:
             wb = openpyxl.load_workbook(input_path)
             ws = wb.active
             
-            fills = {
-                'green': PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid"),
-                'yellow': PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid"),
-                'blue': PatternFill(start_color="00B0F0", end_color="00B0F0", fill_type="solid"),
-            }
+            fills = ExcelUtils.STATUS_FILLS
             
             for row_idx, color in styles.items():
                 if color in fills:
@@ -254,8 +534,37 @@ class ExcelUtils:
             }
     
     @staticmethod
-    def validate_excel_file(file_path: str) -> Tuple[bool, str]:
-        """Validate if file is a readable Excel file"""
+    def get_file_summary(file_path: str, rows: Optional[int] = None) -> Dict[str, Any]:
+        """get_file_info without parsing the whole sheet
+        
+        Column names and sample data come from the first rows only; rows is
+        the data row count when the caller already knows it (e.g. after
+        streaming the file), otherwise approximate_data_rows gives it and
+        rows_estimated tells whether it is only an estimate.
+        """
+        head = ExcelUtils.read_excel_head(file_path, 3)
+        estimated = False
+        if rows is None:
+            rows, estimated = ExcelUtils.approximate_data_rows(file_path)
+        return {
+            'filename': os.path.basename(file_path),
+            'file_path': file_path,
+            'file_size': os.path.getsize(file_path),
+            'file_extension': os.path.splitext(file_path)[1].lower(),
+            'rows': rows,
+            'rows_estimated': estimated,
+            'columns': len(head.columns),
+            'column_names': [str(col) for col in head.columns],
+            'sample_data': ExcelUtils.dataframe_to_dict_safe(head)
+        }
+    
+    @staticmethod
+    def validate_excel_file(file_path: str, read_content: bool = True) -> Tuple[bool, str]:
+        """Validate if file is a readable Excel file
+        
+        With read_content=False only existence and extension are checked,
+        for callers that parse the file themselves right after.
+        """
         if not os.path.exists(file_path):
             return False, "File không tồn tại"
         
@@ -265,6 +574,9 @@ class ExcelUtils:
         if file_ext not in allowed_extensions:
             return False, f"Định dạng file không được hỗ trợ: {file_ext}. Chỉ hỗ trợ: {', '.join(allowed_extensions)}"
         
+        if not read_content:
+            return True, "File Excel hợp lệ"
+        
         try:
             # Try to read the file to validate
             df = ExcelUtils.read_excel(file_path)
@@ -272,4 +584,172 @@ class ExcelUtils:
                 return True, "File Excel hợp lệ nhưng không có dữ liệu"
             return True, "File Excel hợp lệ"
         except Exception as e:
-            return False, f"Không thể đọc file Excel: {str(e)}"
\ No newline at end of file
+            return False, f"Không thể đọc file Excel: {str(e)}"
+
+
+class ShardedExcelWriter:
+    """Streaming .xlsx writer that shards output past Excel's row limit
+    
+    Data is appended chunk by chunk through openpyxl's write-only mode.
+    When a worksheet is full, writing continues on the next shard:
+    - shard_mode='sheets': Result_1, Result_2, ... sheets in one workbook
+    - shard_mode='files':  one workbook per shard, zipped together at close
+    The header row and status colours are repeated on every shard.
+    With a progress tracker, written rows are reported (and cancellation
+    checked) every PROGRESS_STEP rows; the last partial block is reported
+    at close.
+    """
+    
+    PROGRESS_STEP = 5000
+    
+    def __init__(self, output_path: str, sheet_name: str = 'Result', shard_mode: str = 'sheets',
+                 max_rows: Optional[int] = None, progress: Optional[ProgressTracker] = None):
+        if shard_mode not in ('sheets', 'files'):
+            raise ValueError(f"shard_mode không hợp lệ: {shard_mode}")
+        
+        self.output_path = output_path
+        self.sheet_name = sheet_name
+        self.shard_mode = shard_mode
+        # Data rows per shard (one row is reserved for the header)
+        self.rows_per_shard = (max_rows or ExcelUtils.MAX_EXCEL_ROWS) - 1
+        self.progress = progress
+        
+        self.columns = None
+        self.total_rows = 0
+        self.shard_paths = []
+        self._workbook = None
+        self._sheets = []
+        self._shard_rows = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+        return False
+    
+    @property
+    def shard_count(self) -> int:
+        return len(self._sheets) if self.shard_mode == 'sheets' else len(self.shard_paths)
+    
+    def write(self, df: pd.DataFrame, styles: Dict[int, str] = None):
+        """Append a chunk of rows
+        
+        styles uses global Excel row numbers: the n-th data row ever
+        written (0-based) is row n + 2, regardless of which shard it lands on.
+        """
+        if self.columns is None:
+            self.columns = [str(col) for col in df.columns]
+        
+        df_clean = ExcelUtils.sanitize_dataframe(df)
+        fills = ExcelUtils.STATUS_FILLS
+        
+        for values in df_clean.itertuples(index=False, name=None):
+            if self._workbook is None or self._shard_rows >= self.rows_per_shard:
+                self._next_shard()
+            
+            ws = self._sheets[-1]
+            color = styles.get(self.total_rows + 2) if styles else None
+            
+            if color in fills:
+                cells = []
+                for value in values:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.fill = fills[color]
+                    cells.append(cell)
+                ws.append(cells)
+            else:
+                ws.append(values)
+            
+            self._shard_rows += 1
+            self.total_rows += 1
+            
+            if self.progress and self.total_rows % self.PROGRESS_STEP == 0:
+                self.progress.advance(self.PROGRESS_STEP)
+    
+    def close(self) -> str:
+        """Flush all shards and return the final output path"""
+        remainder = self.total_rows % self.PROGRESS_STEP
+        if self.progress and remainder:
+            self.progress.advance(remainder)
+        
+        if self._workbook is None:
+            # Nothing written yet - still produce a sheet with the header
+            self.columns = self.columns or []
+            self._next_shard()
+        
+        if self.shard_mode == 'sheets':
+            # A single shard keeps the plain sheet name for compatibility
+            if len(self._sheets) == 1:
+                self._sheets[0].title = ExcelUtils.sanitize_sheet_name(self.sheet_name)
+            self._workbook.save(self.output_path)
+            self._workbook = None
+            return self.output_path
+        
+        self._save_file_shard()
+        if len(self.shard_paths) == 1:
+            os.replace(self.shard_paths[0], self.output_path)
+            self.shard_paths = [self.output_path]
+            return self.output_path
+        
+        zip_path = os.path.splitext(self.output_path)[0] + '.zip'
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for path in self.shard_paths:
+                archive.write(path, os.path.basename(path))
+        for path in self.shard_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.output_path = zip_path
+        return zip_path
+    
+    def _shard_sheet_name(self, number: int) -> str:
+        suffix = f"_{number}"
+        base = ExcelUtils.sanitize_sheet_name(self.sheet_name, 31 - len(suffix))
+        return base + suffix
+    
+    def _next_shard(self):
+        if self.shard_mode == 'files' and self._workbook is not None:
+            self._save_file_shard()
+        
+        if self._workbook is None:
+            self._workbook = openpyxl.Workbook(write_only=True)
+        
+        ws = self._workbook.create_sheet(self._shard_sheet_name(self.shard_count + 1))
+        
+        header = []
+        for name in self.columns:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        ws.append(header)
+        
+        self._sheets.append(ws)
+        self._shard_rows = 0
+    
+    def _save_file_shard(self):
+        stem, ext = os.path.splitext(self.output_path)
+        path = f"{stem}_{len(self.shard_paths) + 1}{ext}"
+        self._sheets[-1].title = ExcelUtils.sanitize_sheet_name(self.sheet_name)
+        self._workbook.save(path)
+        self.shard_paths.append(path)
+        self._workbook = None
+    
+    def _discard(self):
+        # Finish the write-only sheets so their temp files are closed cleanly
+        if self._workbook is not None:
+            for ws in self._sheets:
+                try:
+                    ws.close()
+                except Exception:
+                    pass
+        self._workbook = None
+        for path in self.shard_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,205 @@
+import ast
+import re
+import pandas as pd
+import numpy as np
+from typing import Any, Callable, Dict, List, Set
+
+class ColumnExpression:
+    """
+    Safe, vectorized expression for computed columns
+
+    Syntax (a subset of Python expressions):
+        upper(Ho) + ' ' + Ten
+        left(MaSP, 3)
+        Gia * SoLuong
+        [Đơn giá] * [Số lượng]      # brackets for names with spaces
+
+    The text is parsed once with `ast`, every node is checked against a
+    whitelist and compiled into a closure working on whole columns, so no
+    per-row eval happens. `+` adds numbers when both sides hold numbers and
+    concatenates text otherwise; `&` always concatenates (as in Excel).
+    """
+
+    # String literals are matched first so brackets inside them are left alone
+    BRACKET_PATTERN = re.compile(r"""('(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")|\[([^\[\]]+)\]""")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.columns: Set[str] = set()
+        self._aliases: Dict[str, str] = {}
+
+        source = self.BRACKET_PATTERN.sub(self._bracket_alias, text.strip())
+        try:
+            tree = ast.parse(source, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Biểu thức không hợp lệ '{text}': {e.msg}")
+
+        self._evaluate = self._compile(tree.body)
+
+    def evaluate(self, df: pd.DataFrame) -> pd.Series:
+        """Evaluate the expression over every row of df"""
+        missing = [col for col in self.columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Cột '{missing[0]}' không tồn tại trong file")
+
+        result = self._evaluate(df)
+        if not isinstance(result, pd.Series):
+            result = pd.Series([result] * len(df), index=df.index)
+        return result
+
+    def _bracket_alias(self, match) -> str:
+        if match.group(1) is not None:
+            return match.group(1)
+        alias = f"__col_{len(self._aliases)}"
+        self._aliases[alias] = match.group(2).strip()
+        return alias
+
+    # ---------- compilation ----------
+
+    def _compile(self, node: ast.AST) -> Callable[[pd.DataFrame], Any]:
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (str, int, float)) or isinstance(node.value, bool):
+                raise ValueError(f"Giá trị không được hỗ trợ: {node.value!r}")
+            value = node.value
+            return lambda df: value
+
+        if isinstance(node, ast.Name):
+            column = self._aliases.get(node.id, node.id)
+            self.columns.add(column)
+            return lambda df: df[column]
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._compile(node.operand)
+            sign = -1 if isinstance(node.op, ast.USub) else 1
+            return lambda df: sign * _to_number(operand(df))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            left = self._compile(node.left)
+            right = self._compile(node.right)
+            if isinstance(node.op, ast.Add):
+                return lambda df: _add(left(df), right(df))
+            if isinstance(node.op, ast.BitAnd):
+                return lambda df: _to_text(left(df)) + _to_text(right(df))
+            operator = _BINARY_OPERATORS[type(node.op)]
+            return lambda df: operator(_to_number(left(df)), _to_number(right(df)))
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id.lower() not in _FUNCTIONS:
+                name = getattr(node.func, 'id', '?')
+                raise ValueError(f"Hàm không được hỗ trợ: {name}. Các hàm hỗ trợ: {', '.join(sorted(_FUNCTIONS))}")
+            if node.keywords:
+                raise ValueError("Không hỗ trợ tham số dạng tên=giá trị")
+            function = _FUNCTIONS[node.func.id.lower()]
+            args = [self._compile(arg) for arg in node.args]
+            return lambda df: function(*[arg(df) for arg in args])
+
+        raise ValueError(f"Cú pháp không được hỗ trợ trong biểu thức '{self.text}'")
+
+
+def _is_blank(value: Any) -> Any:
+    if isinstance(value, pd.Series):
+        return value.isna() | (value.astype(str).str.strip() == '')
+    return value is None or str(value).strip() == ''
+
+
+def _to_text(value: Any) -> Any:
+    """Text form of a value; blanks become '' and integral floats lose '.0'"""
+    if isinstance(value, pd.Series):
+        if pd.api.types.is_float_dtype(value):
+            finite = np.isfinite(value)
+            integral = (finite & (value % 1 == 0)).to_numpy()
+            as_int = value.where(integral, 0).astype('int64').astype(str).to_numpy(dtype=object)
+            text = np.where(integral, as_int, value.astype(str).to_numpy(dtype=object))
+            return pd.Series(np.where(value.isna().to_numpy(), '', text), index=value.index, dtype=object)
+        return value.astype(str).where(~_is_blank(value), '')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return '' if value is None else str(value)
+
+
+def _to_number(value: Any) -> Any:
+    if isinstance(value, pd.Series):
+        return pd.to_numeric(value, errors='coerce')
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _is_numeric(value: Any) -> bool:
+    """True when every non-blank value is a number (numeric-looking text is still text)"""
+    if isinstance(value, pd.Series):
+        if pd.api.types.is_numeric_dtype(value):
+            return True
+        kind = pd.api.types.infer_dtype(value[~_is_blank(value)], skipna=True)
+        return kind in ('integer', 'floating', 'mixed-integer-float', 'decimal', 'empty')
+    return isinstance(value, (int, float))
+
+
+def _add(left: Any, right: Any) -> Any:
+    if _is_numeric(left) and _is_numeric(right):
+        return _to_number(left) + _to_number(right)
+    return _to_text(left) + _to_text(right)
+
+
+def _text_function(method: Callable) -> Callable:
+    def apply(value, *args):
+        text = _to_text(value)
+        if isinstance(text, pd.Series):
+            return method(text.str, *args)
+        return method(pd.Series([text]).str, *args).iloc[0]
+    return apply
+
+
+def _coalesce(*values):
+    result = values[0]
+    for value in values[1:]:
+        if isinstance(result, pd.Series):
+            result = result.where(~_is_blank(result), value)
+        elif _is_blank(result):
+            result = value
+    return result
+
+
+def _round(value, digits=0):
+    return np.round(_to_number(value), int(digits))
+
+
+_BINARY_OPERATORS = {
+    ast.Add: None,  # handled by _add (numeric or text)
+    ast.BitAnd: None,  # text concatenation
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.FloorDiv: lambda a, b: a // b,
+    ast.Mod: lambda a, b: a % b,
+    ast.Pow: lambda a, b: a ** b,
+}
+
+_FUNCTIONS = {
+    'upper': _text_function(lambda s: s.upper()),
+    'lower': _text_function(lambda s: s.lower()),
+    'title': _text_function(lambda s: s.title()),
+    'trim': _text_function(lambda s: s.strip()),
+    'len': _text_function(lambda s: s.len()),
+    'left': _text_function(lambda s, n: s[:int(n)]),
+    'right': _text_function(lambda s, n: s[-int(n):] if int(n) > 0 else s[:0]),
+    'mid': _text_function(lambda s, start, n: s[int(start) - 1:int(start) - 1 + int(n)]),
+    'replace': _text_function(lambda s, old, new: s.replace(str(old), str(new), regex=False)),
+    'concat': lambda *values: sum((_to_text(value) for value in values[1:]), _to_text(values[0])),
+    'text': _to_text,
+    'number': _to_number,
+    'round': _round,
+    'abs': lambda value: np.abs(_to_number(value)),
+    'coalesce': _coalesce,
+}
+
+
+def parse_expressions(expressions: List[Any]) -> List[Any]:
+    """Parse [(new_column, expression_text), ...] into [(new_column, ColumnExpression), ...]"""
+    parsed = []
+    for new_column, text in expressions:
+        if not str(new_column).strip():
+            raise ValueError("Tên cột mới không được để trống")
+        parsed.append((new_column, ColumnExpression(text)))
+    return parsed
@@ -1,6 +1,7 @@
 import pandas as pd
 from .excel_utils import ExcelUtils
-from typing import Dict, Any, Tuple, List
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from typing import Dict, Any, Tuple, List, Optional, Callable
 import os
 import tempfile
 
@@ -10,9 +11,13 @@ class FileComparator:
     def __init__(self):
         self.utils = ExcelUtils()
     
-    def compare_full_rows(self, file1_path: str, file2_path: str, output_path: str) -> Dict[str, Any]:
+    def compare_full_rows(self, file1_path: str, file2_path: str, output_path: str,
+                          progress_callback: Optional[Callable] = None,
+                          cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """Compare full rows between two files - SIMPLE AND RELIABLE VERSION"""
         try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
             # Validate files first
             valid1, msg1 = self.utils.validate_excel_file(file1_path)
             if not valid1:
@@ -23,14 +28,11 @@ class FileComparator:
                 return {'success': False, 'error': f"File 2 không hợp lệ: {msg2}"}
             
             # Read files
-            df1 = self.utils.read_excel(file1_path)
-            df2 = self.utils.read_excel(file2_path)
-            
-            # Simple comparison - convert all rows to strings and compare
-            df1_str = df1.astype(str).apply(lambda x: '|'.join(x), axis=1)
-            df2_str = df2.astype(str).apply(lambda x: '|'.join(x), axis=1)
+            df1 = self.utils.read_excel(file1_path, progress=progress)
+            df2 = self.utils.read_excel(file2_path, progress=progress)
             
-            matches = df1_str.isin(df2_str)
+            progress.phase('compute', len(df1))
+            matches = self.match_rows(df1, df2)
             
             # Get unmatched indices and data
             unmatched_indices = []
@@ -57,7 +59,7 @@ class FileComparator:
             df_result['EXCEL_ROW'] = df_result.index + 2
             
             # Save with simple method (no styling complications)
-            self.utils.save_excel_safe(df_result, output_path, "So_sanh")
+            self.utils.save_excel_safe(df_result, output_path, "So_sanh", progress=progress)
             
             # Statistics
             stats = {
@@ -81,34 +83,43 @@ class FileComparator:
                 'file2_info': self.utils.get_file_info(file2_path)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi so sánh: {str(e)}"}
     
     def compare_specific_columns(self, file1_path: str, file2_path: str, 
-                               col1: str, col2: str, output_path: str) -> Dict[str, Any]:
-        """Compare specific columns between two files - SIMPLE AND RELIABLE VERSION"""
+                               col1: str, col2: str, output_path: str,
+                               progress_callback: Optional[Callable] = None,
+                               cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """Compare specific columns between two files - SIMPLE AND RELIABLE VERSION
+        
+        File 2 only contributes col2, so only that column of it is read.
+        """
         try:
-            # Validate files first
-            valid1, msg1 = self.utils.validate_excel_file(file1_path)
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            # Validate files first (they are parsed right below)
+            valid1, msg1 = self.utils.validate_excel_file(file1_path, read_content=False)
             if not valid1:
                 return {'success': False, 'error': f"File 1 không hợp lệ: {msg1}"}
             
-            valid2, msg2 = self.utils.validate_excel_file(file2_path)
+            valid2, msg2 = self.utils.validate_excel_file(file2_path, read_content=False)
             if not valid2:
                 return {'success': False, 'error': f"File 2 không hợp lệ: {msg2}"}
             
-            df1 = self.utils.read_excel(file1_path)
-            df2 = self.utils.read_excel(file2_path)
-            
-            # Check if columns exist
-            if col1 not in df1.columns:
+            # Check if columns exist (header only)
+            if col1 not in self.utils.get_column_names(file1_path):
                 return {'success': False, 'error': f"Cột '{col1}' không tồn tại trong file 1"}
-            if col2 not in df2.columns:
+            if col2 not in self.utils.get_column_names(file2_path):
                 return {'success': False, 'error': f"Cột '{col2}' không tồn tại trong file 2"}
             
+            df1 = self.utils.read_excel(file1_path, progress=progress)
+            df2 = self.utils.read_excel(file2_path, usecols=[col2], progress=progress)
+            
             # Compare specific columns
-            file2_values = set(df2[col2].astype(str).values)
-            matches = df1[col1].astype(str).isin(file2_values)
+            progress.phase('compute', len(df1))
+            matches = self.match_rows(df1, df2, col1, col2)
             
             # Get unmatched indices and data
             unmatched_indices = []
@@ -137,7 +148,7 @@ class FileComparator:
             df_result['COMPARED_VALUE'] = df1[col1].astype(str)
             
             # Save with simple method
-            self.utils.save_excel_safe(df_result, output_path, f"So_sanh_{col1}")
+            self.utils.save_excel_safe(df_result, output_path, f"So_sanh_{col1}", progress=progress)
             
             # Statistics
             stats = {
@@ -162,16 +173,36 @@ class FileComparator:
                 'file2_info': self.utils.get_file_info(file2_path)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi so sánh cột: {str(e)}"}
     
+    def match_rows(self, df1: pd.DataFrame, df2: pd.DataFrame,
+                   col1: str = None, col2: str = None) -> pd.Series:
+        """Whether each row of df1 has a match in df2 (full row, or col1 value against col2 values)"""
+        if col1 is None:
+            # Simple comparison - convert all rows to strings and compare
+            df1_str = df1.astype(str).apply(lambda x: '|'.join(x), axis=1)
+            df2_str = df2.astype(str).apply(lambda x: '|'.join(x), axis=1)
+            return df1_str.isin(df2_str)
+        
+        file2_values = set(df2[col2].astype(str).values)
+        return df1[col1].astype(str).isin(file2_values)
+    
     def get_unmatched_details(self, file1_path: str, file2_path: str, compare_type: str = 'full_row', 
-                            col1: str = None, col2: str = None) -> Dict[str, Any]:
+                            col1: str = None, col2: str = None,
+                            progress_callback: Optional[Callable] = None,
+                            cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """Get detailed information about unmatched rows"""
         try:
-            df1 = self.utils.read_excel(file1_path)
-            df2 = self.utils.read_excel(file2_path)
+            progress = ProgressTracker(progress_callback, cancel_token)
+            df1 = self.utils.read_excel(file1_path, progress=progress)
+            # Column comparison only needs col2 of file 2
+            usecols2 = [col2] if compare_type != 'full_row' and col2 else None
+            df2 = self.utils.read_excel(file2_path, usecols=usecols2, progress=progress)
             
+            progress.phase('compute', len(df1))
             unmatched_details = []
             
             if compare_type == 'full_row':
@@ -210,6 +241,8 @@ class FileComparator:
                 'file2_rows': len(df2)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi lấy chi tiết: {str(e)}"}
     
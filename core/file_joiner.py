@@ -1,6 +1,7 @@
 import pandas as pd
 from .excel_utils import ExcelUtils
-from typing import Dict, Any, List
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from typing import Dict, Any, List, Optional, Callable
 import os
 
 class FileJoiner:
@@ -10,9 +11,13 @@ class FileJoiner:
         self.utils = ExcelUtils()
     
     def join_files(self, file1_path: str, file2_path: str, 
-                  join_columns: List[tuple], output_path: str) -> Dict[str, Any]:
+                  join_columns: List[tuple], output_path: str,
+                  progress_callback: Optional[Callable] = None,
+                  cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """Join two files based on specified columns"""
         try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
             # Validate files first
             valid1, msg1 = self.utils.validate_excel_file(file1_path)
             if not valid1:
@@ -22,8 +27,8 @@ class FileJoiner:
             if not valid2:
                 return {'success': False, 'error': f"File 2 không hợp lệ: {msg2}"}
             
-            df1 = self.utils.read_excel(file1_path)
-            df2 = self.utils.read_excel(file2_path)
+            df1 = self.utils.read_excel(file1_path, progress=progress)
+            df2 = self.utils.read_excel(file2_path, progress=progress)
             
             # Validate join columns
             for col1, col2 in join_columns:
@@ -32,23 +37,8 @@ class FileJoiner:
                 if col2 not in df2.columns:
                     return {'success': False, 'error': f"Cột '{col2}' không tồn tại trong file 2"}
             
-            # Prepare join keys
-            join_key_suffix = 1
-            for col1, col2 in join_columns:
-                df1[f'join_key_{join_key_suffix}'] = df1[col1].astype(str)
-                df2[f'join_key_{join_key_suffix}'] = df2[col2].astype(str)
-                join_key_suffix += 1
-            
-            # Perform join
-            left_on = [f'join_key_{i+1}' for i in range(len(join_columns))]
-            right_on = [f'join_key_{i+1}' for i in range(len(join_columns))]
-            
-            merged_df = pd.merge(df1, df2, left_on=left_on, right_on=right_on, 
-                               how='left', indicator=True)
-            
-            # Remove temporary key columns
-            key_cols = [col for col in merged_df.columns if 'join_key' in col]
-            merged_df = merged_df.drop(columns=key_cols)
+            progress.phase('compute', len(df1))
+            merged_df = self.join_frames(df1, df2, join_columns)
             
             # Prepare styles for joined rows (actual coloring)
             styles = {}
@@ -58,7 +48,7 @@ class FileJoiner:
                     styles[excel_row] = 'green'  # Color joined rows green
             
             # Save main result with coloring
-            self.utils.save_styled_excel(merged_df, output_path, styles, "Joined_Result")
+            self.utils.save_styled_excel(merged_df, output_path, styles, "Joined_Result", progress=progress)
             
             # Save not joined rows to separate file if any
             not_joined_rows = merged_df[merged_df['_merge'] == 'left_only']
@@ -68,7 +58,7 @@ class FileJoiner:
                 not_joined_path = output_path.replace('.xlsx', '_not_joined.xlsx')
                 not_joined_df = not_joined_rows.drop(columns=['_merge'])
                 # Use save_excel_safe instead of save_excel
-                self.utils.save_excel_safe(not_joined_df, not_joined_path, 'Not_Joined')
+                self.utils.save_excel_safe(not_joined_df, not_joined_path, 'Not_Joined', progress=progress)
                 not_joined_file = not_joined_path
             
             # Statistics
@@ -95,9 +85,34 @@ class FileJoiner:
                 'file2_info': self.utils.get_file_info(file2_path)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi join: {str(e)}"}
     
+    def join_frames(self, df1: pd.DataFrame, df2: pd.DataFrame, join_columns: List[tuple]) -> pd.DataFrame:
+        """Left-join two in-memory frames on (col1, col2) pairs, with a '_merge' indicator column"""
+        df1 = df1.copy()
+        df2 = df2.copy()
+        
+        # Prepare join keys
+        join_key_suffix = 1
+        for col1, col2 in join_columns:
+            df1[f'join_key_{join_key_suffix}'] = df1[col1].astype(str)
+            df2[f'join_key_{join_key_suffix}'] = df2[col2].astype(str)
+            join_key_suffix += 1
+        
+        # Perform join
+        left_on = [f'join_key_{i+1}' for i in range(len(join_columns))]
+        right_on = [f'join_key_{i+1}' for i in range(len(join_columns))]
+        
+        merged_df = pd.merge(df1, df2, left_on=left_on, right_on=right_on, 
+                           how='left', indicator=True)
+        
+        # Remove temporary key columns
+        key_cols = [col for col in merged_df.columns if 'join_key' in col]
+        return merged_df.drop(columns=key_cols)
+    
     def get_columns(self, file_path: str) -> Dict[str, Any]:
         """Get column names from file"""
         try:
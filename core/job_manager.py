@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+from .progress import CancelToken
+
+class JobManager:
+    """
+    Run long operations in a local worker pool and keep their status
+
+    submit() returns a job id right away; get() returns a snapshot with
+    status ('queued', 'running', 'done', 'failed', 'cancelled'), progress,
+    timing and, once finished, the operation's result. The operation is
+    called with progress_callback and cancel_token keyword arguments (see
+    ProgressTracker), so cancel() stops it at its next chunk. No broker is
+    involved: jobs live in this process and finished ones are forgotten
+    after FINISHED_TTL seconds.
+    """
+
+    # Finished jobs are kept this long for polling clients
+    FINISHED_TTL = 3600
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: Optional[int] = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        # Jobs allowed to wait for a worker (None: unlimited)
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='excel-job')
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.tokens: Dict[str, CancelToken] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, func: Callable, *args, name: str = '', **kwargs) -> Optional[str]:
+        """
+        Queue func(*args, progress_callback=..., cancel_token=..., **kwargs)
+        and return its job id
+
+        Args:
+            func: Operation to run; its return value becomes the job result
+            name: Label shown to clients (e.g. the route or operation)
+
+        Returns:
+            Job id, or None when max_queued jobs are already waiting
+        """
+        self._purge()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            if self.max_queued is not None:
+                queued = sum(1 for job in self.jobs.values() if job['status'] == 'queued')
+                if queued >= self.max_queued:
+                    return None
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'name': name,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'progress': {'phase': None, 'done': 0, 'total': None, 'percent': None},
+                'result': None,
+                'error': None
+            }
+            self.tokens[job_id] = CancelToken()
+        self.executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job (None if unknown or expired)"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            if job['status'] == 'queued':
+                snapshot['queue_position'] = sum(
+                    1 for other in self.jobs.values()
+                    if other['status'] == 'queued' and other['submitted_at'] <= job['submitted_at'])
+
+        end = snapshot['finished_at'] or time.time()
+        snapshot['elapsed'] = round(end - (snapshot['started_at'] or end), 1)
+        return snapshot
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; False if the job is unknown or already finished"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['finished_at'] is not None:
+                return False
+            self.tokens[job_id].cancel()
+            job['cancel_requested'] = True
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self.lock:
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+            for job in self.jobs.values():
+                counts[job['status']] += 1
+        counts['workers'] = self.max_workers
+        counts['max_queued'] = self.max_queued
+        return counts
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str, func: Callable, args: tuple, kwargs: dict):
+        token = self.tokens[job_id]
+        if token.cancelled:
+            # Cancelled while still queued
+            self._update(job_id, status='cancelled', finished_at=time.time())
+            return
+
+        def report(phase: str, done: int, total: Optional[int]):
+            percent = round(min(done / total, 1) * 100, 1) if total else None
+            self._update(job_id, progress={'phase': phase, 'done': done, 'total': total, 'percent': percent})
+
+        self._update(job_id, status='running', started_at=time.time())
+        try:
+            result = func(*args, progress_callback=report, cancel_token=token, **kwargs)
+            # A run that finished before noticing the request still counts as done
+            stopped = result.get('cancelled') if isinstance(result, dict) else token.cancelled
+            status = 'cancelled' if stopped else 'done'
+            self._update(job_id, status=status, result=result, finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time())
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def _purge(self):
+        """Forget finished jobs older than FINISHED_TTL"""
+        limit = time.time() - self.FINISHED_TTL
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job['finished_at'] is not None and job['finished_at'] < limit]
+            for job_id in expired:
+                del self.jobs[job_id]
+                del self.tokens[job_id]
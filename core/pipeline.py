@@ -0,0 +1,371 @@
+import pandas as pd
+import json
+import os
+from .excel_utils import ExcelUtils
+from .column_merger import ColumnMerger
+from .row_splitter import RowSplitter
+from .duplicate_finder import DuplicateFinder
+from .file_joiner import FileJoiner
+from .file_comparator import FileComparator
+from .expression_engine import parse_expressions
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from typing import Dict, Any, List, Optional, Callable
+
+class Pipeline:
+    """
+    Run a recipe of operations over one in-memory DataFrame
+
+    A recipe is plain JSON, so it can be saved and re-run on new files:
+
+        {
+            "name": "Quy trình hằng ngày",
+            "steps": [
+                {"operation": "merge_columns",
+                 "params": {"merge_configs": [[["Ho", "Ten"], "Họ tên", " "]]}},
+                {"operation": "split_rows",
+                 "params": {"id_columns": ["MSSV"], "value_columns": ["2021", "2022"],
+                            "var_name": "Năm", "value_name": "Điểm"}},
+                {"operation": "deduplicate", "params": {"columns": ["MSSV", "Năm"]}},
+                {"operation": "join",
+                 "params": {"file_path": "master.xlsx", "join_columns": [["MSSV", "MSSV"]]}}
+            ]
+        }
+
+    The input file is read once, every step hands its DataFrame to the
+    next one, and only the final result is written.
+    """
+
+    # operation name -> (handler method, description)
+    OPERATIONS = {
+        'merge_columns': ('_step_merge_columns', 'Gộp cột'),
+        'compute_columns': ('_step_compute_columns', 'Tạo cột tính toán'),
+        'split_rows': ('_step_split_rows', 'Tách cột thành dòng'),
+        'explode_rows': ('_step_explode_rows', 'Tách giá trị trong ô thành dòng'),
+        'pivot_rows': ('_step_pivot_rows', 'Chuyển dòng thành cột'),
+        'deduplicate': ('_step_deduplicate', 'Loại bỏ trùng lặp'),
+        'join': ('_step_join', 'Join với file khác'),
+        'compare': ('_step_compare', 'So sánh với file khác'),
+    }
+
+    def __init__(self):
+        self.utils = ExcelUtils()
+        self.merger = ColumnMerger()
+        self.splitter = RowSplitter()
+        self.duplicate_finder = DuplicateFinder()
+        self.joiner = FileJoiner()
+        self.comparator = FileComparator()
+
+    def run(self, recipe: Dict[str, Any], file_path: str, output_path: str,
+            progress_callback: Optional[Callable] = None,
+            cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Run every step of a recipe on file_path and save the final result
+
+        Args:
+            recipe: Recipe dictionary (see class docstring)
+            file_path: Path to input Excel file
+            output_path: Path for output file
+
+        Returns:
+            Dictionary with success status and results
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+
+            error = self.validate_recipe(recipe)
+            if error:
+                return {'success': False, 'error': error}
+
+            # Validate file (the pruned read below parses it)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+
+            # Only the columns some step (or the output) needs are read
+            plan = self.plan(recipe, file_path)
+            df = self.utils.read_excel(file_path, usecols=plan['input_columns'], progress=progress)
+            original_rows = len(df)
+            original_columns = plan['file_columns']
+            steps_info = []
+
+            progress.phase('compute', original_rows)
+            for number, step in enumerate(recipe['steps'], 1):
+                progress.check()
+                operation = step['operation']
+                handler = getattr(self, self.OPERATIONS[operation][0])
+                rows_before = len(df)
+
+                try:
+                    df = handler(df, step.get('params', {}))
+                except (ValueError, KeyError) as step_error:
+                    message = str(step_error) if isinstance(step_error, ValueError) else f"Thiếu tham số {step_error}"
+                    return {'success': False,
+                            'error': f"Bước {number} ({self.OPERATIONS[operation][1]}): {message}",
+                            'steps': steps_info}
+
+                steps_info.append({
+                    'step': number,
+                    'operation': operation,
+                    'description': self.OPERATIONS[operation][1],
+                    'rows_before': rows_before,
+                    'rows_after': len(df),
+                    'columns_after': len(df.columns)
+                })
+
+            # Only the final result is written
+            output_path = self.utils.save_excel_safe(df.reset_index(drop=True), output_path, "Pipeline_Result",
+                                                     progress=progress)
+
+            stats = {
+                'recipe_name': recipe.get('name', ''),
+                'original_rows': original_rows,
+                'original_columns': original_columns,
+                'columns_read': len(plan['input_columns']) if plan['input_columns'] is not None else original_columns,
+                'final_rows': len(df),
+                'final_columns': len(df.columns),
+                'steps': steps_info,
+                'output_file': output_path,
+                'note': f"Đã chạy {len(steps_info)} bước, kết quả có {len(df)} dòng"
+            }
+
+            return {
+                'success': True,
+                'stats': stats,
+                'sample_data': self.utils.dataframe_to_dict_safe(df.head(10)),
+                'message': 'Chạy quy trình hoàn tất'
+            }
+
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi chạy quy trình: {str(e)}"}
+
+    def validate_recipe(self, recipe: Any) -> Optional[str]:
+        """Return an error message for a malformed recipe, else None"""
+        if not isinstance(recipe, dict) or not isinstance(recipe.get('steps'), list):
+            return "Quy trình phải là JSON có danh sách 'steps'"
+        if not recipe['steps']:
+            return "Quy trình chưa có bước nào"
+
+        for number, step in enumerate(recipe['steps'], 1):
+            if not isinstance(step, dict) or step.get('operation') not in self.OPERATIONS:
+                operation = step.get('operation') if isinstance(step, dict) else step
+                return (f"Bước {number}: thao tác không hợp lệ '{operation}'. "
+                        f"Các thao tác hỗ trợ: {', '.join(self.OPERATIONS)}")
+            if not isinstance(step.get('params', {}), dict):
+                return f"Bước {number}: 'params' phải là một đối tượng JSON"
+        return None
+
+    def plan(self, recipe: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """
+        Work out which input columns a recipe actually uses
+        
+        Steps are walked from last to first, tracking the set of columns
+        still needed downstream (None = every column, e.g. when the output
+        keeps all of them). Each step maps the set it must produce to the
+        set it consumes, so columns no step touches and the output drops
+        are never read.
+        
+        Returns:
+            {'file_columns': number of columns in the file,
+             'input_columns': columns to read in file order, or None for all,
+             'steps': [{'operation', 'needs'}] in recipe order}
+        """
+        file_columns = self.utils.get_column_names(file_path)
+        required = None  # The output of the last step is written as a whole
+        steps_needs = []
+        
+        for step in reversed(recipe['steps']):
+            required = self._step_requirements(step['operation'], step.get('params', {}),
+                                               required, file_columns)
+            steps_needs.append({
+                'operation': step['operation'],
+                'needs': sorted(map(str, required)) if required is not None else None
+            })
+        steps_needs.reverse()
+        
+        input_columns = None
+        if required is not None:
+            input_columns = [col for col in file_columns if col in required]
+            if not input_columns and file_columns:
+                input_columns = file_columns[:1]  # Keep the row count
+            if len(input_columns) == len(file_columns):
+                input_columns = None
+        
+        return {
+            'file_columns': len(file_columns),
+            'input_columns': input_columns,
+            'steps': steps_needs
+        }
+    
+    def _step_requirements(self, operation: str, params: Dict[str, Any], after: Optional[set],
+                           file_columns: List[str]) -> Optional[set]:
+        """Columns a step consumes to produce `after` (None = all columns)"""
+        try:
+            if operation == 'merge_columns':
+                if after is None:
+                    return None
+                # Every config is validated and merged, even one whose output is dropped later
+                configs = params['merge_configs']
+                return (set(after) - {name for _, name, _ in configs}) | {col for cols, _, _ in configs for col in cols}
+            
+            if operation == 'compute_columns':
+                if after is None:
+                    return None
+                # Every expression is evaluated, used downstream or not
+                needed = set(after)
+                for name, expression in reversed(parse_expressions(params['expressions'])):
+                    needed.discard(name)
+                    needed |= expression.columns
+                return needed
+            
+            if operation == 'split_rows':
+                return set(params['id_columns']) | set(params['value_columns'])
+            
+            if operation == 'explode_rows':
+                if params.get('id_columns'):
+                    return set(params['id_columns']) | {params['split_column']}
+                return None if after is None else (set(after) - {'Excel_Row'}) | {params['split_column']}
+            
+            if operation == 'pivot_rows':
+                return set(params['id_columns']) | {params['column_variable'], params['value_column']}
+            
+            if operation == 'deduplicate':
+                if after is None or not params.get('columns'):
+                    return None
+                return set(after) | set(params['columns'])
+            
+            if operation == 'join':
+                if after is None:
+                    return None
+                # Left columns sharing a name with the other file change the
+                # suffixes of the result, so they are always kept
+                other_columns = set(self.utils.get_column_names(params['file_path']))
+                needed = {col[:-2] if str(col).endswith('_x') else col for col in after}
+                needed |= {col1 for col1, _ in params['join_columns']}
+                needed |= {col for col in file_columns if col in other_columns}
+                return needed
+            
+            if operation == 'compare':
+                if after is None or not params.get('col1'):
+                    return None
+                return (set(after) - {'MATCH_STATUS'}) | {params['col1']}
+        except Exception:
+            # Malformed params are reported by the step itself; read everything
+            return None
+        
+        return None
+    
+    @staticmethod
+    def save_recipe(recipe: Dict[str, Any], path: str) -> str:
+        """Save a recipe as a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(recipe, f, ensure_ascii=False, indent=2)
+        return path
+
+    @staticmethod
+    def load_recipe(path: str) -> Dict[str, Any]:
+        """Load a recipe saved with save_recipe"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    # ---------- steps: DataFrame in, DataFrame out ----------
+
+    def _require_columns(self, df: pd.DataFrame, columns: List[str]):
+        for col in columns:
+            if col not in df.columns:
+                raise ValueError(f"Cột '{col}' không tồn tại")
+
+    def _step_merge_columns(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        merge_configs = [(list(cols), name, sep) for cols, name, sep in params['merge_configs']]
+        null_mode = params.get('null_mode', 'skip')
+        if null_mode not in ColumnMerger.NULL_MODES:
+            raise ValueError(f"Chế độ xử lý ô trống không hợp lệ: {null_mode}")
+        for columns_to_merge, new_column_name, _ in merge_configs:
+            self._require_columns(df, columns_to_merge)
+            if not str(new_column_name).strip():
+                raise ValueError("Tên cột mới không được để trống")
+
+        df_result, _ = self.merger.merge_frame(df, merge_configs, null_mode, params.get('placeholder', ''))
+        return df_result
+
+    def _step_compute_columns(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        df_result, _ = self.merger.compute_frame(df, parse_expressions(params['expressions']))
+        return df_result
+
+    def _step_split_rows(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        id_columns = params['id_columns']
+        value_columns = params['value_columns']
+        self._require_columns(df, id_columns + value_columns)
+        return self.splitter.melt_frame(df, id_columns, value_columns,
+                                        params.get('var_name', 'Variable'), params.get('value_name', 'Value'))
+
+    def _step_explode_rows(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        split_column = params['split_column']
+        id_columns = params.get('id_columns') or [col for col in df.columns if col != split_column]
+        self._require_columns(df, id_columns + [split_column])
+        df_result, _ = self.splitter.explode_frame(df.reset_index(drop=True), split_column, id_columns,
+                                                   params.get('delimiter', ';'),
+                                                   bool(params.get('use_regex', False)),
+                                                   bool(params.get('keep_empty', False)))
+        return df_result
+
+    def _step_pivot_rows(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        id_columns = params['id_columns']
+        column_variable = params['column_variable']
+        value_column = params['value_column']
+        aggregation = params.get('aggregation', 'sum')
+        error = self.splitter.validate_pivot(list(df.columns), id_columns, column_variable,
+                                             value_column, aggregation)
+        if error:
+            raise ValueError(error)
+        df_result, _ = self.splitter.pivot_frame(df, id_columns, column_variable, value_column,
+                                                 aggregation, params.get('separator', ', '))
+        return df_result
+
+    def _step_deduplicate(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        columns = params.get('columns') or None
+        if columns:
+            self._require_columns(df, columns)
+        return self.duplicate_finder.deduplicate_frame(df, columns, params.get('keep', 'first'))
+
+    def _read_other_file(self, params: Dict[str, Any], usecols: Optional[List[str]] = None) -> pd.DataFrame:
+        other_path = params['file_path']
+        valid, msg = self.utils.validate_excel_file(other_path, read_content=False)
+        if not valid:
+            raise ValueError(f"File '{os.path.basename(other_path)}' không hợp lệ: {msg}")
+        if usecols is not None:
+            missing = [col for col in usecols if col not in self.utils.get_column_names(other_path)]
+            if missing:
+                raise ValueError(f"Cột '{missing[0]}' không tồn tại trong file '{os.path.basename(other_path)}'")
+        return self.utils.read_excel(other_path, usecols=usecols)
+
+    def _step_join(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        join_columns = [tuple(pair) for pair in params['join_columns']]
+        df_other = self._read_other_file(params)
+        self._require_columns(df, [col1 for col1, _ in join_columns])
+        self._require_columns(df_other, [col2 for _, col2 in join_columns])
+
+        # Left join: other-file rows whose key never occurs on the left are dropped before merging
+        keep = pd.Series(True, index=df_other.index)
+        for col1, col2 in join_columns:
+            keep &= df_other[col2].astype(str).isin(set(df[col1].astype(str)))
+        df_other = df_other[keep]
+
+        merged_df = self.joiner.join_frames(df, df_other, join_columns)
+        if params.get('only_matched', False):
+            merged_df = merged_df[merged_df['_merge'] == 'both']
+        return merged_df.drop(columns=['_merge'])
+
+    def _step_compare(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+        col1 = params.get('col1')
+        col2 = params.get('col2', col1)
+        # A column comparison only needs col2 from the other file
+        df_other = self._read_other_file(params, [col2] if col1 else None)
+        if col1:
+            self._require_columns(df, [col1])
+
+        matches = self.comparator.match_rows(df, df_other, col1, col2 if col1 else None)
+        df_result = df.copy()
+        df_result['MATCH_STATUS'] = ['CÓ' if match else 'KHÔNG' for match in matches]
+        return df_result
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional
+from .progress import CancelToken
+
+def _run_in_worker(func: Callable, args: tuple, kwargs: dict, progress_queue, cancel_event):
+    """Worker-process side: rebuild the progress/cancel hooks from manager proxies"""
+    def report(phase, done, total):
+        progress_queue.put((phase, done, total))
+
+    return func(*args, progress_callback=report, cancel_token=CancelToken(cancel_event), **kwargs)
+
+class ProcessRunner:
+    """
+    Run CPU-heavy core operations in a pool of worker processes
+
+    pandas work holds the GIL for long stretches, so operations started
+    from several request threads would run one at a time; here each runs
+    in its own process. call() blocks the calling thread until the result
+    is back, forwarding progress updates and cancellation in between
+    through a multiprocessing manager. Processes are spawned (not forked)
+    because the web server is multi-threaded, and only on first use.
+    """
+
+    # How often the waiting thread forwards progress and cancellation
+    POLL_SECONDS = 0.2
+
+    def __init__(self, max_workers: Optional[int] = None, initializer: Optional[Callable] = None,
+                 initargs: tuple = ()):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Run once in each worker process (spawned workers start from a fresh interpreter)
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor = None
+        self._manager = None
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable, *args, progress_callback: Optional[Callable] = None,
+             cancel_token: Optional[CancelToken] = None, **kwargs):
+        """
+        Run func(*args, **kwargs) in a worker process and return its result
+
+        func must be picklable (a module-level function or a method of a
+        core class) and accept progress_callback / cancel_token.
+        """
+        self._start()
+        progress_queue = self._manager.Queue()
+        cancel_event = self._manager.Event()
+        if cancel_token is not None and cancel_token.cancelled:
+            cancel_event.set()
+        future = self._executor.submit(_run_in_worker, func, args, kwargs, progress_queue, cancel_event)
+
+        while True:
+            try:
+                result = future.result(timeout=self.POLL_SECONDS)
+                finished = True
+            except FutureTimeout:
+                finished = False
+
+            while not progress_queue.empty():
+                update = progress_queue.get()
+                if progress_callback is not None:
+                    progress_callback(*update)
+
+            if finished:
+                return result
+            if cancel_token is not None and cancel_token.cancelled:
+                cancel_event.set()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._manager.shutdown()
+                self._executor = None
+                self._manager = None
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context('spawn')
+                self._manager = context.Manager()
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                     initializer=self.initializer, initargs=self.initargs)
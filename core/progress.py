@@ -0,0 +1,73 @@
+import threading
+from typing import Callable, Optional
+
+class OperationCancelled(Exception):
+    """Raised inside an operation once its CancelToken is cancelled"""
+
+    def __init__(self, message: str = "Đã hủy thao tác"):
+        super().__init__(message)
+
+class CancelToken:
+    """Thread-safe flag a caller sets to stop a running operation
+
+    event may be any object with set()/is_set(), e.g. a multiprocessing
+    manager Event shared with a worker process.
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+class ProgressTracker:
+    """
+    Progress reporting and cancellation checks for one operation run
+
+    Every long-running core operation takes two optional keyword
+    arguments and builds its tracker from them: progress_callback and
+    cancel_token (a CancelToken). Operations go through the phases in
+    PHASES; within a phase they report processed rows (between chunks or
+    pipeline steps, and every few thousand rows while writing).
+    callback(phase, done, total) is called on every update; total is None
+    when the row count is not known in advance. Each update also checks
+    the cancel token and raises OperationCancelled, which the operation
+    returns as {'success': False, 'cancelled': True}, so abandoned work
+    stops at the next chunk boundary.
+    """
+
+    PHASES = ('read', 'sanitize', 'compute', 'write')
+
+    def __init__(self, callback: Optional[Callable[[str, int, Optional[int]], None]] = None,
+                 cancel_token: Optional[CancelToken] = None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.current = None
+        self.done = 0
+        self.total = None
+
+    def phase(self, name: str, total: Optional[int] = None):
+        """Start a phase (one of PHASES) covering `total` rows"""
+        self.check()
+        self.current = name
+        self.done = 0
+        self.total = total
+        self._emit()
+
+    def advance(self, rows: int):
+        """Record `rows` more rows processed in the current phase"""
+        self.done += rows
+        self._emit()
+        self.check()
+
+    def check(self):
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise OperationCancelled()
+
+    def _emit(self):
+        if self.callback is not None:
+            self.callback(self.current, self.done, self.total)
@@ -0,0 +1,254 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from .upload_store import UploadStore
+
+class ResultCache:
+    """
+    Memoize core operation results by input content and parameters
+
+    The key of a call is the operation name, the content of every input
+    file among its arguments (the content id for UploadStore files, a
+    SHA-256 for others) and its remaining arguments normalized to JSON;
+    output_path and the progress/cancel hooks are left out. A changed
+    input therefore never hits an old entry. The result dict and a copy of
+    every output file derived from output_path (sharded zip, not-joined
+    rows...) are kept in `folder`; a hit copies the files back to the
+    requested output path and returns the result rewritten to point at
+    them. The result itself is pickled next to the file copies and only
+    loaded on a hit, so memory holds just the index; its size counts
+    toward max_bytes with the files. Entries are evicted least recently
+    used first beyond max_bytes or max_entries. The index lives in memory
+    only: leftover entry folders are removed on start.
+    """
+
+    # Arguments that never change what an operation computes
+    IGNORED_ARGS = ('progress_callback', 'cancel_token')
+    RESULT_NAME = 'result.pkl'
+
+    # Entry folders are named by their key; nothing else in `folder` is touched
+    _KEY = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, folder: str, max_bytes: int = 2 * 1024 * 1024 * 1024, max_entries: int = 500):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(folder, exist_ok=True)
+        for name in os.listdir(folder):
+            if self._KEY.match(name):
+                shutil.rmtree(os.path.join(folder, name), ignore_errors=True)
+        self.entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self.lock = threading.Lock()
+
+    def get(self, operation: Callable, args: tuple) -> Optional[Dict[str, Any]]:
+        """
+        Memoized result of operation(*args), or None on a miss
+
+        On a hit the cached output files are copied to this call's output
+        path and the result (a copy, marked 'cached') refers to them.
+        """
+        call = self._describe(operation, args)
+        if call is None:
+            return None
+        key, output_path, _ = call
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+
+        try:
+            with open(os.path.join(self.folder, key, self.RESULT_NAME), 'rb') as f:
+                result = pickle.load(f)
+            stem = os.path.splitext(output_path)[0] if output_path else None
+            for suffix, cached_path in entry['files']:
+                shutil.copyfile(cached_path, stem + suffix)
+                # Keeps the copy recent for the storage sweep
+                os.utime(cached_path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # Evicted meanwhile: compute again
+            self._drop(key)
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        result = self._rebase(result, entry['stem'], stem)
+        result['cached'] = True
+        return result
+
+    def put(self, operation: Callable, args: tuple, result: Dict[str, Any]):
+        """Remember a successful result together with copies of its output files"""
+        if not isinstance(result, dict) or not result.get('success') or result.get('cancelled'):
+            return
+        call = self._describe(operation, args)
+        if call is None:
+            return
+        key, output_path, inputs = call
+
+        stem = os.path.splitext(output_path)[0] if output_path else None
+        outputs = sorted({path for path in self._strings(result)
+                          if stem and path.startswith(stem) and os.path.isfile(path)})
+        entry_folder = os.path.join(self.folder, key)
+        try:
+            os.makedirs(entry_folder, exist_ok=True)
+            files = []
+            for path in outputs:
+                cached_path = os.path.join(entry_folder, os.path.basename(path))
+                shutil.copyfile(path, cached_path)
+                files.append((path[len(stem):], cached_path))
+            result_path = os.path.join(entry_folder, self.RESULT_NAME)
+            with open(result_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(result_path) + sum(os.path.getsize(cached_path) for _, cached_path in files)
+        except (OSError, pickle.PicklingError):
+            shutil.rmtree(entry_folder, ignore_errors=True)
+            return
+        if size > self.max_bytes:
+            shutil.rmtree(entry_folder, ignore_errors=True)
+            return
+
+        entry = {
+            'stem': stem,
+            'files': files,
+            'inputs': inputs,
+            'size': size,
+            'created_at': time.time()
+        }
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous['size']
+            self.entries[key] = entry
+            self.total_bytes += size
+            victims = []
+            while len(self.entries) > 1 and (self.total_bytes > self.max_bytes or len(self.entries) > self.max_entries):
+                old_key, old_entry = self.entries.popitem(last=False)
+                self.total_bytes -= old_entry['size']
+                victims.append(old_key)
+        for old_key in victims:
+            shutil.rmtree(os.path.join(self.folder, old_key), ignore_errors=True)
+
+    def invalidate_input(self, fingerprint: str) -> int:
+        """Drop every entry computed from this input (content id or SHA-256); returns how many"""
+        with self.lock:
+            keys = [key for key, entry in self.entries.items() if fingerprint in entry['inputs']]
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def discard(self, path: str):
+        """Drop the entry owning a cached file (for StorageManager eviction)"""
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.folder))
+        key = relative.split(os.sep)[0]
+        if key in self.entries:
+            self._drop(key)
+        else:
+            os.remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _describe(self, operation: Callable, args: tuple) -> Optional[Tuple[str, Optional[str], List[str]]]:
+        """(key, output_path, input fingerprints) of a call; None if it cannot be keyed"""
+        try:
+            bound = inspect.signature(operation).bind(*args)
+        except (TypeError, ValueError):
+            return None
+        bound.apply_defaults()
+
+        owner = getattr(operation, '__self__', None)
+        name = f"{type(owner).__name__}.{operation.__name__}" if owner is not None else operation.__qualname__
+        output_path = bound.arguments.get('output_path')
+        params = {arg: value for arg, value in bound.arguments.items()
+                  if arg not in self.IGNORED_ARGS and arg != 'output_path'}
+
+        inputs = []
+
+        def normalize(value):
+            # Input files (also nested, e.g. in a recipe) are keyed by their content
+            if isinstance(value, str) and os.path.isfile(value):
+                fingerprint = self._fingerprint(value)
+                inputs.append(fingerprint)
+                return {'file': fingerprint}
+            if isinstance(value, dict):
+                return {str(k): normalize(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [normalize(v) for v in value]
+            return value
+
+        try:
+            payload = json.dumps({'operation': name, 'params': normalize(params)}, sort_keys=True, default=str)
+        except OSError:
+            return None
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest(), output_path, inputs
+
+    def _fingerprint(self, path: str) -> str:
+        """Content id of a stored upload, else the file's SHA-256 (memoized by size and mtime)"""
+        content_id = UploadStore.content_id_of(path)
+        if content_id is not None:
+            return content_id
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            digest = self._hashes.get(memo_key)
+        if digest is None:
+            digest = UploadStore.hash_file(path)
+            with self.lock:
+                if len(self._hashes) > 1000:
+                    self._hashes.clear()
+                self._hashes[memo_key] = digest
+        return digest
+
+    def _drop(self, key: str):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry['size']
+        shutil.rmtree(os.path.join(self.folder, key), ignore_errors=True)
+
+    @staticmethod
+    def _strings(value) -> List[str]:
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, dict):
+            return [s for v in value.values() for s in ResultCache._strings(v)]
+        if isinstance(value, (list, tuple)):
+            return [s for v in value for s in ResultCache._strings(v)]
+        return []
+
+    @staticmethod
+    def _rebase(value, old_stem: Optional[str], new_stem: Optional[str]):
+        """Point output paths derived from old_stem at new_stem"""
+        if old_stem is None or old_stem == new_stem:
+            return value
+        if isinstance(value, str):
+            return new_stem + value[len(old_stem):] if value.startswith(old_stem) else value
+        if isinstance(value, dict):
+            return {k: ResultCache._rebase(v, old_stem, new_stem) for k, v in value.items()}
+        if isinstance(value, list):
+            return [ResultCache._rebase(v, old_stem, new_stem) for v in value]
+        return value
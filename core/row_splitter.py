@@ -1,19 +1,39 @@
 import pandas as pd
-from .excel_utils import ExcelUtils
-from typing import Dict, Any, List, Optional
+import numpy as np
+from .excel_utils import ExcelUtils, ShardedExcelWriter
+from .progress import ProgressTracker, CancelToken, OperationCancelled
+from typing import Dict, Any, List, Optional, Callable
 import os
+import re
 
 class RowSplitter:
     """Class for splitting rows in Excel files (Unpivot/Melt operation)"""
     
+    # Rows read per chunk by the streaming operations
+    CHUNK_ROWS = 50000
+    
+    # Aggregations for cells that receive several values when pivoting
+    PIVOT_AGGREGATIONS = ('sum', 'first', 'count', 'concat')
+    
+    # Excel limits the sheet width; dense pivot matrices are capped too
+    MAX_EXCEL_COLUMNS = 16384
+    MAX_PIVOT_CELLS = 50_000_000
+    
     def __init__(self):
         self.utils = ExcelUtils()
     
     def split_rows(self, file_path: str, id_columns: List[str], value_columns: List[str], 
-                  var_name: str, value_name: str, output_path: str) -> Dict[str, Any]:
+                  var_name: str, value_name: str, output_path: str,
+                  progress_callback: Optional[Callable] = None,
+                  cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """
         Split rows by unpivoting multiple columns into rows
         
+        The input is melted chunk by chunk and each melted chunk is
+        appended to the output writer, so memory stays proportional to
+        chunk size × value columns. Rows are written chunk by chunk (each
+        input row's values together) rather than value column by value column.
+        
         Args:
             file_path: Path to input Excel file
             id_columns: Columns to keep as identifiers
@@ -26,19 +46,18 @@ class RowSplitter:
             Dictionary with success status and results
         """
         try:
-            # Validate file
-            valid, msg = self.utils.validate_excel_file(file_path)
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            # Validate file (chunks below parse it)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
-            # Read the file
-            df = self.utils.read_excel(file_path)
-            original_columns = list(df.columns)
-            original_rows = len(df)
+            original_columns = self.utils.get_column_names(file_path)
             
             # Validate columns
             for col in id_columns + value_columns:
-                if col not in df.columns:
+                if col not in original_columns:
                     return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
             
             # Check for overlap between id_columns and value_columns
@@ -46,69 +65,96 @@ class RowSplitter:
             if overlap:
                 return {'success': False, 'error': f"Các cột không được trùng nhau: {', '.join(overlap)}"}
             
-            # Perform unpivot/melt operation
-            try:
-                df_melted = pd.melt(
-                    df,
-                    id_vars=id_columns,
-                    value_vars=value_columns,
-                    var_name=var_name,
-                    value_name=value_name
-                )
-                
-                # Remove rows with empty values (optional)
-                df_melted = df_melted.dropna(subset=[value_name])
+            original_rows = 0
+            sample_data = []
+            
+            # Perform unpivot/melt operation chunk by chunk
+            progress.phase('compute', self.utils.estimate_data_rows(file_path))
+            with ShardedExcelWriter(output_path, "Split_Rows") as writer:
+                for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS, id_columns + value_columns):
+                    try:
+                        df_melted = self.melt_frame(chunk, id_columns, value_columns, var_name, value_name)
+                    except Exception as melt_error:
+                        return {'success': False, 'error': f"Lỗi khi tách dòng: {str(melt_error)}"}
+                    
+                    writer.write(df_melted)
+                    original_rows += len(chunk)
+                    if len(sample_data) < 10:
+                        sample_data += self.utils.dataframe_to_dict_safe(df_melted.head(10 - len(sample_data)))
+                    progress.advance(len(chunk))
                 
-            except Exception as melt_error:
-                return {'success': False, 'error': f"Lỗi khi tách dòng: {str(melt_error)}"}
+                progress.phase('write', writer.total_rows)
             
-            # Save the result
-            self.utils.save_excel_safe(df_melted, output_path, "Split_Rows")
+            final_rows = writer.total_rows
             
             # Statistics
             stats = {
                 'original_rows': original_rows,
                 'original_columns': len(original_columns),
-                'final_rows': len(df_melted),
-                'final_columns': len(df_melted.columns),
-                'rows_created': len(df_melted) - original_rows,
+                'final_rows': final_rows,
+                'final_columns': len(id_columns) + 2,
+                'rows_created': final_rows - original_rows,
                 'id_columns': id_columns,
                 'value_columns': value_columns,
                 'var_name': var_name,
                 'value_name': value_name,
-                'output_file': output_path,
-                'note': f'Đã tách {len(value_columns)} cột thành {len(df_melted)} dòng mới'
+                'output_file': writer.output_path,
+                'note': f'Đã tách {len(value_columns)} cột thành {final_rows} dòng mới'
             }
             
-            # Sample data for preview
-            sample_data = df_melted.head(10).to_dict('records')
-            
             return {
                 'success': True,
                 'stats': stats,
                 'sample_data': sample_data,
                 'message': 'Tách dòng hoàn tất',
-                'file_info': self.utils.get_file_info(file_path)
+                'file_info': self.utils.get_file_summary(file_path, original_rows)
             }
             
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
         except Exception as e:
             return {'success': False, 'error': f"Lỗi tách dòng: {str(e)}"}
     
+    def melt_frame(self, chunk: pd.DataFrame, id_columns: List[str], value_columns: List[str],
+                   var_name: str, value_name: str) -> pd.DataFrame:
+        """
+        Melt an in-memory frame (split_rows applies it chunk by chunk),
+        keeping each input row's values together, without empty values
+        """
+        df_melted = pd.melt(
+            chunk.reset_index(drop=True).rename_axis('__row').reset_index(),
+            id_vars=['__row'] + id_columns,
+            value_vars=value_columns,
+            var_name=var_name,
+            value_name=value_name
+        )
+        
+        # Remove rows with empty values (blank cells are read as '')
+        values = df_melted[value_name]
+        df_melted = df_melted[values.notna() & (values.astype(str) != '')]
+        
+        df_melted = df_melted.sort_values('__row', kind='stable').drop(columns='__row')
+        return df_melted.reset_index(drop=True)
+    
     def preview_split(self, file_path: str, id_columns: List[str], value_columns: List[str],
-                     var_name: str, value_name: str) -> Dict[str, Any]:
-        """Preview the split result without saving"""
+                     var_name: str, value_name: str, preview_rows: int = 20) -> Dict[str, Any]:
+        """
+        Preview the split result without saving
+        
+        Only the first preview_rows rows of the id/value columns are read;
+        the full row count comes from the sheet metadata.
+        """
         try:
-            # Validate file
-            valid, msg = self.utils.validate_excel_file(file_path)
+            # Validate file (the head read below parses it)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
             if not valid:
                 return {'success': False, 'error': f"File không hợp lệ: {msg}"}
             
-            # Read the file
-            df = self.utils.read_excel(file_path)
+            all_columns = self.utils.get_column_names(file_path)
             
             # Validate columns
             for col in id_columns + value_columns:
-                if col not in df.columns:
+                if col not in all_columns:
                     return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
             
             # Check for overlap
@@ -116,30 +162,26 @@ class RowSplitter:
             if overlap:
                 return {'success': False, 'error': f"Các cột không được trùng nhau: {', '.join(overlap)}"}
             
-            # Perform preview unpivot
-            df_preview = pd.melt(
-                df.head(20),  # Only preview first 20 rows for performance
-                id_vars=id_columns,
-                value_vars=value_columns,
-                var_name=var_name,
-                value_name=value_name
-            )
+            # Read just the selected columns of the first rows
+            df_head = self.utils.read_excel_head(file_path, preview_rows, id_columns + value_columns)
+            total_rows, rows_estimated = self.utils.approximate_data_rows(file_path)
             
-            # Remove empty values for preview
-            df_preview = df_preview.dropna(subset=[value_name])
+            # Perform preview unpivot (same per-chunk melt as split_rows)
+            df_preview = self.melt_frame(df_head, id_columns, value_columns, var_name, value_name)
             
             preview_data = {
-                'original_sample': df.head(5).to_dict('records'),
-                'split_sample': df_preview.head(10).to_dict('records'),
+                'original_sample': self.utils.dataframe_to_dict_safe(df_head.head(5)),
+                'split_sample': self.utils.dataframe_to_dict_safe(df_preview.head(10)),
                 'original_stats': {
-                    'rows': len(df),
-                    'columns': len(df.columns)
+                    'rows': total_rows,
+                    'rows_estimated': rows_estimated,
+                    'columns': len(all_columns)
                 },
                 'split_stats': {
                     'rows': len(df_preview),
                     'columns': len(df_preview.columns)
                 },
-                'transformation_ratio': round(len(df_preview) / max(len(df.head(20)), 1), 2)
+                'transformation_ratio': round(len(df_preview) / max(len(df_head), 1), 2)
             }
             
             return {
@@ -154,6 +196,412 @@ class RowSplitter:
         except Exception as e:
             return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
     
+    def explode_rows(self, file_path: str, split_column: str, output_path: str,
+                     delimiter: str = ';', id_columns: Optional[List[str]] = None,
+                     use_regex: bool = False, keep_empty: bool = False,
+                     progress_callback: Optional[Callable] = None,
+                     cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Split delimited cell values into rows (e.g. 'A01;A02;A03' -> 3 rows)
+        
+        The input is read in chunks; each chunk is split with vectorized
+        str.split + explode and appended to the output writer, so the
+        result is never held in memory as a whole.
+        
+        Args:
+            file_path: Path to input Excel file
+            split_column: Column whose cells hold the delimited values
+            output_path: Path for output file
+            delimiter: Separator text, or a regular expression if use_regex
+            id_columns: Columns repeated on every new row (default: all other columns)
+            use_regex: Treat delimiter as a regular expression
+            keep_empty: Keep rows whose cell is empty (as one row with an empty value)
+        
+        Returns:
+            Dictionary with success status and results
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            if not delimiter:
+                return {'success': False, 'error': "Ký tự phân tách không được để trống"}
+            if use_regex:
+                try:
+                    re.compile(delimiter)
+                except re.error as regex_error:
+                    return {'success': False, 'error': f"Biểu thức chính quy không hợp lệ: {regex_error}"}
+            
+            # Validate file (chunks below parse it)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            all_columns = self.utils.get_column_names(file_path)
+            if id_columns is None:
+                id_columns = [col for col in all_columns if col != split_column]
+            
+            # Validate columns
+            for col in id_columns + [split_column]:
+                if col not in all_columns:
+                    return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
+            if split_column in id_columns:
+                return {'success': False, 'error': f"Cột tách '{split_column}' không được nằm trong cột định danh"}
+            
+            original_rows = 0
+            cells_split = 0
+            max_parts = 0
+            
+            progress.phase('compute', self.utils.estimate_data_rows(file_path))
+            with ShardedExcelWriter(output_path, 'Exploded_Rows') as writer:
+                for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS, id_columns + [split_column]):
+                    df_exploded, counts = self.explode_frame(chunk, split_column, id_columns,
+                                                             delimiter, use_regex, keep_empty)
+                    writer.write(df_exploded)
+                    
+                    original_rows += len(chunk)
+                    cells_split += int((counts > 1).sum())
+                    max_parts = max(max_parts, int(counts.max()) if len(counts) else 0)
+                    progress.advance(len(chunk))
+                
+                progress.phase('write', writer.total_rows)
+            
+            final_rows = writer.total_rows
+            
+            stats = {
+                'original_rows': original_rows,
+                'final_rows': final_rows,
+                'rows_created': final_rows - original_rows,
+                'cells_split': cells_split,
+                'max_parts': max_parts,
+                'split_column': split_column,
+                'id_columns': id_columns,
+                'delimiter': delimiter,
+                'output_file': writer.output_path,
+                'note': f'Đã tách {cells_split} ô thành {final_rows} dòng'
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'message': 'Tách giá trị thành dòng hoàn tất'
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi tách giá trị thành dòng: {str(e)}"}
+    
+    def preview_explode(self, file_path: str, split_column: str, delimiter: str = ';',
+                        id_columns: Optional[List[str]] = None, use_regex: bool = False,
+                        keep_empty: bool = False, preview_rows: int = 20) -> Dict[str, Any]:
+        """Preview explode_rows on the first rows without saving"""
+        try:
+            if not delimiter:
+                return {'success': False, 'error': "Ký tự phân tách không được để trống"}
+            if use_regex:
+                try:
+                    re.compile(delimiter)
+                except re.error as regex_error:
+                    return {'success': False, 'error': f"Biểu thức chính quy không hợp lệ: {regex_error}"}
+            
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            all_columns = self.utils.get_column_names(file_path)
+            if id_columns is None:
+                id_columns = [col for col in all_columns if col != split_column]
+            
+            for col in id_columns + [split_column]:
+                if col not in all_columns:
+                    return {'success': False, 'error': f"Cột '{col}' không tồn tại trong file"}
+            if split_column in id_columns:
+                return {'success': False, 'error': f"Cột tách '{split_column}' không được nằm trong cột định danh"}
+            
+            df_head = self.utils.read_excel_head(file_path, preview_rows, id_columns + [split_column])
+            total_rows, rows_estimated = self.utils.approximate_data_rows(file_path)
+            df_exploded, counts = self.explode_frame(df_head, split_column, id_columns,
+                                                     delimiter, use_regex, keep_empty)
+            
+            return {
+                'success': True,
+                'original_sample': self.utils.dataframe_to_dict_safe(df_head.head(5)),
+                'exploded_sample': self.utils.dataframe_to_dict_safe(df_exploded.head(10)),
+                'columns': list(df_exploded.columns),
+                'original_stats': {
+                    'rows': total_rows,
+                    'rows_estimated': rows_estimated,
+                    'columns': len(all_columns)
+                },
+                'transformation_ratio': round(len(df_exploded) / max(len(df_head), 1), 2)
+            }
+            
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
+    
+    def explode_frame(self, chunk: pd.DataFrame, split_column: str, id_columns: List[str],
+                      delimiter: str, use_regex: bool, keep_empty: bool):
+        """
+        Explode an in-memory frame (explode_rows applies it chunk by chunk)
+        
+        Returns (rows, number of parts per input row).
+        """
+        values = chunk[split_column]
+        text = values.astype(str).where(values.notna(), '')
+        
+        parts = text.str.split(delimiter, regex=use_regex)
+        parts.index = np.arange(len(parts))
+        exploded = parts.explode().str.strip()
+        
+        # Drop empty parts ('A;;B', trailing ';'), optionally keeping one row per empty cell
+        non_empty = (exploded != '').to_numpy().copy()
+        if keep_empty:
+            positions = exploded.index.to_numpy()
+            first_of_row = np.r_[True, positions[1:] != positions[:-1]] if len(positions) else non_empty
+            empty_rows = np.bincount(positions[non_empty], minlength=len(chunk)) == 0
+            non_empty |= first_of_row & empty_rows[positions]
+        exploded = exploded[non_empty]
+        
+        positions = exploded.index.to_numpy()
+        counts = np.bincount(positions, minlength=len(chunk))
+        
+        df_exploded = chunk[id_columns].iloc[positions].copy()
+        df_exploded[split_column] = exploded.to_numpy()
+        df_exploded['Excel_Row'] = chunk.index.to_numpy()[positions] + 2  # +2 for Excel row numbers
+        df_exploded.index = pd.RangeIndex(len(df_exploded))
+        
+        return df_exploded, counts
+    
+    def pivot_rows(self, file_path: str, id_columns: List[str], column_variable: str,
+                   value_column: str, output_path: str, aggregation: str = 'sum',
+                   separator: str = ', ', progress_callback: Optional[Callable] = None,
+                   cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Turn rows back into columns (Pivot, the inverse of split_rows)
+        
+        Id columns and the column variable are factorized into integer
+        codes; every (row, column) cell is then aggregated with bincount or
+        a grouped pass over those codes, never with pivot_table on objects.
+        
+        Args:
+            file_path: Path to input Excel file
+            id_columns: Columns identifying an output row
+            column_variable: Column whose values become the new column names
+            value_column: Column whose values fill the new columns
+            output_path: Path for output file
+            aggregation: How several values for one cell are combined:
+                         'sum', 'first', 'count' or 'concat'
+            separator: Separator used by 'concat'
+        
+        Returns:
+            Dictionary with success status and results
+        """
+        try:
+            progress = ProgressTracker(progress_callback, cancel_token)
+            
+            # Validate file (the column read below parses it)
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            all_columns = self.utils.get_column_names(file_path)
+            error = self.validate_pivot(all_columns, id_columns, column_variable, value_column, aggregation)
+            if error:
+                return {'success': False, 'error': error}
+            
+            # Only the columns taking part in the pivot are read
+            needed_columns = id_columns + [column_variable, value_column]
+            progress.phase('read', self.utils.estimate_data_rows(file_path))
+            chunks = []
+            for chunk in self.utils.iter_excel_chunks(file_path, self.CHUNK_ROWS, needed_columns):
+                chunks.append(chunk)
+                progress.advance(len(chunk))
+            df = pd.concat(chunks) if chunks else pd.DataFrame(columns=needed_columns)
+            del chunks
+            
+            progress.phase('compute', len(df))
+            try:
+                df_pivot, pivot_info = self.pivot_frame(df, id_columns, column_variable, value_column,
+                                                        aggregation, separator)
+            except ValueError as pivot_error:
+                return {'success': False, 'error': str(pivot_error)}
+            
+            self.utils.save_excel_safe(df_pivot, output_path, "Pivot", progress=progress)
+            
+            stats = {
+                'original_rows': len(df),
+                'final_rows': len(df_pivot),
+                'final_columns': len(df_pivot.columns),
+                'new_columns': pivot_info['new_columns'],
+                'collisions': pivot_info['collisions'],
+                'id_columns': id_columns,
+                'column_variable': column_variable,
+                'value_column': value_column,
+                'aggregation': aggregation,
+                'output_file': output_path,
+                'note': f"Đã chuyển {len(df)} dòng thành {len(df_pivot)} dòng × {len(pivot_info['new_columns'])} cột mới"
+            }
+            
+            return {
+                'success': True,
+                'stats': stats,
+                'sample_data': self.utils.dataframe_to_dict_safe(df_pivot.head(10)),
+                'message': 'Chuyển dòng thành cột hoàn tất'
+            }
+            
+        except OperationCancelled as e:
+            return {'success': False, 'cancelled': True, 'error': str(e)}
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi chuyển dòng thành cột: {str(e)}"}
+    
+    def preview_pivot(self, file_path: str, id_columns: List[str], column_variable: str,
+                      value_column: str, aggregation: str = 'sum', separator: str = ', ',
+                      preview_rows: int = 1000) -> Dict[str, Any]:
+        """Preview the pivot of the first preview_rows rows without saving"""
+        try:
+            valid, msg = self.utils.validate_excel_file(file_path, read_content=False)
+            if not valid:
+                return {'success': False, 'error': f"File không hợp lệ: {msg}"}
+            
+            all_columns = self.utils.get_column_names(file_path)
+            error = self.validate_pivot(all_columns, id_columns, column_variable, value_column, aggregation)
+            if error:
+                return {'success': False, 'error': error}
+            
+            df_head = self.utils.read_excel_head(file_path, preview_rows,
+                                                 id_columns + [column_variable, value_column])
+            total_rows, rows_estimated = self.utils.approximate_data_rows(file_path)
+            try:
+                df_pivot, pivot_info = self.pivot_frame(df_head, id_columns, column_variable, value_column,
+                                                        aggregation, separator)
+            except ValueError as pivot_error:
+                return {'success': False, 'error': str(pivot_error)}
+            
+            return {
+                'success': True,
+                'columns': [str(col) for col in df_pivot.columns],
+                'pivot_sample': self.utils.dataframe_to_dict_safe(df_pivot.head(10)),
+                'original_stats': {
+                    'rows': total_rows,
+                    'rows_estimated': rows_estimated,
+                    'columns': len(all_columns)
+                },
+                'preview_stats': {
+                    'rows_read': len(df_head),
+                    'rows': len(df_pivot),
+                    'new_columns': len(pivot_info['new_columns']),
+                    'collisions': pivot_info['collisions']
+                }
+            }
+            
+        except Exception as e:
+            return {'success': False, 'error': f"Lỗi xem trước: {str(e)}"}
+    
+    def validate_pivot(self, all_columns: List[str], id_columns: List[str], column_variable: str,
+                       value_column: str, aggregation: str) -> Optional[str]:
+        """Return an error message for an invalid pivot configuration, else None"""
+        if aggregation not in self.PIVOT_AGGREGATIONS:
+            return f"Phép gộp không hợp lệ: {aggregation} ({', '.join(self.PIVOT_AGGREGATIONS)})"
+        
+        for col in id_columns + [column_variable, value_column]:
+            if col not in all_columns:
+                return f"Cột '{col}' không tồn tại trong file"
+        
+        used = id_columns + [column_variable, value_column]
+        overlap = {col for col in used if used.count(col) > 1}
+        if overlap:
+            return f"Các cột không được trùng nhau: {', '.join(overlap)}"
+        return None
+    
+    def _pivot_codes(self, df: pd.DataFrame, columns: List[str]):
+        """Integer code per row for the combined columns, in order of first appearance"""
+        codes = np.zeros(len(df), dtype=np.int64)
+        # Without columns every row falls in one group - and an empty frame in none
+        n_groups = 1 if len(df) else 0
+        for col in columns:
+            col_codes, col_uniques = pd.factorize(df[col], use_na_sentinel=False)
+            codes, uniques = pd.factorize(codes * len(col_uniques) + col_codes)
+            n_groups = len(uniques)
+        return codes, n_groups
+    
+    def pivot_frame(self, df: pd.DataFrame, id_columns: List[str], column_variable: str,
+                    value_column: str, aggregation: str, separator: str):
+        """Pivot an in-memory frame; returns (wide frame, info dict)"""
+        row_codes, n_rows = self._pivot_codes(df, id_columns)
+        col_codes, col_values = pd.factorize(df[column_variable], use_na_sentinel=False)
+        n_cols = len(col_values)
+        
+        if len(id_columns) + n_cols > self.MAX_EXCEL_COLUMNS:
+            raise ValueError(f"Cột '{column_variable}' có {n_cols} giá trị khác nhau, "
+                             f"vượt quá giới hạn {self.MAX_EXCEL_COLUMNS} cột của Excel")
+        if n_rows * n_cols > self.MAX_PIVOT_CELLS:
+            raise ValueError(f"Kết quả quá lớn ({n_rows} dòng × {n_cols} cột)")
+        
+        cells = row_codes * n_cols + col_codes
+        counts = np.bincount(cells, minlength=n_rows * n_cols)
+        filled = counts > 0
+        values = df[value_column]
+        
+        if aggregation == 'count':
+            matrix = counts.astype(object)
+        elif aggregation == 'sum':
+            numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+            has_number = ~np.isnan(numbers)
+            sums = np.bincount(cells[has_number], weights=numbers[has_number], minlength=n_rows * n_cols)
+            # Whole sums are written as integers, cells without numbers stay empty
+            number_counts = np.bincount(cells[has_number], minlength=n_rows * n_cols)
+            matrix = sums.astype(object)
+            integral = np.isfinite(sums) & (sums % 1 == 0)
+            matrix[integral] = sums[integral].astype(np.int64)
+            matrix[number_counts == 0] = None
+        elif aggregation == 'first':
+            first = np.full(n_rows * n_cols, -1, dtype=np.int64)
+            filled_cells, first_positions = np.unique(cells, return_index=True)
+            first[filled_cells] = first_positions
+            matrix = np.full(n_rows * n_cols, None, dtype=object)
+            matrix[filled] = values.to_numpy(dtype=object)[first[filled]]
+        else:
+            text = values.astype(str).where(values.notna(), '').to_numpy(dtype=object)
+            non_empty = text != ''
+            text_cells = cells[non_empty]
+            text = text[non_empty]
+            
+            # Cells with a single value are filled directly; only collisions are joined
+            order = np.argsort(text_cells, kind='stable')
+            text_cells, text = text_cells[order], text[order]
+            text_counts = np.bincount(text_cells, minlength=n_rows * n_cols)
+            matrix = np.full(n_rows * n_cols, None, dtype=object)
+            single = text_counts[text_cells] == 1
+            matrix[text_cells[single]] = text[single]
+            
+            starts = np.flatnonzero(np.r_[True, text_cells[1:] != text_cells[:-1]])
+            for start in starts[text_counts[text_cells[starts]] > 1].tolist():
+                cell = text_cells[start]
+                matrix[cell] = separator.join(text[start:start + text_counts[cell]])
+        
+        matrix = matrix.reshape(n_rows, n_cols)
+        
+        # Id values of each output row come from its first input row
+        # (codes are 0..n_rows-1 in order of first appearance, so np.unique returns them in order)
+        _, first_rows = np.unique(row_codes, return_index=True)
+        df_pivot = df[id_columns].iloc[first_rows].reset_index(drop=True)
+        
+        new_columns = [self._pivot_column_name(value, id_columns) for value in col_values]
+        df_pivot = pd.concat([df_pivot, pd.DataFrame(matrix, columns=new_columns)], axis=1)
+        
+        info = {
+            'new_columns': new_columns,
+            'collisions': int((counts > 1).sum())
+        }
+        return df_pivot, info
+    
+    def _pivot_column_name(self, value: Any, id_columns: List[str]) -> str:
+        """Column name for a column-variable value (integral floats lose '.0')"""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        name = str(value) if value is not None and str(value) != '' else '(Trống)'
+        return f"{name}_" if name in id_columns else name
+    
     def get_columns(self, file_path: str) -> Dict[str, Any]:
         """Get column names from file"""
         try:
@@ -0,0 +1,231 @@
+import fnmatch
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, List, Iterable
+
+class StorageManager:
+    """
+    Track the files of the web app's working folders and keep them bounded
+
+    Each area is a folder whose files are tracked with their size and last
+    access (file mtime until touch() reports a use). A background sweep
+    deletes files not accessed for ttl_seconds, then the least recently
+    used ones while the total exceeds quota_bytes. Pinned files (inputs and
+    outputs of running operations) and files younger than GRACE_SECONDS
+    (still being written) are never evicted.
+    """
+
+    # Seconds between background sweeps
+    SWEEP_INTERVAL = 300
+    # Files modified this recently are left alone
+    GRACE_SECONDS = 120
+
+    def __init__(self, ttl_seconds: Optional[float] = 24 * 3600, quota_bytes: Optional[int] = None,
+                 interval: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.interval = interval or self.SWEEP_INTERVAL
+        self.areas: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.pins: Dict[str, int] = {}
+        self.evicted = {'files': 0, 'bytes': 0}
+        self.last_sweep = None
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_area(self, name: str, folder: str, recursive: bool = False,
+                 remove: Optional[Callable[[str], None]] = None, exclude: Iterable[str] = ()):
+        """
+        Manage the files of a folder
+
+        Args:
+            name: Label used in stats()
+            folder: Folder to track
+            recursive: Also track files in subfolders
+            remove: Deletes an evicted file (default os.remove); lets an
+                owner such as UploadStore keep its index in sync
+            exclude: File name patterns that are never tracked or evicted
+        """
+        os.makedirs(folder, exist_ok=True)
+        with self.lock:
+            self.areas[name] = {
+                'folder': os.path.abspath(folder),
+                'recursive': recursive,
+                'remove': remove or os.remove,
+                'exclude': tuple(exclude)
+            }
+        self._scan()
+
+    def touch(self, *values):
+        """Record an access to every managed path found in values (strings, lists, dicts)"""
+        now = time.time()
+        with self.lock:
+            for path in self._managed_paths(values):
+                if path in self.files:
+                    self.files[path]['last_access'] = now
+
+    def pin(self, *values) -> List[str]:
+        """Protect the managed paths found in values from eviction; returns them for unpin()"""
+        with self.lock:
+            paths = self._managed_paths(values)
+            for path in paths:
+                self.pins[path] = self.pins.get(path, 0) + 1
+        return paths
+
+    def unpin(self, paths: List[str]):
+        with self.lock:
+            for path in paths:
+                count = self.pins.get(path, 0) - 1
+                if count > 0:
+                    self.pins[path] = count
+                else:
+                    self.pins.pop(path, None)
+
+    @contextmanager
+    def pinned(self, *values):
+        """Pin (and touch) the managed paths in values for the duration of the block"""
+        paths = self.pin(*values)
+        self.touch(*paths)
+        try:
+            yield paths
+        finally:
+            self.touch(*paths)
+            self.unpin(paths)
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Rescan the areas, then evict expired and, over quota, least recently used files
+
+        Returns:
+            Number of files and bytes evicted by this sweep
+        """
+        self._scan()
+        now = time.time()
+        with self.lock:
+            candidates = sorted(
+                (path for path, info in self.files.items()
+                 if path not in self.pins and info['modified'] < now - self.GRACE_SECONDS),
+                key=lambda path: self.files[path]['last_access'])
+            total = sum(info['size'] for info in self.files.values())
+
+            victims = []
+            for path in candidates:
+                info = self.files[path]
+                expired = self.ttl_seconds is not None and info['last_access'] < now - self.ttl_seconds
+                over_quota = self.quota_bytes is not None and total > self.quota_bytes
+                if not expired and not over_quota:
+                    continue
+                victims.append((path, info))
+                total -= info['size']
+
+        evicted = {'files': 0, 'bytes': 0}
+        for path, info in victims:
+            try:
+                self.areas[info['area']]['remove'](path)
+            except OSError:
+                continue
+            evicted['files'] += 1
+            evicted['bytes'] += info['size']
+            with self.lock:
+                self.files.pop(path, None)
+
+        with self.lock:
+            self.evicted['files'] += evicted['files']
+            self.evicted['bytes'] += evicted['bytes']
+            self.last_sweep = time.time()
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Usage per area, totals, limits and eviction counters"""
+        self._scan()
+        with self.lock:
+            areas = {name: {'files': 0, 'bytes': 0} for name in self.areas}
+            for info in self.files.values():
+                areas[info['area']]['files'] += 1
+                areas[info['area']]['bytes'] += info['size']
+            return {
+                'total_bytes': sum(area['bytes'] for area in areas.values()),
+                'total_files': len(self.files),
+                'quota_bytes': self.quota_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'pinned_files': len(self.pins),
+                'areas': areas,
+                'evicted_files': self.evicted['files'],
+                'evicted_bytes': self.evicted['bytes'],
+                'last_sweep': self.last_sweep
+            }
+
+    def start(self):
+        """Sweep every `interval` seconds in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='storage-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Storage sweep failed: {str(e)}")
+
+    def _scan(self):
+        """Sync the tracked files with the disk (new files start at their mtime)"""
+        found = {}
+        with self.lock:
+            areas = dict(self.areas)
+        for name, area in areas.items():
+            for path in self._list_files(area):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (name, stat.st_size, stat.st_mtime)
+
+        with self.lock:
+            for path in list(self.files):
+                if path not in found:
+                    del self.files[path]
+            for path, (name, size, modified) in found.items():
+                info = self.files.get(path)
+                if info is None:
+                    self.files[path] = {'area': name, 'size': size, 'modified': modified, 'last_access': modified}
+                else:
+                    info.update(size=size, modified=modified, last_access=max(info['last_access'], modified))
+
+    def _list_files(self, area: Dict[str, Any]) -> List[str]:
+        if area['recursive']:
+            walk = os.walk(area['folder'])
+        else:
+            walk = [next(os.walk(area['folder']), (area['folder'], [], []))]
+        return [os.path.join(root, name) for root, _, names in walk for name in names
+                if not any(fnmatch.fnmatch(name, pattern) for pattern in area['exclude'])]
+
+    def _area_of(self, path: str) -> Optional[str]:
+        for name, area in self.areas.items():
+            folder = area['folder']
+            if (area['recursive'] and path.startswith(folder + os.sep)) or os.path.dirname(path) == folder:
+                if not any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in area['exclude']):
+                    return name
+        return None
+
+    def _managed_paths(self, values) -> List[str]:
+        """Absolute paths inside an area among values, searched through lists and dicts"""
+        paths = []
+        stack = list(values)
+        while stack:
+            value = stack.pop()
+            if isinstance(value, str):
+                path = os.path.abspath(value)
+                if self._area_of(path) is not None:
+                    paths.append(path)
+            elif isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, (list, tuple)):
+                stack.extend(value)
+        return paths
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+class UploadStore:
+    """
+    Content-addressed storage for uploaded workbooks
+
+    Each file is kept once, as <sha256><ext>, however many times and under
+    whatever names it is uploaded. index.json maps content ids to their
+    size, the names they were uploaded as and the cached file info, and
+    user-visible names to the content id last uploaded under them.
+    Because a stored file never changes, anything derived from it can be
+    cached by content id: the file info here, and the parsed DataFrame
+    kept in parsed/ (parsed_cache_path is the hook the web app gives to
+    ExcelUtils.set_parse_cache).
+    """
+
+    INDEX_NAME = 'index.json'
+    PARSED_DIR = 'parsed'
+    # Bytes hashed at a time
+    HASH_BUFFER = 1024 * 1024
+
+    _CONTENT_ID = re.compile(r'^[0-9a-f]{64}$')
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(os.path.join(folder, self.PARSED_DIR), exist_ok=True)
+        self.lock = threading.Lock()
+        self.index = self._load_index()
+
+    def save(self, file_storage) -> Dict[str, Any]:
+        """Store an uploaded werkzeug FileStorage; see add()"""
+        temp_path = os.path.join(self.folder, f"incoming_{uuid.uuid4().hex}")
+        file_storage.save(temp_path)
+        return self.add(temp_path, file_storage.filename)
+
+    def add(self, temp_path: str, filename: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Move a received file into the store (or drop it if already stored)
+
+        Args:
+            temp_path: File to take over; it is moved or deleted
+            filename: Name the user uploaded it as
+            sha256: Digest if the caller already computed it
+
+        Returns:
+            Entry with content_id, file_path, filename, size and info (the
+            cached file info, None until set_info is called)
+        """
+        content_id = sha256 or self.hash_file(temp_path)
+        ext = os.path.splitext(filename)[1].lower()
+        file_path = self.path_for(content_id, ext)
+
+        with self.lock:
+            if os.path.exists(file_path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, file_path)
+
+            entry = self.index['contents'].setdefault(content_id, {
+                'ext': ext,
+                'size': os.path.getsize(file_path),
+                'names': [],
+                'created_at': time.time(),
+                'info': None
+            })
+            if filename not in entry['names']:
+                entry['names'].append(filename)
+            self.index['names'][filename] = content_id
+            self._save_index()
+
+        return {'content_id': content_id, 'file_path': file_path, 'filename': filename,
+                'size': entry['size'], 'info': entry['info']}
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """Content id last uploaded under this name"""
+        with self.lock:
+            return self.index['names'].get(filename)
+
+    def get(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """Index entry of a content id (None if unknown)"""
+        with self.lock:
+            entry = self.index['contents'].get(content_id)
+            return dict(entry) if entry is not None else None
+
+    def set_info(self, content_id: str, info: Dict[str, Any]):
+        """Cache the file info of a stored file"""
+        with self.lock:
+            if content_id in self.index['contents']:
+                self.index['contents'][content_id]['info'] = info
+                self._save_index()
+
+    def remove(self, content_id: str):
+        """Delete a stored file, its parse cache and its index entry"""
+        with self.lock:
+            entry = self.index['contents'].pop(content_id, None)
+            if entry is None:
+                return
+            self.index['names'] = {name: cid for name, cid in self.index['names'].items() if cid != content_id}
+            self._save_index()
+        file_path = self.path_for(content_id, entry['ext'])
+        for path in (file_path, self.parsed_cache_path(file_path)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def discard(self, file_path: str):
+        """Delete one file of the store: a stored upload is removed with its
+        index entry and parse cache, anything else (a parse cache) just deleted
+        """
+        content_id = os.path.splitext(os.path.basename(file_path))[0]
+        with self.lock:
+            stored = os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(self.folder) \
+                and content_id in self.index['contents']
+        if stored:
+            self.remove(content_id)
+        else:
+            os.remove(file_path)
+
+    def path_for(self, content_id: str, ext: str) -> str:
+        return os.path.join(self.folder, content_id + ext)
+
+    @classmethod
+    def hash_file(cls, file_path: str) -> str:
+        """SHA-256 hex digest of a file"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(cls.HASH_BUFFER), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def parsed_cache_path(cls, file_path: str) -> Optional[str]:
+        """
+        Where the parsed DataFrame of a stored file is cached
+
+        Only files inside an UploadStore folder qualify (their content never
+        changes under the same name); None for any other path.
+        """
+        content_id = cls.content_id_of(file_path)
+        if content_id is None:
+            return None
+        return os.path.join(os.path.dirname(os.path.abspath(file_path)), cls.PARSED_DIR, content_id + '.pkl')
+
+    @classmethod
+    def content_id_of(cls, file_path: str) -> Optional[str]:
+        """Content id of a file kept in an UploadStore folder, None for any other path"""
+        folder, name = os.path.split(os.path.abspath(file_path))
+        content_id = os.path.splitext(name)[0]
+        if not cls._CONTENT_ID.match(content_id) or not os.path.exists(os.path.join(folder, cls.INDEX_NAME)):
+            return None
+        return content_id
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.folder, self.INDEX_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            index = {'contents': {}, 'names': {}}
+            self.index = index
+            self._save_index()
+            return index
+
+    def _save_index(self):
+        path = os.path.join(self.folder, self.INDEX_NAME)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
-from core import FileComparator, FileJoiner
+import threading
+from core import FileComparator, FileJoiner, CancelToken
 
 class ExcelToolGUI:
     """GUI version of Excel Tool"""
     
+    PHASE_LABELS = {
+        'read': 'Đang đọc file',
+        'sanitize': 'Đang làm sạch dữ liệu',
+        'compute': 'Đang xử lý',
+        'write': 'Đang ghi kết quả'
+    }
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Excel Tool - So sánh và Join Files")
@@ -16,6 +24,12 @@ class ExcelToolGUI:
         self.comparator = FileComparator()
         self.joiner = FileJoiner()
         
+        # Running operation (one at a time, in a worker thread)
+        self.worker = None
+        self.cancel_token = None
+        self.progress_state = None
+        self.operation_result = None
+        
         self.setup_ui()
     
     def setup_ui(self):
@@ -60,6 +74,18 @@ class ExcelToolGUI:
         ttk.Button(join_frame, text="Thực hiện Join", 
                   command=self.join_files).pack(pady=5)
         
+        # Progress
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.pack(fill=tk.X, pady=5)
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, maximum=100)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.cancel_button = ttk.Button(progress_frame, text="Hủy", state=tk.DISABLED,
+                                        command=self.cancel_operation)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.progress_label = ttk.Label(main_frame, text="")
+        self.progress_label.pack(anchor="w", padx=5)
+        
         # Results
         result_frame = ttk.LabelFrame(main_frame, text="Kết quả", padding="10")
         result_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -130,7 +156,7 @@ class ExcelToolGUI:
         method = self.compare_method.get()
         
         if method == "full_row":
-            result = self.comparator.compare_full_rows(self.file1_path, self.file2_path, output_file)
+            self.start_operation(self.comparator.compare_full_rows, self.file1_path, self.file2_path, output_file)
         else:
             if not hasattr(self, 'col1_combo') or not hasattr(self, 'col2_combo'):
                 messagebox.showerror("Lỗi", "Vui lòng chọn cột so sánh")
@@ -138,11 +164,10 @@ class ExcelToolGUI:
             
             col1 = self.col1_combo.get()
             col2 = self.col2_combo.get()
-            result = self.comparator.compare_specific_columns(
+            self.start_operation(
+                self.comparator.compare_specific_columns,
                 self.file1_path, self.file2_path, col1, col2, output_file
             )
-        
-        self.display_result(result)
     
     def join_files(self):
         if not self.file1_path or not self.file2_path:
@@ -168,11 +193,72 @@ class ExcelToolGUI:
         if not output_file:
             return
         
-        result = self.joiner.join_files(
+        self.start_operation(
+            self.joiner.join_files,
             self.file1_path, self.file2_path, join_columns, output_file
         )
+    
+    def start_operation(self, operation, *args):
+        """Run a core operation in a worker thread so the window stays responsive"""
+        if self.worker is not None and self.worker.is_alive():
+            messagebox.showwarning("Đang xử lý", "Vui lòng chờ thao tác hiện tại hoàn tất hoặc bấm Hủy")
+            return
+        
+        self.cancel_token = CancelToken()
+        self.progress_state = None
+        self.operation_result = None
+        
+        def report(phase, done, total):
+            # Called from the worker; the Tk loop reads it in poll_operation
+            self.progress_state = (phase, done, total)
         
-        self.display_result(result)
+        def work():
+            try:
+                self.operation_result = operation(*args, progress_callback=report,
+                                                  cancel_token=self.cancel_token)
+            except Exception as e:
+                self.operation_result = {'success': False, 'error': str(e)}
+        
+        self.worker = threading.Thread(target=work, daemon=True)
+        self.worker.start()
+        
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_label.config(text="Đang bắt đầu...")
+        self.root.after(100, self.poll_operation)
+    
+    def poll_operation(self):
+        """Refresh the progress bar until the worker finishes"""
+        if self.progress_state is not None:
+            phase, done, total = self.progress_state
+            label = self.PHASE_LABELS.get(phase, phase)
+            if total:
+                self.progress_bar.config(mode='determinate', value=min(done / total, 1) * 100)
+                self.progress_label.config(text=f"{label}: {done:,}/{total:,} dòng")
+            else:
+                self.progress_bar.config(mode='indeterminate')
+                self.progress_bar.step(5)
+                self.progress_label.config(text=f"{label}...")
+        
+        if self.worker.is_alive():
+            self.root.after(100, self.poll_operation)
+            return
+        
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_bar.config(mode='determinate', value=0)
+        self.progress_label.config(text="")
+        
+        result = self.operation_result
+        if result.get('cancelled'):
+            self.result_text.delete(1.0, tk.END)
+            self.result_text.insert(1.0, result['error'])
+        else:
+            self.display_result(result)
+    
+    def cancel_operation(self):
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_label.config(text="Đang hủy...")
     
     def display_result(self, result):
         self.result_text.delete(1.0, tk.END)
@@ -4,13 +4,25 @@ Main entry point for Excel Tool
 Choose between GUI mode and Web mode
 """
 
+import os
 import sys
 import argparse
 
 def main():
     parser = argparse.ArgumentParser(description='')
-    parser.add_argument('--mode', choices=['gui', 'web'], default='web',
-                       help='Chọn chế độ chạy: gui (GUI desktop) hoặc web (web interface)')
+    parser.add_argument('--mode', choices=['gui', 'web', 'serve'], default='web',
+                       help='Chọn chế độ chạy: gui (GUI desktop), web (máy chủ phát triển) '
+                            'hoặc serve (waitress, dùng cho nhiều người)')
+    parser.add_argument('--host', default='0.0.0.0', help='Địa chỉ lắng nghe (web/serve)')
+    parser.add_argument('--port', type=int, default=5000, help='Cổng lắng nghe (web/serve)')
+    # About 20 concurrent users on 8 cores: 8 workers, 24 threads keep
+    # uploads and job polling answered while every worker is busy
+    parser.add_argument('--threads', type=int, default=24,
+                       help='Số luồng waitress xử lý request (serve)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Số tiến trình xử lý tính toán (serve)')
+    parser.add_argument('--queue-depth', type=int, default=40,
+                       help='Số công việc tối đa được chờ; vượt quá sẽ báo máy chủ bận (serve)')
     
     args = parser.parse_args()
     
@@ -19,11 +31,19 @@ def main():
         print("Khởi chạy Excel Tool ở chế độ GUI...")
         app = ExcelToolGUI()
         app.run()
+    elif args.mode == 'serve':
+        from waitress import serve
+        from web_interface import app, configure_workers
+        configure_workers(args.workers, args.queue_depth)
+        print("Khởi chạy Excel Tool ở chế độ máy chủ (waitress)...")
+        print(f"Luồng: {args.threads}, tiến trình xử lý: {args.workers}, hàng đợi tối đa: {args.queue_depth}")
+        print(f"Truy cập: http://localhost:{args.port}")
+        serve(app, host=args.host, port=args.port, threads=args.threads)
     else:
         from web_interface import app
         print("Khởi chạy Excel Tool ở chế độ Web...")
-        print("Truy cập: http://localhost:5000")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        print(f"Truy cập: http://localhost:{args.port}")
+        app.run(debug=True, host=args.host, port=args.port)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
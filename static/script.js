@@ -13,10 +13,131 @@ let currentConfigId = null;
 let currentMergeConfigs = [];
 let splitFile = null;
 let duplicateFile = null;
+let pipelineFile = null;
 let currentMethod = null;
 
 // ========== UPLOAD FUNCTIONS ==========
 
+// Files above this size are sent in chunks (single requests are capped at 16 MB)
+const CHUNK_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+// Attempts per chunk before giving up; the upload can still be resumed later
+const CHUNK_UPLOAD_RETRIES = 5;
+
+// Row count for display; counts estimated from the sheet's dimension record are marked "~"
+function formatRowCount(rows, estimated) {
+    return estimated ? `~${rows} (ước tính)` : `${rows}`;
+}
+
+// Upload an Excel file: a plain form post for small files, chunked upload for large ones
+async function uploadExcelFile(file, endpoint, statusElement) {
+    if (file.size <= CHUNK_UPLOAD_THRESHOLD) {
+        const formData = new FormData();
+        formData.append('file', file);
+        const response = await fetch(endpoint, {
+            method: 'POST',
+            body: formData
+        });
+        return await response.json();
+    }
+    return await uploadInChunks(file, statusElement);
+}
+
+// Send a file chunk by chunk; an interrupted upload resumes where it stopped
+async function uploadInChunks(file, statusElement) {
+    // The upload id is remembered so that re-uploading the same file skips chunks already sent
+    const resumeKey = `chunked-upload:${file.name}:${file.size}:${file.lastModified}`;
+    let response = await fetch('/api/upload/chunked', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            filename: file.name,
+            size: file.size,
+            upload_id: localStorage.getItem(resumeKey)
+        })
+    });
+    const upload = await response.json();
+    if (!upload.success) {
+        return upload;
+    }
+    localStorage.setItem(resumeKey, upload.upload_id);
+
+    const received = new Set(upload.received);
+    for (let index = 0; index < upload.total_chunks; index++) {
+        if (received.has(index)) {
+            continue;
+        }
+        const start = index * upload.chunk_size;
+        const buffer = await file.slice(start, start + upload.chunk_size).arrayBuffer();
+        const result = await putUploadChunk(upload.upload_id, index, buffer);
+        if (!result.success) {
+            return result;
+        }
+        received.add(index);
+
+        if (statusElement) {
+            const percent = Math.round(received.size / upload.total_chunks * 100);
+            statusElement.innerHTML = `<div class="loading">🔄 Đang tải lên ${file.name}... ${percent}%</div>`;
+        }
+    }
+
+    if (statusElement) {
+        statusElement.innerHTML = `<div class="loading">🔄 Đang đọc thông tin file ${file.name}...</div>`;
+    }
+    response = await fetch(`/api/upload/chunked/${upload.upload_id}/finalize`, { method: 'POST' });
+    const result = await response.json();
+    if (!result.resumable) {
+        localStorage.removeItem(resumeKey);
+    }
+    return result;
+}
+
+// PUT one chunk with its CRC32, retrying with backoff when the connection drops
+async function putUploadChunk(uploadId, index, buffer) {
+    const checksum = crc32(new Uint8Array(buffer));
+    for (let attempt = 1; ; attempt++) {
+        try {
+            const response = await fetch(`/api/upload/chunked/${uploadId}/${index}`, {
+                method: 'PUT',
+                headers: {
+                    'Content-Type': 'application/octet-stream',
+                    'X-Chunk-CRC32': checksum
+                },
+                body: buffer
+            });
+            const result = await response.json();
+            if (result.success || attempt >= CHUNK_UPLOAD_RETRIES) {
+                return result;
+            }
+        } catch (error) {
+            if (attempt >= CHUNK_UPLOAD_RETRIES) {
+                throw new Error('Mất kết nối khi tải lên. Hãy tải lên lại cùng file để tiếp tục từ phần đã gửi');
+            }
+        }
+        await new Promise(resolve => setTimeout(resolve, attempt * 1000));
+    }
+}
+
+let crc32Table = null;
+
+// CRC32 (same as zlib.crc32) as 8 hex digits
+function crc32(bytes) {
+    if (!crc32Table) {
+        crc32Table = new Uint32Array(256);
+        for (let n = 0; n < 256; n++) {
+            let c = n;
+            for (let k = 0; k < 8; k++) {
+                c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+            }
+            crc32Table[n] = c;
+        }
+    }
+    let crc = 0xFFFFFFFF;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = crc32Table[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+    }
+    return ((crc ^ 0xFFFFFFFF) >>> 0).toString(16).padStart(8, '0');
+}
+
 // Upload for COMPARE tab
 async function uploadCompareFile(fileNumber) {
     console.log(`Uploading compare file ${fileNumber}`);
@@ -29,27 +150,19 @@ async function uploadCompareFile(fileNumber) {
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', fileInput.files[0]);
-
     try {
         fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
 
-        let response = await fetch('/api/upload', {
-            method: 'POST',
-            body: formData
-        });
-
-        let result = await response.json();
+        let result = await uploadExcelFile(fileInput.files[0], '/api/upload', fileInfo);
 
         // If normal upload fails, try simple upload
-        if (!result.success) {
+        if (!result.success && fileInput.files[0].size <= CHUNK_UPLOAD_THRESHOLD) {
             console.log('Normal upload failed, trying simple upload...');
             
             const retryFormData = new FormData();
             retryFormData.append('file', fileInput.files[0]);
             
-            response = await fetch('/api/simple-upload', {
+            const response = await fetch('/api/simple-upload', {
                 method: 'POST',
                 body: retryFormData
             });
@@ -63,7 +176,7 @@ async function uploadCompareFile(fileNumber) {
                 <div style="color: green;">
                     <strong>✅ Upload thành công!</strong><br>
                     <strong>File:</strong> ${result.filename}<br>
-                    <strong>Số dòng:</strong> ${result.rows}<br>
+                    <strong>Số dòng:</strong> ${formatRowCount(result.rows, (result.file_info || {}).rows_estimated)}<br>
                     <strong>Số cột:</strong> ${result.columns.length}<br>
                     <strong>Các cột:</strong> ${result.columns.slice(0, 5).join(', ')}${result.columns.length > 5 ? '...' : ''}
                 </div>
@@ -92,19 +205,11 @@ async function uploadJoinFile(fileNumber) {
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', fileInput.files[0]);
-
     try {
         fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
 
         // Use dedicated join endpoint
-        const response = await fetch('/api/upload-join', {
-            method: 'POST',
-            body: formData
-        });
-
-        const result = await response.json();
+        const result = await uploadExcelFile(fileInput.files[0], '/api/upload-join', fileInfo);
 
         if (result.success) {
             uploadedFiles.join[`file${fileNumber}`] = result;
@@ -112,7 +217,7 @@ async function uploadJoinFile(fileNumber) {
                 <div style="color: green;">
                     <strong>✅ Upload thành công!</strong><br>
                     <strong>File:</strong> ${result.filename}<br>
-                    <strong>Số dòng:</strong> ${result.rows}<br>
+                    <strong>Số dòng:</strong> ${formatRowCount(result.rows, (result.file_info || {}).rows_estimated)}<br>
                     <strong>Số cột:</strong> ${result.columns.length}<br>
                     <strong>Các cột:</strong> ${result.columns.slice(0, 5).join(', ')}${result.columns.length > 5 ? '...' : ''}
                 </div>
@@ -182,25 +287,32 @@ async function compareFiles() {
         const resultsDiv = document.getElementById('results');
         resultsDiv.innerHTML = '<div class="loading">🔄 Đang xử lý...</div>';
 
-        const response = await fetch('/api/compare-detailed', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
+        // Unmatched rows are appended as they stream in; the summary renders from the header
+        let unmatchedPath = null;
+        const result = await runJob('/api/compare-detailed', data, {
+            onHeader: (header) => {
+                unmatchedPath = 'unmatched_samples' in header ? 'unmatched_samples' : 'stats.unmatched_data';
+                displayResults(header, 'So sánh', true);
             },
-            body: JSON.stringify(data)
+            onItem: (path, item, header) => {
+                if (path.join('.') === unmatchedPath) {
+                    appendUnmatchedRow(item, header.stats);
+                }
+            }
         });
-
-        const result = await response.json();
         console.log('API Response:', result);
-        displayResults(result, 'So sánh');
+        if (unmatchedPath === null) {
+            displayResults(result, 'So sánh');
+        }
     } catch (error) {
         console.error('Compare error:', error);
         displayError(error.message);
     }
 }
 
-// Display results with unmatched rows details
-function displayResults(result, operation) {
+// Display results with unmatched rows details; while streaming, the rows are
+// appended later by appendUnmatchedRow
+function displayResults(result, operation, streaming = false) {
     const resultsDiv = document.getElementById('results');
     
     if (result.success) {
@@ -227,45 +339,14 @@ function displayResults(result, operation) {
         const unmatchedData = result.unmatched_samples || (result.stats && result.stats.unmatched_data);
         const unmatchedCount = result.unmatched_count || (result.stats && result.stats.unmatched_count) || 0;
         
-        if (unmatchedData && unmatchedData.length > 0) {
+        if ((unmatchedData && unmatchedData.length > 0) || (streaming && unmatchedCount > 0)) {
             console.log('Unmatched data found:', unmatchedData);
             
             html += `<div class="unmatched-section">`;
             html += `<h4>📋 CÁC DÒNG KHÔNG KHỚP (${unmatchedCount} dòng):</h4>`;
-            
-            unmatchedData.forEach((unmatched, index) => {
-                html += `<div class="unmatched-row">`;
-                html += `<h5>🔍 Dòng ${unmatched.excel_row} (Index: ${unmatched.index})</h5>`;
-                html += `<div class="row-data">`;
-                
-                if (unmatched.data) {
-                    Object.entries(unmatched.data).forEach(([key, value]) => {
-                        const isComparedColumn = stats.compared_columns && 
-                                               key === stats.compared_columns.split("'")[1];
-                        
-                        const highlightClass = isComparedColumn ? 'highlight-column' : '';
-                        
-                        html += `<div class="data-field ${highlightClass}">`;
-                        html += `<strong>${key}:</strong> ${value}`;
-                        if (isComparedColumn) {
-                            html += ` <span class="compared-badge">(Cột so sánh)</span>`;
-                        }
-                        html += `</div>`;
-                    });
-                }
-                
-                if (unmatched.compared_value) {
-                    html += `<div class="compared-value">`;
-                    html += `<strong>Giá trị so sánh:</strong> <span class="highlight-value">${unmatched.compared_value}</span>`;
-                    html += `</div>`;
-                }
-                
-                html += `</div></div>`;
-                
-                if (index < unmatchedData.length - 1) {
-                    html += `<hr class="row-divider">`;
-                }
-            });
+            html += `<div id="unmatched-rows-list">`;
+            html += (unmatchedData || []).map(unmatched => renderUnmatchedRow(unmatched, stats)).join(`<hr class="row-divider">`);
+            html += `</div>`;
             
             html += `</div>`;
         } else if (stats.unmatched_rows > 0) {
@@ -299,6 +380,60 @@ function displayResults(result, operation) {
     }
 }
 
+// HTML of one unmatched row
+function renderUnmatchedRow(unmatched, stats) {
+    let html = `<div class="unmatched-row">`;
+    html += `<h5>🔍 Dòng ${unmatched.excel_row} (Index: ${unmatched.index})</h5>`;
+    html += `<div class="row-data">`;
+    
+    if (unmatched.data) {
+        Object.entries(unmatched.data).forEach(([key, value]) => {
+            const isComparedColumn = stats.compared_columns && 
+                                   key === stats.compared_columns.split("'")[1];
+            
+            const highlightClass = isComparedColumn ? 'highlight-column' : '';
+            
+            html += `<div class="data-field ${highlightClass}">`;
+            html += `<strong>${key}:</strong> ${value}`;
+            if (isComparedColumn) {
+                html += ` <span class="compared-badge">(Cột so sánh)</span>`;
+            }
+            html += `</div>`;
+        });
+    }
+    
+    if (unmatched.compared_value) {
+        html += `<div class="compared-value">`;
+        html += `<strong>Giá trị so sánh:</strong> <span class="highlight-value">${unmatched.compared_value}</span>`;
+        html += `</div>`;
+    }
+    
+    html += `</div></div>`;
+    return html;
+}
+
+// Rows streamed in since the last paint; written to the page once per animation frame
+let pendingUnmatchedRows = [];
+
+// Append a streamed unmatched row to the list rendered by displayResults(..., true)
+function appendUnmatchedRow(unmatched, stats) {
+    pendingUnmatchedRows.push(renderUnmatchedRow(unmatched, stats));
+    if (pendingUnmatchedRows.length > 1) {
+        return;
+    }
+
+    requestAnimationFrame(() => {
+        const list = document.getElementById('unmatched-rows-list');
+        const rows = pendingUnmatchedRows;
+        pendingUnmatchedRows = [];
+        if (!list) {
+            return;
+        }
+        const divider = list.children.length > 0 ? `<hr class="row-divider">` : '';
+        list.insertAdjacentHTML('beforeend', divider + rows.join(`<hr class="row-divider">`));
+    });
+}
+
 // ========== JOIN FUNCTIONS ==========
 
 // Show join column selection modal
@@ -402,15 +537,7 @@ async function performJoin(joinColumns) {
         const resultsDiv = document.getElementById('results');
         resultsDiv.innerHTML = '<div class="loading">🔄 Đang thực hiện join...</div>';
 
-        const response = await fetch('/api/join', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(data)
-        });
-
-        const result = await response.json();
+        const result = await runJob('/api/join', data);
         console.log('Join result:', result);
         displayJoinResults(result);
     } catch (error) {
@@ -475,24 +602,16 @@ async function uploadMergeFile() {
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', fileInput.files[0]);
-
     try {
         fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
 
-        let response = await fetch('/api/upload', {
-            method: 'POST',
-            body: formData
-        });
-
-        let result = await response.json();
+        let result = await uploadExcelFile(fileInput.files[0], '/api/upload', fileInfo);
 
-        if (!result.success) {
+        if (!result.success && fileInput.files[0].size <= CHUNK_UPLOAD_THRESHOLD) {
             const retryFormData = new FormData();
             retryFormData.append('file', fileInput.files[0]);
             
-            response = await fetch('/api/simple-upload', {
+            const response = await fetch('/api/simple-upload', {
                 method: 'POST',
                 body: retryFormData
             });
@@ -506,7 +625,7 @@ async function uploadMergeFile() {
                 <div style="color: green;">
                     <strong>✅ Upload thành công!</strong><br>
                     <strong>File:</strong> ${result.filename}<br>
-                    <strong>Số dòng:</strong> ${result.rows}<br>
+                    <strong>Số dòng:</strong> ${formatRowCount(result.rows, (result.file_info || {}).rows_estimated)}<br>
                     <strong>Số cột:</strong> ${result.columns.length}<br>
                     <strong>Các cột:</strong> ${result.columns.slice(0, 6).join(', ')}${result.columns.length > 6 ? '...' : ''}
                 </div>
@@ -655,7 +774,9 @@ async function previewMerge() {
 
     const data = {
         file_path: uploadedFiles.merge.file.file_path,
-        merge_configs: mergeConfigs
+        merge_configs: mergeConfigs,
+        null_mode: document.getElementById('merge-null-mode').value,
+        placeholder: document.getElementById('merge-placeholder').value
     };
 
     console.log('Preview - Sending data:', data); // Debug log
@@ -804,7 +925,9 @@ async function performMerge() {
 
     const data = {
         file_path: uploadedFiles.merge.file.file_path,
-        merge_configs: mergeConfigs
+        merge_configs: mergeConfigs,
+        null_mode: document.getElementById('merge-null-mode').value,
+        placeholder: document.getElementById('merge-placeholder').value
     };
 
     console.log('Sending data:', data); // Debug log
@@ -813,15 +936,7 @@ async function performMerge() {
         const resultsDiv = document.getElementById('results');
         resultsDiv.innerHTML = '<div class="loading">🔄 Đang gộp cột...</div>';
 
-        const response = await fetch('/api/merge-columns', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(data)
-        });
-
-        const result = await response.json();
+        const result = await runJob('/api/merge-columns', data);
         console.log('Merge API response:', result); // Debug log
         displayMergeResults(result);
     } catch (error) {
@@ -885,24 +1000,16 @@ async function uploadSplitFile() {
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', fileInput.files[0]);
-
     try {
         fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
 
-        let response = await fetch('/api/upload', {
-            method: 'POST',
-            body: formData
-        });
-
-        let result = await response.json();
+        let result = await uploadExcelFile(fileInput.files[0], '/api/upload', fileInfo);
 
-        if (!result.success) {
+        if (!result.success && fileInput.files[0].size <= CHUNK_UPLOAD_THRESHOLD) {
             const retryFormData = new FormData();
             retryFormData.append('file', fileInput.files[0]);
             
-            response = await fetch('/api/simple-upload', {
+            const response = await fetch('/api/simple-upload', {
                 method: 'POST',
                 body: retryFormData
             });
@@ -916,7 +1023,7 @@ async function uploadSplitFile() {
                 <div style="color: green;">
                     <strong>✅ Upload thành công!</strong><br>
                     <strong>File:</strong> ${result.filename}<br>
-                    <strong>Số dòng:</strong> ${result.rows}<br>
+                    <strong>Số dòng:</strong> ${formatRowCount(result.rows, (result.file_info || {}).rows_estimated)}<br>
                     <strong>Số cột:</strong> ${result.columns.length}<br>
                     <strong>Các cột:</strong> ${result.columns.slice(0, 6).join(', ')}${result.columns.length > 6 ? '...' : ''}
                 </div>
@@ -954,6 +1061,11 @@ function populateSplitColumns(columns) {
         idColumnsDiv.innerHTML += checkboxHtml;
         valueColumnsDiv.innerHTML += checkboxHtml;
     });
+    
+    const columnOptions = columns.map(column => `<option value="${column}">${column}</option>`).join('');
+    document.getElementById('explode-column').innerHTML = columnOptions;
+    document.getElementById('pivot-column-variable').innerHTML = columnOptions;
+    document.getElementById('pivot-value-column').innerHTML = columnOptions;
 }
 
 // Toggle column selection between ID and Value for split
@@ -1045,7 +1157,7 @@ function displaySplitPreview(result) {
         
         // Statistics
         html += `<div class="preview-stats">`;
-        html += `<p><strong>📊 Dữ liệu gốc:</strong> ${result.preview_data.original_stats.rows} dòng × ${result.preview_data.original_stats.columns} cột</p>`;
+        html += `<p><strong>📊 Dữ liệu gốc:</strong> ${formatRowCount(result.preview_data.original_stats.rows, result.preview_data.original_stats.rows_estimated)} dòng × ${result.preview_data.original_stats.columns} cột</p>`;
         html += `<p><strong>📈 Sau khi tách:</strong> ${result.preview_data.split_stats.rows} dòng × ${result.preview_data.split_stats.columns} cột</p>`;
         html += `<p><strong>🔄 Tỷ lệ mở rộng:</strong> ${result.preview_data.transformation_ratio}x</p>`;
         html += `</div>`;
@@ -1144,15 +1256,7 @@ async function performSplit() {
         const resultsDiv = document.getElementById('results');
         resultsDiv.innerHTML = '<div class="loading">🔄 Đang tách dòng...</div>';
 
-        const response = await fetch('/api/split-rows', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(data)
-        });
-
-        const result = await response.json();
+        const result = await runJob('/api/split-rows', data);
         displaySplitResults(result);
     } catch (error) {
         console.error('Split error:', error);
@@ -1193,94 +1297,320 @@ function displaySplitResults(result) {
         resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tách Dòng</h3><p>${result.error}</p></div>`;
     }
 }
-// ========== DUPLICATE FUNCTIONS ==========
+// Collect explode (delimited values to rows) settings
+function getExplodeData() {
+    const idColumns = getSelectedSplitColumns('id');
+    return {
+        file_path: splitFile.file_path,
+        split_column: document.getElementById('explode-column').value,
+        delimiter: document.getElementById('explode-delimiter').value,
+        id_columns: idColumns.length > 0 ? idColumns : null,
+        use_regex: document.getElementById('explode-regex').checked,
+        keep_empty: document.getElementById('explode-keep-empty').checked
+    };
+}
 
-// Upload file for duplicate tab
-async function uploadDuplicateFile() {
-    const fileInput = document.getElementById('duplicate-file');
-    const fileInfo = document.getElementById('duplicate-file-info');
-    
-    if (!fileInput.files[0]) {
-        alert('Vui lòng chọn file trước khi tải lên');
+// Preview splitting delimited values into rows
+async function previewExplode() {
+    if (!splitFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const data = getExplodeData();
+    if (!data.delimiter) {
+        alert('Vui lòng nhập ký tự phân tách');
         return;
     }
 
-    const formData = new FormData();
-    formData.append('file', fileInput.files[0]);
+    const previewDiv = document.getElementById('explode-preview');
 
     try {
-        fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
+        previewDiv.innerHTML = '<div class="loading">🔄 Đang xem trước...</div>';
 
-        let response = await fetch('/api/upload', {
+        const response = await fetch('/api/preview-explode', {
             method: 'POST',
-            body: formData
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(data)
         });
 
-        let result = await response.json();
+        const result = await response.json();
 
         if (!result.success) {
-            const retryFormData = new FormData();
-            retryFormData.append('file', fileInput.files[0]);
-            
-            response = await fetch('/api/simple-upload', {
-                method: 'POST',
-                body: retryFormData
+            previewDiv.innerHTML = `<div class="error-message"><h5>❌ Lỗi Xem Trước</h5><p>${result.error}</p></div>`;
+            return;
+        }
+
+        let html = `<h4>👁️ Xem Trước Kết Quả Tách Giá Trị</h4>`;
+        html += `<div class="preview-stats">`;
+        html += `<p><strong>📊 Dữ liệu gốc:</strong> ${formatRowCount(result.original_stats.rows, result.original_stats.rows_estimated)} dòng × ${result.original_stats.columns} cột</p>`;
+        html += `<p><strong>🔄 Tỷ lệ mở rộng:</strong> ${result.transformation_ratio}x</p>`;
+        html += `</div>`;
+
+        html += `<h5>📈 Dữ liệu sau tách (10 dòng đầu)</h5>`;
+        html += `<table class="preview-table"><tr>`;
+        result.columns.forEach(col => {
+            html += `<th>${col}</th>`;
+        });
+        html += `</tr>`;
+        result.exploded_sample.forEach(row => {
+            html += `<tr>`;
+            result.columns.forEach(col => {
+                html += `<td>${row[col] !== undefined ? row[col] : ''}</td>`;
             });
-            
-            result = await response.json();
+            html += `</tr>`;
+        });
+        html += `</table>`;
+
+        previewDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Explode preview error:', error);
+        previewDiv.innerHTML = `<div class="error-message">❌ Lỗi xem trước: ${error.message}</div>`;
+    }
+}
+
+// Split delimited values into rows and export
+async function performExplode() {
+    if (!splitFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const data = getExplodeData();
+    if (!data.delimiter) {
+        alert('Vui lòng nhập ký tự phân tách');
+        return;
+    }
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang tách giá trị thành dòng...</div>';
+
+        const result = await runJob('/api/explode-rows', data);
+
+        if (!result.success) {
+            resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tách Giá Trị</h3><p>${result.error}</p></div>`;
+            return;
         }
 
-        if (result.success) {
-            duplicateFile = result;
-            fileInfo.innerHTML = `
-                <div style="color: green;">
-                    <strong>✅ Upload thành công!</strong><br>
-                    <strong>File:</strong> ${result.filename}<br>
-                    <strong>Số dòng:</strong> ${result.rows}<br>
-                    <strong>Số cột:</strong> ${result.columns.length}<br>
-                    <strong>Các cột:</strong> ${result.columns.slice(0, 6).join(', ')}${result.columns.length > 6 ? '...' : ''}
-                </div>
-            `;
-            
-            document.getElementById('duplicate-configuration').style.display = 'block';
-            populateDuplicateColumns(result.columns);
-            
-        } else {
-            fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi:</strong> ${result.error}</div>`;
+        const stats = result.stats;
+        let html = `<h3>✅ Tách Giá Trị Thành Dòng Thành Công!</h3>`;
+        html += `<div class="stats">`;
+        html += `<p><strong>📊 Số dòng ban đầu:</strong> ${stats.original_rows}</p>`;
+        html += `<p><strong>📈 Số dòng sau tách:</strong> ${stats.final_rows}</p>`;
+        html += `<p><strong>✂️ Số ô được tách:</strong> ${stats.cells_split} (tối đa ${stats.max_parts} giá trị/ô)</p>`;
+        html += `<p><strong>📌 Cột tách:</strong> ${stats.split_column}</p>`;
+        if (stats.note) {
+            html += `<p class="note">📝 ${stats.note}</p>`;
         }
+        html += `</div>`;
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả</a>`;
+
+        resultsDiv.innerHTML = html;
     } catch (error) {
-        console.error('Upload error:', error);
-        fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi kết nối:</strong> ${error.message}</div>`;
+        console.error('Explode error:', error);
+        displayError(error.message);
     }
 }
-// Populate columns for duplicate value method - SỬA LẠI
-function populateDuplicateColumns(columns) {
-    console.log('=== populateDuplicateColumns START ===');
-    
-    const columnsDiv = document.getElementById('duplicate-value-columns');
-    console.log('columnsDiv found:', columnsDiv);
-    
-    if (!columnsDiv) {
-        console.error('ERROR: value-columns-selection element not found!');
+
+// Collect pivot (rows to columns) settings
+function getPivotData() {
+    return {
+        file_path: splitFile.file_path,
+        id_columns: getSelectedSplitColumns('id'),
+        column_variable: document.getElementById('pivot-column-variable').value,
+        value_column: document.getElementById('pivot-value-column').value,
+        aggregation: document.getElementById('pivot-aggregation').value
+    };
+}
+
+// Preview pivot result
+async function previewPivot() {
+    if (!splitFile) {
+        alert('Vui lòng tải file lên trước');
         return;
     }
-    
-    if (!columns || columns.length === 0) {
-        console.error('ERROR: No columns provided!');
-        columnsDiv.innerHTML = '<p style="color: red;">Không có cột nào để hiển thị</p>';
+
+    const data = getPivotData();
+    if (data.id_columns.length === 0) {
+        alert('Vui lòng chọn ít nhất một cột định danh');
         return;
     }
-    
-    console.log('Columns to populate:', columns);
-    
-    // Xóa hết nội dung cũ
-    columnsDiv.innerHTML = '';
-    
-    // Tạo checkbox cho mỗi cột
-    columns.forEach((column, index) => {
-        console.log(`Creating checkbox for column ${index}:`, column);
-        
-        const label = document.createElement('label');
+
+    const previewDiv = document.getElementById('pivot-preview');
+
+    try {
+        previewDiv.innerHTML = '<div class="loading">🔄 Đang xem trước...</div>';
+
+        const response = await fetch('/api/preview-pivot', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+
+        if (!result.success) {
+            previewDiv.innerHTML = `<div class="error-message"><h5>❌ Lỗi Xem Trước</h5><p>${result.error}</p></div>`;
+            return;
+        }
+
+        const stats = result.preview_stats;
+        let html = `<h4>👁️ Xem Trước Kết Quả Chuyển Dòng Thành Cột</h4>`;
+        html += `<div class="preview-stats">`;
+        html += `<p><strong>📊 Dữ liệu gốc:</strong> ${formatRowCount(result.original_stats.rows, result.original_stats.rows_estimated)} dòng × ${result.original_stats.columns} cột</p>`;
+        html += `<p><strong>📈 ${stats.rows_read} dòng đầu:</strong> ${stats.rows} dòng × ${stats.new_columns} cột mới (${stats.collisions} ô trùng)</p>`;
+        html += `</div>`;
+
+        html += `<table class="preview-table"><tr>`;
+        result.columns.forEach(col => {
+            html += `<th>${col}</th>`;
+        });
+        html += `</tr>`;
+        result.pivot_sample.forEach(row => {
+            html += `<tr>`;
+            result.columns.forEach(col => {
+                html += `<td>${row[col] !== undefined ? row[col] : ''}</td>`;
+            });
+            html += `</tr>`;
+        });
+        html += `</table>`;
+
+        previewDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Pivot preview error:', error);
+        previewDiv.innerHTML = `<div class="error-message">❌ Lỗi xem trước: ${error.message}</div>`;
+    }
+}
+
+// Pivot rows into columns and export
+async function performPivot() {
+    if (!splitFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const data = getPivotData();
+    if (data.id_columns.length === 0) {
+        alert('Vui lòng chọn ít nhất một cột định danh');
+        return;
+    }
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang chuyển dòng thành cột...</div>';
+
+        const result = await runJob('/api/pivot-rows', data);
+
+        if (!result.success) {
+            resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Chuyển Dòng Thành Cột</h3><p>${result.error}</p></div>`;
+            return;
+        }
+
+        const stats = result.stats;
+        let html = `<h3>✅ Chuyển Dòng Thành Cột Thành Công!</h3>`;
+        html += `<div class="stats">`;
+        html += `<p><strong>📊 Số dòng ban đầu:</strong> ${stats.original_rows}</p>`;
+        html += `<p><strong>📈 Số dòng sau chuyển:</strong> ${stats.final_rows}</p>`;
+        html += `<p><strong>📋 Số cột mới:</strong> ${stats.new_columns.length}</p>`;
+        html += `<p><strong>🔁 Số ô có nhiều giá trị:</strong> ${stats.collisions} (${stats.aggregation})</p>`;
+        if (stats.note) {
+            html += `<p class="note">📝 ${stats.note}</p>`;
+        }
+        html += `</div>`;
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả</a>`;
+
+        resultsDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Pivot error:', error);
+        displayError(error.message);
+    }
+}
+
+// ========== DUPLICATE FUNCTIONS ==========
+
+// Upload file for duplicate tab
+async function uploadDuplicateFile() {
+    const fileInput = document.getElementById('duplicate-file');
+    const fileInfo = document.getElementById('duplicate-file-info');
+    
+    if (!fileInput.files[0]) {
+        alert('Vui lòng chọn file trước khi tải lên');
+        return;
+    }
+
+    try {
+        fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
+
+        let result = await uploadExcelFile(fileInput.files[0], '/api/upload', fileInfo);
+
+        if (!result.success && fileInput.files[0].size <= CHUNK_UPLOAD_THRESHOLD) {
+            const retryFormData = new FormData();
+            retryFormData.append('file', fileInput.files[0]);
+            
+            const response = await fetch('/api/simple-upload', {
+                method: 'POST',
+                body: retryFormData
+            });
+            
+            result = await response.json();
+        }
+
+        if (result.success) {
+            duplicateFile = result;
+            fileInfo.innerHTML = `
+                <div style="color: green;">
+                    <strong>✅ Upload thành công!</strong><br>
+                    <strong>File:</strong> ${result.filename}<br>
+                    <strong>Số dòng:</strong> ${formatRowCount(result.rows, (result.file_info || {}).rows_estimated)}<br>
+                    <strong>Số cột:</strong> ${result.columns.length}<br>
+                    <strong>Các cột:</strong> ${result.columns.slice(0, 6).join(', ')}${result.columns.length > 6 ? '...' : ''}
+                </div>
+            `;
+            
+            document.getElementById('duplicate-configuration').style.display = 'block';
+            populateDuplicateColumns(result.columns);
+            
+        } else {
+            fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi:</strong> ${result.error}</div>`;
+        }
+    } catch (error) {
+        console.error('Upload error:', error);
+        fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi kết nối:</strong> ${error.message}</div>`;
+    }
+}
+// Populate columns for duplicate value method - SỬA LẠI
+function populateDuplicateColumns(columns, containerId = 'duplicate-value-columns') {
+    console.log('=== populateDuplicateColumns START ===');
+    
+    const columnsDiv = document.getElementById(containerId);
+    console.log('columnsDiv found:', columnsDiv);
+    
+    if (!columnsDiv) {
+        console.error('ERROR: value-columns-selection element not found!');
+        return;
+    }
+    
+    if (!columns || columns.length === 0) {
+        console.error('ERROR: No columns provided!');
+        columnsDiv.innerHTML = '<p style="color: red;">Không có cột nào để hiển thị</p>';
+        return;
+    }
+    
+    console.log('Columns to populate:', columns);
+    
+    // Xóa hết nội dung cũ
+    columnsDiv.innerHTML = '';
+    
+    // Tạo checkbox cho mỗi cột
+    columns.forEach((column, index) => {
+        console.log(`Creating checkbox for column ${index}:`, column);
+        
+        const label = document.createElement('label');
         label.className = 'column-checkbox-item';
         label.style.display = 'block';
         label.style.margin = '5px 0';
@@ -1343,6 +1673,14 @@ function toggleMethod(method) {
         populateDuplicateColumns(duplicateFile.columns);
     }
     
+    if (method === 'keys' && duplicateFile && duplicateFile.columns) {
+        populateDuplicateColumns(duplicateFile.columns, 'duplicate-key-columns');
+    }
+    
+    if (method === 'dedup' && duplicateFile && duplicateFile.columns) {
+        populateDuplicateColumns(duplicateFile.columns, 'duplicate-dedup-columns');
+    }
+    
     // Clear previous preview
     document.getElementById('duplicate-preview').innerHTML = '';
 }
@@ -1402,21 +1740,21 @@ function displayDuplicatePreview(result) {
                 <div class="no-duplicates">
                     <div class="icon">✅</div>
                     <p><strong>Không tìm thấy giá trị trùng lặp!</strong></p>
-                    <p>Trong ${result.sample_size} dòng đầu tiên, không có giá trị trùng lặp trong các cột đã chọn.</p>
+                    <p>Trong toàn bộ ${result.sample_size} dòng, không có giá trị trùng lặp trong các cột đã chọn.</p>
                 </div>
             `;
             return;
         }
 
         let html = `<h4>👁️ Xem Trước Giá Trị Trùng Lặp</h4>`;
-        html += `<p><small>Hiển thị kết quả từ ${result.sample_size} dòng đầu tiên</small></p>`;
+        html += `<p><small>Các giá trị lặp lại nhiều nhất trên toàn bộ ${result.sample_size} dòng</small></p>`;
         
         result.columns_with_duplicates.forEach(column => {
             const columnResult = result.preview_results[column];
             html += `<div class="duplicate-group">`;
             html += `<div class="duplicate-group-header">`;
             html += `<div class="duplicate-group-title">📊 Cột: ${column}</div>`;
-            html += `<div class="duplicate-count">${columnResult.total_duplicates} dòng trùng lặp</div>`;
+            html += `<div class="duplicate-count">${columnResult.total_duplicates} dòng trùng lặp / ${columnResult.unique_duplicate_values} giá trị</div>`;
             html += `</div>`;
             
             html += `<div class="duplicate-samples">`;
@@ -1461,15 +1799,7 @@ async function findDuplicateValues() {
         const resultsDiv = document.getElementById('results');
         resultsDiv.innerHTML = '<div class="loading">🔄 Đang tìm giá trị trùng lặp...</div>';
 
-        const response = await fetch('/api/find-duplicate-values', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(data)
-        });
-
-        const result = await response.json();
+        const result = await runJob('/api/find-duplicate-values', data, streamingDisplay(displayDuplicateValuesResults));
         displayDuplicateValuesResults(result);
     } catch (error) {
         console.error('Duplicate values error:', error);
@@ -1541,30 +1871,173 @@ function displayDuplicateValuesResults(result) {
     }
 }
 
-// Find duplicate rows
-async function findDuplicateRows() {
+// Get selected columns for composite-key duplicates
+function getSelectedKeyColumns() {
+    const checkboxes = document.querySelectorAll('#duplicate-key-columns input[type="checkbox"]:checked');
+    return Array.from(checkboxes).map(cb => cb.value);
+}
+
+function formatDuplicateKey(key) {
+    return Object.entries(key).map(([col, value]) => `${col} = ${value}`).join(', ');
+}
+
+// Preview composite-key duplicates
+async function previewDuplicateKeys() {
     if (!duplicateFile) {
         alert('Vui lòng tải file lên trước');
         return;
     }
 
-    const data = {
-        file_path: duplicateFile.file_path
-    };
+    const columns = getSelectedKeyColumns();
+    if (columns.length === 0) {
+        alert('Vui lòng chọn ít nhất một cột làm khóa');
+        return;
+    }
+
+    const previewDiv = document.getElementById('duplicate-preview');
 
     try {
-        const resultsDiv = document.getElementById('results');
-        resultsDiv.innerHTML = '<div class="loading">🔄 Đang tìm dòng trùng lặp...</div>';
+        previewDiv.innerHTML = '<div class="loading">🔄 Đang xem trước...</div>';
 
-        const response = await fetch('/api/find-duplicate-rows', {
+        const response = await fetch('/api/preview-duplicate-keys', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify(data)
+            body: JSON.stringify({ file_path: duplicateFile.file_path, columns: columns })
         });
 
         const result = await response.json();
+        displayDuplicateKeysPreview(result);
+    } catch (error) {
+        console.error('Preview error:', error);
+        previewDiv.innerHTML = `<div class="error-message">❌ Lỗi xem trước: ${error.message}</div>`;
+    }
+}
+
+// Display composite-key duplicate preview
+function displayDuplicateKeysPreview(result) {
+    const previewDiv = document.getElementById('duplicate-preview');
+
+    if (!result.success) {
+        previewDiv.innerHTML = `<div class="error-message">
+            <h5>❌ Lỗi Xem Trước</h5>
+            <p>${result.error}</p>
+        </div>`;
+        return;
+    }
+
+    if (result.duplicate_rows === 0) {
+        previewDiv.innerHTML = `
+            <div class="no-duplicates">
+                <div class="icon">✅</div>
+                <p><strong>Không tìm thấy dòng trùng khóa!</strong></p>
+                <p>Trong ${result.sample_size} dòng, không có tổ hợp (${result.key_columns.join(', ')}) nào lặp lại.</p>
+            </div>
+        `;
+        return;
+    }
+
+    let html = `<h4>👁️ Xem Trước Trùng Lặp Theo Khóa</h4>`;
+    html += `<p><small>${result.duplicate_rows} dòng trùng trong ${result.unique_duplicate_keys} nhóm (trên ${result.sample_size} dòng)</small></p>`;
+    html += `<div class="duplicate-samples">`;
+    result.sample_duplicates.forEach(duplicate => {
+        html += `<div class="duplicate-sample">`;
+        html += `<p><strong>Khóa:</strong> <code>${formatDuplicateKey(duplicate.key)}</code></p>`;
+        html += `<p><strong>Số lần xuất hiện:</strong> ${duplicate.count} (dòng: ${duplicate.sample_rows.join(', ')}...)</p>`;
+        html += `</div>`;
+    });
+    html += `</div>`;
+
+    previewDiv.innerHTML = html;
+}
+
+// Find composite-key duplicates
+async function findDuplicateKeys() {
+    if (!duplicateFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const columns = getSelectedKeyColumns();
+    if (columns.length === 0) {
+        alert('Vui lòng chọn ít nhất một cột làm khóa');
+        return;
+    }
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang tìm trùng lặp theo khóa...</div>';
+
+        const result = await runJob('/api/find-duplicate-keys', { file_path: duplicateFile.file_path, columns: columns }, streamingDisplay(displayDuplicateKeysResults));
+        displayDuplicateKeysResults(result);
+    } catch (error) {
+        console.error('Duplicate keys error:', error);
+        displayError(error.message);
+    }
+}
+
+// Display composite-key duplicate results
+function displayDuplicateKeysResults(result) {
+    const resultsDiv = document.getElementById('results');
+
+    if (!result.success) {
+        resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tìm Trùng Lặp Theo Khóa</h3><p>${result.error}</p></div>`;
+        return;
+    }
+
+    const stats = result.stats;
+    let html = `<h3>✅ Tìm Trùng Lặp Theo Khóa Thành Công!</h3>`;
+    html += `<div class="stats">`;
+    html += `<p><strong>📊 Tổng số dòng:</strong> ${stats.original_rows}</p>`;
+    html += `<p><strong>🔑 Khóa:</strong> ${stats.key_columns.join(' + ')}</p>`;
+    html += `<p><strong>🎯 Số dòng trùng lặp:</strong> ${stats.duplicate_rows}</p>`;
+    html += `<p><strong>📈 Tỷ lệ trùng lặp:</strong> ${stats.duplicate_percentage}%</p>`;
+    html += `<p><strong>📋 Số nhóm trùng lặp:</strong> ${stats.unique_duplicate_keys}</p>`;
+
+    if (stats.duplicate_groups && stats.duplicate_groups.length > 0) {
+        html += `<div class="unmatched-section">`;
+        html += `<h4>📋 Một số nhóm trùng lặp:</h4>`;
+        stats.duplicate_groups.slice(0, 5).forEach(group => {
+            html += `<div class="duplicate-group">`;
+            html += `<p><code>${formatDuplicateKey(group.key)}</code> - xuất hiện ${group.count} lần (dòng: ${group.excel_rows.join(', ')})</p>`;
+            html += `</div>`;
+        });
+        if (stats.duplicate_groups.length > 5) {
+            html += `<p>... và ${stats.duplicate_groups.length - 5} nhóm trùng lặp khác</p>`;
+        }
+        html += `</div>`;
+    }
+
+    if (stats.note) {
+        html += `<p class="note">📝 ${stats.note}</p>`;
+    }
+
+    html += `</div>`;
+
+    if (result.download_url) {
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả Chi Tiết</a>`;
+    }
+
+    resultsDiv.innerHTML = html;
+}
+
+// Find duplicate rows
+async function findDuplicateRows() {
+    if (!duplicateFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const data = {
+        file_path: duplicateFile.file_path
+    };
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang tìm dòng trùng lặp...</div>';
+
+        const result = await runJob('/api/find-duplicate-rows', data, streamingDisplay(displayDuplicateRowsResults));
         displayDuplicateRowsResults(result);
     } catch (error) {
         console.error('Duplicate rows error:', error);
@@ -1631,14 +2104,713 @@ function displayDuplicateRowsResults(result) {
         resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tìm Dòng Trùng Lặp</h3><p>${result.error}</p></div>`;
     }
 }
-// ========== MODAL FUNCTIONS ==========
+// Find near-duplicate rows
+async function findNearDuplicateRows() {
+    if (!duplicateFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
 
-function closeJoinModal() {
-    document.getElementById('join-modal').style.display = 'none';
-}
+    const threshold = parseFloat(document.getElementById('near-duplicate-threshold').value) || 0.8;
 
-function closeSeparatorModal() {
-    document.getElementById('separator-modal').style.display = 'none';
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang tìm dòng gần trùng...</div>';
+
+        const result = await runJob('/api/find-near-duplicate-rows', { file_path: duplicateFile.file_path, threshold: threshold }, streamingDisplay(displayNearDuplicateResults));
+        displayNearDuplicateResults(result);
+    } catch (error) {
+        console.error('Near duplicate rows error:', error);
+        displayError(error.message);
+    }
+}
+
+// Display near-duplicate clusters
+function displayNearDuplicateResults(result) {
+    const resultsDiv = document.getElementById('results');
+
+    if (!result.success) {
+        resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tìm Dòng Gần Trùng</h3><p>${result.error}</p></div>`;
+        return;
+    }
+
+    const stats = result.stats;
+    let html = `<h3>✅ Tìm Dòng Gần Trùng Thành Công!</h3>`;
+    html += `<div class="stats">`;
+    html += `<p><strong>📊 Tổng số dòng:</strong> ${stats.original_rows}</p>`;
+    html += `<p><strong>🎯 Số dòng gần trùng:</strong> ${stats.near_duplicate_rows}</p>`;
+    html += `<p><strong>📋 Số cụm:</strong> ${stats.cluster_count}</p>`;
+    html += `<p><strong>📏 Ngưỡng tương đồng:</strong> ${stats.threshold}</p>`;
+
+    if (stats.clusters && stats.clusters.length > 0) {
+        html += `<div class="unmatched-section">`;
+        html += `<h4>📋 Một số cụm gần trùng:</h4>`;
+        stats.clusters.slice(0, 3).forEach(cluster => {
+            html += `<div class="unmatched-row">`;
+            html += `<h5>Cụm ${cluster.cluster_id} - ${cluster.count} dòng (tương đồng ≥ ${cluster.min_similarity})</h5>`;
+            html += `<p><strong>Vị trí dòng:</strong> ${cluster.excel_rows.map((row, i) => `${row} (${cluster.similarities[i]})`).join(', ')}</p>`;
+            html += `<div class="row-data">`;
+            Object.entries(cluster.row_data).forEach(([key, value]) => {
+                html += `<div class="data-field"><strong>${key}:</strong> ${value}</div>`;
+            });
+            html += `</div>`;
+            html += `</div>`;
+        });
+        if (stats.clusters.length > 3) {
+            html += `<p>... và ${stats.clusters.length - 3} cụm khác</p>`;
+        }
+        html += `</div>`;
+    } else {
+        html += `<div class="success-message">`;
+        html += `<p>🎉 Không tìm thấy dòng gần trùng nào!</p>`;
+        html += `</div>`;
+    }
+
+    if (stats.note) {
+        html += `<p class="note">📝 ${stats.note}</p>`;
+    }
+
+    html += `</div>`;
+
+    if (result.download_url) {
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả Chi Tiết</a>`;
+    }
+
+    resultsDiv.innerHTML = html;
+}
+// Find records shared between several files
+async function findCrossFileDuplicates() {
+    const fileInput = document.getElementById('cross-duplicate-files');
+    const info = document.getElementById('cross-duplicate-info');
+    const files = Array.from(fileInput.files);
+
+    if (files.length < 2) {
+        alert('Vui lòng chọn ít nhất 2 file');
+        return;
+    }
+
+    const columns = document.getElementById('cross-duplicate-columns').value
+        .split(',')
+        .map(col => col.trim())
+        .filter(col => col.length > 0);
+
+    try {
+        const filePaths = [];
+        for (let i = 0; i < files.length; i++) {
+            info.innerHTML = `<div class="loading">🔄 Đang tải lên file ${i + 1}/${files.length}: ${files[i].name}</div>`;
+
+            const result = await uploadExcelFile(files[i], '/api/upload-join', info);
+
+            if (!result.success) {
+                info.innerHTML = `<div style="color: red;"><strong>❌ Lỗi (${files[i].name}):</strong> ${result.error}</div>`;
+                return;
+            }
+            filePaths.push(result.file_path);
+        }
+
+        info.innerHTML = `<div style="color: green;">✅ Đã tải lên ${files.length} file</div>`;
+        document.getElementById('results').innerHTML = '<div class="loading">🔄 Đang tìm trùng lặp giữa các file...</div>';
+
+        const result = await runJob('/api/find-cross-file-duplicates', {
+            file_paths: filePaths,
+            file_names: files.map(file => file.name),
+            columns: columns
+        }, streamingDisplay(displayCrossFileDuplicateResults));
+        displayCrossFileDuplicateResults(result);
+    } catch (error) {
+        console.error('Cross-file duplicates error:', error);
+        displayError(error.message);
+    }
+}
+
+// Display cross-file duplicate groups
+function displayCrossFileDuplicateResults(result) {
+    const resultsDiv = document.getElementById('results');
+
+    if (!result.success) {
+        resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tìm Trùng Lặp Giữa Các File</h3><p>${result.error}</p></div>`;
+        return;
+    }
+
+    const stats = result.stats;
+    let html = `<h3>✅ Tìm Trùng Lặp Giữa Các File Thành Công!</h3>`;
+    html += `<div class="stats">`;
+    html += `<p><strong>📁 Số file:</strong> ${stats.file_count}</p>`;
+    html += `<p><strong>📊 Tổng số dòng:</strong> ${stats.total_rows}</p>`;
+    html += `<p><strong>🔑 Khóa:</strong> ${stats.key_columns.join(', ')}</p>`;
+    html += `<p><strong>🎯 Bản ghi xuất hiện ở nhiều file:</strong> ${stats.cross_file_groups}</p>`;
+
+    if (stats.duplicate_groups && stats.duplicate_groups.length > 0) {
+        html += `<div class="unmatched-section">`;
+        html += `<h4>📋 Một số bản ghi trùng:</h4>`;
+        stats.duplicate_groups.slice(0, 5).forEach(group => {
+            html += `<div class="duplicate-group">`;
+            html += `<p><code>${formatDuplicateKey(group.key)}</code> - ${group.file_count} file</p>`;
+            html += `<p>${group.occurrences.map(o => `${o.file} (dòng ${o.excel_row}, ${o.count} lần)`).join('; ')}</p>`;
+            html += `</div>`;
+        });
+        if (stats.duplicate_groups.length > 5) {
+            html += `<p>... và ${stats.duplicate_groups.length - 5} bản ghi khác</p>`;
+        }
+        html += `</div>`;
+    }
+
+    if (stats.note) {
+        html += `<p class="note">📝 ${stats.note}</p>`;
+    }
+
+    html += `</div>`;
+
+    if (result.download_url) {
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả Chi Tiết</a>`;
+    }
+
+    resultsDiv.innerHTML = html;
+}
+
+// Remove duplicates and export the cleaned file
+async function deduplicateFile() {
+    if (!duplicateFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const checkboxes = document.querySelectorAll('#duplicate-dedup-columns input[type="checkbox"]:checked');
+    const data = {
+        file_path: duplicateFile.file_path,
+        columns: Array.from(checkboxes).map(cb => cb.value),
+        keep: document.getElementById('dedup-keep').value
+    };
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang loại bỏ trùng lặp...</div>';
+
+        const result = await runJob('/api/deduplicate', data);
+
+        if (!result.success) {
+            resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Loại Bỏ Trùng Lặp</h3><p>${result.error}</p></div>`;
+            return;
+        }
+
+        const stats = result.stats;
+        let html = `<h3>✅ Loại Bỏ Trùng Lặp Thành Công!</h3>`;
+        html += `<div class="stats">`;
+        html += `<p><strong>📊 Tổng số dòng:</strong> ${stats.original_rows}</p>`;
+        html += `<p><strong>✅ Số dòng giữ lại:</strong> ${stats.kept_rows}</p>`;
+        html += `<p><strong>🗑️ Số dòng đã loại bỏ:</strong> ${stats.removed_rows} (${stats.removed_percentage}%)</p>`;
+        html += `<p><strong>🔑 Cột khóa:</strong> ${stats.key_columns.join(', ')}</p>`;
+        if (stats.note) {
+            html += `<p class="note">📝 ${stats.note}</p>`;
+        }
+        html += `</div>`;
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Đã Loại Bỏ Trùng Lặp</a>`;
+
+        resultsDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Deduplicate error:', error);
+        displayError(error.message);
+    }
+}
+
+// ========== COMPUTED COLUMNS ==========
+
+function collectComputeExpressions() {
+    return document.getElementById('compute-expressions').value
+        .split('\n')
+        .map(line => line.trim())
+        .filter(line => line.includes('='))
+        .map(line => {
+            const index = line.indexOf('=');
+            return [line.slice(0, index).trim(), line.slice(index + 1).trim()];
+        });
+}
+
+async function previewCompute() {
+    if (!uploadedFiles.merge || !uploadedFiles.merge.file) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const expressions = collectComputeExpressions();
+    if (expressions.length === 0) {
+        alert('Vui lòng nhập ít nhất một biểu thức dạng: Tên cột = biểu thức');
+        return;
+    }
+
+    const previewDiv = document.getElementById('compute-preview');
+
+    try {
+        previewDiv.innerHTML = '<div class="loading">🔄 Đang xem trước...</div>';
+
+        const response = await fetch('/api/preview-compute', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ file_path: uploadedFiles.merge.file.file_path, expressions: expressions })
+        });
+
+        const result = await response.json();
+
+        if (!result.success) {
+            previewDiv.innerHTML = `<div class="error-message">❌ ${result.error}</div>`;
+            return;
+        }
+
+        let html = '<table class="preview-table"><thead><tr>';
+        result.columns.forEach(col => {
+            const computed = result.computed_columns.includes(col);
+            html += `<th>${computed ? '🧮 ' : ''}${col}</th>`;
+        });
+        html += '</tr></thead><tbody>';
+        result.preview_data.forEach(row => {
+            html += '<tr>';
+            result.columns.forEach(col => {
+                html += `<td>${row[col] !== undefined ? row[col] : ''}</td>`;
+            });
+            html += '</tr>';
+        });
+        html += '</tbody></table>';
+
+        previewDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Compute preview error:', error);
+        previewDiv.innerHTML = `<div class="error-message">❌ Lỗi xem trước: ${error.message}</div>`;
+    }
+}
+
+async function performCompute() {
+    if (!uploadedFiles.merge || !uploadedFiles.merge.file) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const expressions = collectComputeExpressions();
+    if (expressions.length === 0) {
+        alert('Vui lòng nhập ít nhất một biểu thức dạng: Tên cột = biểu thức');
+        return;
+    }
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang tạo cột tính toán...</div>';
+
+        const result = await runJob('/api/compute-columns', { file_path: uploadedFiles.merge.file.file_path, expressions: expressions });
+
+        if (!result.success) {
+            resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Tạo Cột Tính Toán</h3><p>${result.error}</p></div>`;
+            return;
+        }
+
+        const stats = result.stats;
+        let html = `<h3>✅ Tạo Cột Tính Toán Thành Công!</h3>`;
+        html += `<div class="stats">`;
+        html += `<p><strong>📊 Số dòng:</strong> ${stats.original_rows}</p>`;
+        html += `<p><strong>📋 Số cột:</strong> ${stats.original_columns} → ${stats.final_columns}</p>`;
+        stats.computed_columns_info.forEach(info => {
+            html += `<p><strong>🧮 ${info.new_column}</strong> = <code>${info.expression}</code></p>`;
+        });
+        if (stats.note) {
+            html += `<p class="note">📝 ${stats.note}</p>`;
+        }
+        html += `</div>`;
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả</a>`;
+
+        resultsDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Compute error:', error);
+        displayError(error.message);
+    }
+}
+
+// ========== PIPELINE FUNCTIONS ==========
+
+// Upload a file through the regular upload endpoint (with simple-upload fallback)
+async function uploadPipelineInput(inputId) {
+    const fileInput = document.getElementById(inputId);
+    if (!fileInput.files[0]) {
+        return { success: false, error: 'Vui lòng chọn file trước khi tải lên' };
+    }
+
+    let result = await uploadExcelFile(fileInput.files[0], '/api/upload', null);
+
+    if (!result.success && fileInput.files[0].size <= CHUNK_UPLOAD_THRESHOLD) {
+        const retryFormData = new FormData();
+        retryFormData.append('file', fileInput.files[0]);
+        const response = await fetch('/api/simple-upload', {
+            method: 'POST',
+            body: retryFormData
+        });
+        result = await response.json();
+    }
+    return result;
+}
+
+async function uploadPipelineFile() {
+    const fileInfo = document.getElementById('pipeline-file-info');
+    try {
+        fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
+        const result = await uploadPipelineInput('pipeline-file');
+
+        if (result.success) {
+            pipelineFile = result;
+            fileInfo.innerHTML = `
+                <div style="color: green;">
+                    <strong>✅ Upload thành công!</strong><br>
+                    <strong>File:</strong> ${result.filename}<br>
+                    <strong>Số dòng:</strong> ${formatRowCount(result.rows, (result.file_info || {}).rows_estimated)}<br>
+                    <strong>Các cột:</strong> ${result.columns.join(', ')}
+                </div>
+            `;
+            loadPipelineRecipeList();
+        } else {
+            fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi:</strong> ${result.error}</div>`;
+        }
+    } catch (error) {
+        console.error('Upload error:', error);
+        fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi kết nối:</strong> ${error.message}</div>`;
+    }
+}
+
+async function uploadPipelineExtraFile() {
+    const fileInfo = document.getElementById('pipeline-extra-file-info');
+    try {
+        fileInfo.innerHTML = '<div class="loading">🔄 Đang tải lên...</div>';
+        const result = await uploadPipelineInput('pipeline-extra-file');
+
+        if (result.success) {
+            fileInfo.innerHTML = `
+                <div style="color: green;">
+                    <strong>✅ ${result.filename}</strong><br>
+                    <strong>file_path:</strong> <code>${result.file_path}</code><br>
+                    <strong>Các cột:</strong> ${result.columns.join(', ')}
+                </div>
+            `;
+        } else {
+            fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi:</strong> ${result.error}</div>`;
+        }
+    } catch (error) {
+        console.error('Upload error:', error);
+        fileInfo.innerHTML = `<div style="color: red;"><strong>❌ Lỗi kết nối:</strong> ${error.message}</div>`;
+    }
+}
+
+function readPipelineRecipe() {
+    try {
+        return JSON.parse(document.getElementById('pipeline-recipe').value);
+    } catch (error) {
+        alert(`Quy trình không phải JSON hợp lệ: ${error.message}`);
+        return null;
+    }
+}
+
+async function loadPipelineRecipeList() {
+    try {
+        const response = await fetch('/api/recipes');
+        const result = await response.json();
+        if (!result.success) {
+            return;
+        }
+        const select = document.getElementById('pipeline-saved-recipes');
+        select.innerHTML = '<option value="">-- Quy trình đã lưu --</option>' +
+            result.recipes.map(recipe => `<option value="${recipe.name}">${recipe.name} (${recipe.steps} bước)</option>`).join('');
+    } catch (error) {
+        console.error('Recipe list error:', error);
+    }
+}
+
+async function loadPipelineRecipe() {
+    const name = document.getElementById('pipeline-saved-recipes').value;
+    if (!name) {
+        alert('Vui lòng chọn một quy trình đã lưu');
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/recipes/${encodeURIComponent(name)}`);
+        const result = await response.json();
+        if (result.success) {
+            document.getElementById('pipeline-recipe').value = JSON.stringify(result.recipe, null, 2);
+            document.getElementById('pipeline-recipe-name').value = result.recipe.name || name;
+        } else {
+            alert(result.error);
+        }
+    } catch (error) {
+        console.error('Recipe load error:', error);
+        alert(`Lỗi mở quy trình: ${error.message}`);
+    }
+}
+
+async function savePipelineRecipe() {
+    const recipe = readPipelineRecipe();
+    const name = document.getElementById('pipeline-recipe-name').value.trim();
+    if (!recipe) {
+        return;
+    }
+    if (!name) {
+        alert('Vui lòng nhập tên quy trình');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/recipes', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ name: name, recipe: recipe })
+        });
+        const result = await response.json();
+        if (result.success) {
+            alert(`✅ ${result.message}: ${result.name}`);
+            loadPipelineRecipeList();
+        } else {
+            alert(result.error);
+        }
+    } catch (error) {
+        console.error('Recipe save error:', error);
+        alert(`Lỗi lưu quy trình: ${error.message}`);
+    }
+}
+
+async function runPipeline() {
+    if (!pipelineFile) {
+        alert('Vui lòng tải file lên trước');
+        return;
+    }
+
+    const recipe = readPipelineRecipe();
+    if (!recipe) {
+        return;
+    }
+
+    try {
+        const resultsDiv = document.getElementById('results');
+        resultsDiv.innerHTML = '<div class="loading">🔄 Đang chạy quy trình...</div>';
+
+        const result = await runJob('/api/run-pipeline', { file_path: pipelineFile.file_path, recipe: recipe });
+
+        if (!result.success) {
+            resultsDiv.innerHTML = `<div class="error-message"><h3>❌ Lỗi Chạy Quy Trình</h3><p>${result.error}</p></div>`;
+            return;
+        }
+
+        const stats = result.stats;
+        let html = `<h3>✅ Chạy Quy Trình Thành Công!</h3>`;
+        html += `<div class="stats">`;
+        html += `<p><strong>📊 Dữ liệu gốc:</strong> ${stats.original_rows} dòng × ${stats.original_columns} cột</p>`;
+        html += `<p><strong>📈 Kết quả:</strong> ${stats.final_rows} dòng × ${stats.final_columns} cột</p>`;
+        html += `<table class="preview-table"><tr><th>Bước</th><th>Thao tác</th><th>Dòng trước</th><th>Dòng sau</th><th>Số cột</th></tr>`;
+        stats.steps.forEach(step => {
+            html += `<tr><td>${step.step}</td><td>${step.description}</td><td>${step.rows_before}</td><td>${step.rows_after}</td><td>${step.columns_after}</td></tr>`;
+        });
+        html += `</table>`;
+        if (stats.note) {
+            html += `<p class="note">📝 ${stats.note}</p>`;
+        }
+        html += `</div>`;
+        html += `<a href="${result.download_url}" class="download-link">📥 Tải xuống File Kết Quả</a>`;
+
+        resultsDiv.innerHTML = html;
+    } catch (error) {
+        console.error('Pipeline error:', error);
+        displayError(error.message);
+    }
+}
+
+// ========== BACKGROUND JOBS ==========
+
+const JOB_POLL_INTERVAL = 1000;
+
+// Minimum ms between re-renders of a result that is still streaming in
+const STREAM_RENDER_INTERVAL = 300;
+
+const JOB_PHASE_LABELS = {
+    read: 'Đang đọc file',
+    sanitize: 'Đang làm sạch dữ liệu',
+    compute: 'Đang xử lý',
+    write: 'Đang ghi kết quả'
+};
+
+// Run a heavy operation as a background job and wait for its result
+async function runJob(url, data, streamHandlers = null) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ ...data, async: true })
+    });
+
+    const submitted = await response.json();
+    if (!submitted.job_id) {
+        return submitted;
+    }
+
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+
+        // With stream handlers the finished result is fetched as NDJSON (see streamResult)
+        const jobResponse = await fetch(`/api/jobs/${submitted.job_id}${streamHandlers ? '?stream=1' : ''}`);
+        const job = await jobResponse.json();
+
+        if (!job.success) {
+            return job;
+        }
+        if (job.status === 'done') {
+            if (job.result_url) {
+                return streamResult(await fetch(job.result_url), streamHandlers);
+            }
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            return { success: false, error: job.error };
+        }
+        if (job.status === 'cancelled') {
+            return job.result || { success: false, cancelled: true, error: 'Đã hủy thao tác' };
+        }
+        showJobProgress(job);
+    }
+}
+
+// Call onRecord with each parsed line of an NDJSON response, as the lines arrive
+async function readNdjson(response, onRecord) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onRecord(JSON.parse(line)));
+
+        if (done) {
+            break;
+        }
+    }
+    if (buffer.trim()) {
+        onRecord(JSON.parse(buffer));
+    }
+}
+
+// Rebuild a result streamed by the server: a header line, then one line per item of
+// each large array ({path, item}, or {path, alias} for a copy of an array already sent).
+// handlers.onHeader(result) runs once the header is in, handlers.onItem(path, item, result)
+// after each item; returns the complete result.
+async function streamResult(response, handlers = {}) {
+    if (!(response.headers.get('Content-Type') || '').includes('application/x-ndjson')) {
+        return response.json();
+    }
+
+    let result = null;
+    let complete = false;
+    const arrayAt = (path) => path.reduce((value, key) => value[key], result);
+    const setAt = (path, value) => {
+        path.slice(0, -1).reduce((parent, key) => parent[key], result)[path[path.length - 1]] = value;
+    };
+
+    await readNdjson(response, record => {
+        if (record.header) {
+            result = record.header;
+            if (handlers.onHeader) {
+                handlers.onHeader(result);
+            }
+        } else if (record.alias) {
+            setAt(record.path, arrayAt(record.alias));
+        } else if (record.path) {
+            arrayAt(record.path).push(record.item);
+            if (handlers.onItem) {
+                handlers.onItem(record.path, record.item, result);
+            }
+        } else if (record.end) {
+            complete = true;
+        }
+    });
+
+    if (!complete) {
+        throw new Error('Kết nối bị gián đoạn khi đang nhận kết quả');
+    }
+    return result;
+}
+
+// Stream handlers for results shown by a display function that only summarizes
+// the large arrays: render on the header, then at most every STREAM_RENDER_INTERVAL ms
+function streamingDisplay(displayFn) {
+    let lastRender = 0;
+    return {
+        onHeader: (result) => {
+            lastRender = Date.now();
+            displayFn(result);
+        },
+        onItem: (path, item, result) => {
+            if (Date.now() - lastRender >= STREAM_RENDER_INTERVAL) {
+                lastRender = Date.now();
+                displayFn(result);
+            }
+        }
+    };
+}
+
+// Show phase, progress bar and a cancel button in the results area while a job runs
+function showJobProgress(job) {
+    const loading = document.querySelector('#results .loading');
+    if (!loading) {
+        return;
+    }
+
+    if (!loading.dataset.label) {
+        loading.dataset.label = loading.textContent;
+        loading.innerHTML = `
+            <div class="job-status"></div>
+            <progress class="job-progress" max="100"></progress>
+            <div><button class="btn-secondary job-cancel" onclick="cancelJob('${job.job_id}', this)">✖ Hủy</button></div>
+        `;
+    }
+
+    const status = loading.querySelector('.job-status');
+    const bar = loading.querySelector('.job-progress');
+    const progress = job.progress || {};
+
+    if (job.status === 'queued') {
+        status.textContent = `⏳ Đang chờ đến lượt xử lý (vị trí ${job.queue_position})...`;
+    } else if (progress.phase) {
+        const label = JOB_PHASE_LABELS[progress.phase] || progress.phase;
+        const rows = progress.total ? `${progress.done.toLocaleString()}/${progress.total.toLocaleString()} dòng` : '';
+        status.textContent = `🔄 ${label} ${rows} (${job.elapsed}s)`;
+    } else {
+        status.textContent = `${loading.dataset.label} (${job.elapsed}s)`;
+    }
+
+    if (progress.percent !== null && progress.percent !== undefined) {
+        bar.value = progress.percent;
+    } else {
+        bar.removeAttribute('value');  // Indeterminate
+    }
+}
+
+// Ask the server to stop a running job
+async function cancelJob(jobId, button) {
+    button.disabled = true;
+    button.textContent = 'Đang hủy...';
+    try {
+        await fetch(`/api/jobs/${jobId}/cancel`, { method: 'POST' });
+    } catch (error) {
+        console.error('Cancel job error:', error);
+    }
+}
+
+// ========== MODAL FUNCTIONS ==========
+
+function closeJoinModal() {
+    document.getElementById('join-modal').style.display = 'none';
+}
+
+function closeSeparatorModal() {
+    document.getElementById('separator-modal').style.display = 'none';
 }
 
 function showSeparatorModal(configId) {
@@ -1700,6 +2872,9 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('compare-tab').classList.add('active');
     document.querySelector('.tab-button').classList.add('active');
     
+    // Saved pipeline recipes
+    loadPipelineRecipeList();
+    
     // Compare type change
     document.querySelectorAll('input[name="compare_type"]').forEach(radio => {
         radio.addEventListener('change', function() {
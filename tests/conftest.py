@@ -0,0 +1,11 @@
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def make_excel(tmp_path):
+    """Write a DataFrame to an .xlsx file in tmp_path and return its path"""
+    def make(df, name='input.xlsx'):
+        path = tmp_path / name
+        df.to_excel(path, index=False)
+        return str(path)
+    return make
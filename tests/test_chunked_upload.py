@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+import time
+import zlib
+
+from core import ChunkedUploadManager
+
+DATA = bytes(range(256)) * 40
+
+def send(manager, upload_id, index, chunk_size, data=DATA, crc32=None):
+    chunk = data[index * chunk_size:(index + 1) * chunk_size]
+    crc32 = crc32 or format(zlib.crc32(chunk), '08x')
+    return manager.write_chunk(upload_id, index, io.BytesIO(chunk), len(chunk), crc32)
+
+def test_chunks_in_any_order_are_assembled_and_probed(tmp_path):
+    probed = []
+
+    def probe(file_path, filename, sha256):
+        probed.append((filename, sha256))
+        return {'success': True, 'rows': 1}
+
+    manager = ChunkedUploadManager(str(tmp_path), probe)
+    upload = manager.init('data.xlsx', len(DATA), chunk_size=4096)
+    assert upload['total_chunks'] == 3
+
+    for index in (2, 0):
+        assert send(manager, upload['upload_id'], index, 4096)['success']
+    assert manager.status(upload['upload_id'])['missing'] == [1]
+    assert not manager.finalize(upload['upload_id'])['success']
+
+    assert send(manager, upload['upload_id'], 1, 4096)['complete']
+    result = manager.finalize(upload['upload_id'])
+
+    assert result['success'], result
+    assert result['sha256'] == hashlib.sha256(DATA).hexdigest()
+    assert probed == [('data.xlsx', result['sha256'])]
+    with open(result['file_path'], 'rb') as f:
+        assert f.read() == DATA
+
+def test_chunk_with_bad_checksum_is_rejected(tmp_path):
+    manager = ChunkedUploadManager(str(tmp_path))
+    upload = manager.init('data.xlsx', len(DATA), chunk_size=4096)
+
+    result = send(manager, upload['upload_id'], 0, 4096, crc32='00000000')
+
+    assert not result['success']
+    assert manager.status(upload['upload_id'])['received'] == []
+
+def test_init_rejects_files_above_max_size(tmp_path):
+    manager = ChunkedUploadManager(str(tmp_path), max_size=1024)
+
+    assert not manager.init('data.xlsx', 1025)['success']
+    assert manager.init('data.xlsx', 1024)['success']
+
+def test_failed_probe_removes_the_file(tmp_path):
+    def probe(file_path, filename, sha256):
+        raise ValueError('hỏng')
+
+    manager = ChunkedUploadManager(str(tmp_path), probe)
+    upload = manager.init('data.xlsx', 100)
+    send(manager, upload['upload_id'], 0, upload['chunk_size'], DATA[:100])
+
+    result = manager.finalize(upload['upload_id'])
+
+    assert not result['success']
+    assert os.listdir(tmp_path) == []
+
+def test_stale_uploads_are_purged_complete_or_not(tmp_path):
+    manager = ChunkedUploadManager(str(tmp_path), lambda *args: {'success': True})
+    partial = manager.init('partial.xlsx', 200)
+    complete = manager.init('complete.xlsx', 100)
+    send(manager, complete['upload_id'], 0, complete['chunk_size'], DATA[:100])
+    manager.probes[complete['upload_id']].result()
+
+    # Age both uploads past STALE_TTL
+    for upload_id in (partial['upload_id'], complete['upload_id']):
+        state = manager._load(upload_id)
+        state['updated_at'] = time.time() - manager.STALE_TTL - 1
+        manager._save(state)
+    fresh = manager.init('fresh.xlsx', 10)
+
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{fresh['upload_id']}.json", f"{fresh['upload_id']}.part"])
+
+def test_discard_drops_the_owning_upload(tmp_path):
+    manager = ChunkedUploadManager(str(tmp_path))
+    upload = manager.init('data.xlsx', 100)
+
+    manager.discard(os.path.join(tmp_path, f"{upload['upload_id']}.part"))
+
+    assert not manager.status(upload['upload_id'])['success']
+    assert os.listdir(tmp_path) == []
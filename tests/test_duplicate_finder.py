@@ -0,0 +1,94 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core import DuplicateFinder
+
+DATA = pd.DataFrame({
+    'MSSV': [1, 2, 1, 3, 2, 1],
+    'Ten': ['An', 'Binh', 'An', 'Chi', 'Binh', 'Anh']
+})
+
+def test_find_duplicate_rows_groups_equal_rows(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({'MSSV': [1, 2, 1, 1], 'Ten': ['An', 'Binh', 'An', 'Anh']}))
+
+    result = DuplicateFinder().find_duplicate_rows(file_path, str(tmp_path / 'out.xlsx'))
+
+    assert result['success'], result
+    assert result['stats']['all_duplicate_rows'] == [2, 4]
+    (group,) = result['stats']['duplicate_groups']
+    assert group['count'] == 2
+    assert group['row_data'] == {'MSSV': 1, 'Ten': 'An'}
+
+def test_find_duplicate_rows_groups_blank_cells(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({'Ma': [1, 3, 2, 3], 'Ten': ['An', None, 'Binh', None]}))
+
+    result = DuplicateFinder().find_duplicate_rows(file_path, str(tmp_path / 'out.xlsx'))
+
+    assert result['success'], result
+    assert result['stats']['all_duplicate_rows'] == [3, 5]
+
+@pytest.mark.parametrize('keep', ['first', 'last', 'none'])
+def test_deduplicate_keeps_like_pandas(make_excel, tmp_path, keep):
+    file_path = make_excel(DATA)
+    output_path = str(tmp_path / 'out.xlsx')
+
+    result = DuplicateFinder().deduplicate(file_path, output_path, ['MSSV', 'Ten'], keep)
+
+    assert result['success'], result
+    expected = DATA[~DATA.duplicated(['MSSV', 'Ten'], keep=False if keep == 'none' else keep)]
+    output = pd.read_excel(output_path)
+    assert output.values.tolist() == expected.values.tolist()
+    assert result['stats']['removed_rows'] == len(DATA) - len(expected)
+
+def test_deduplicate_missing_column_creates_no_output(make_excel, tmp_path):
+    output_path = str(tmp_path / 'out.xlsx')
+
+    result = DuplicateFinder().deduplicate(make_excel(DATA), output_path, ['Khong_Co'])
+
+    assert not result['success']
+    assert 'Khong_Co' in result['error']
+    assert not os.path.exists(output_path)
+
+def test_deduplicate_does_not_mix_numbers_and_text(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({'Ma': [1, '1', 1]}))
+    output_path = str(tmp_path / 'out.xlsx')
+
+    result = DuplicateFinder().deduplicate(file_path, output_path)
+
+    assert result['success'], result
+    assert result['stats']['kept_rows'] == 2
+
+def test_deduplicate_frame_rejects_unknown_keep():
+    with pytest.raises(ValueError):
+        DuplicateFinder().deduplicate_frame(DATA, keep='any')
+
+@pytest.mark.parametrize('keep, removed', [('first', 2), ('last', 2), ('none', 4)])
+def test_deduplicate_across_chunks_with_different_dtypes(make_excel, tmp_path, monkeypatch, keep, removed):
+    # The second chunk has a blank key cell, so it is not read as int64 like the first one
+    file_path = make_excel(pd.DataFrame({'Key': [0, 1, 2, 0, 1, None], 'Ten': list('abcdef')}))
+    monkeypatch.setattr(DuplicateFinder, 'CHUNK_ROWS', 3)
+
+    result = DuplicateFinder().deduplicate(file_path, str(tmp_path / 'out.xlsx'), ['Key'], keep)
+
+    assert result['success'], result
+    assert result['stats']['removed_rows'] == removed
+
+def test_find_cross_file_duplicates_streams_chunks(make_excel, tmp_path, monkeypatch):
+    first = make_excel(pd.DataFrame({'MSSV': [1, 2, 3, 2, None], 'Ten': ['a', 'b', 'c', 'b', 'z']}), 'first.xlsx')
+    second = make_excel(pd.DataFrame({'MSSV': ['2', 5, 1, 1], 'Ten': ['b', 'e', 'a', 'a']}), 'second.xlsx')
+    third = make_excel(pd.DataFrame({'MSSV': [7, 3.0, 2, 8], 'Ten': ['g', 'c', 'b', 'h']}), 'third.xlsx')
+    monkeypatch.setattr(DuplicateFinder, 'CHUNK_ROWS', 2)
+
+    result = DuplicateFinder().find_cross_file_duplicates([first, second, third], str(tmp_path / 'out.xlsx'),
+                                                          ['MSSV', 'Ten'])
+
+    assert result['success'], result
+    groups = result['stats']['duplicate_groups']
+    assert [group['key']['Ten'] for group in groups] == ['b', 'a', 'c']
+    assert [(o['file'], o['excel_row'], o['count']) for o in groups[0]['occurrences']] == [
+        ('first.xlsx', 3, 2), ('second.xlsx', 2, 1), ('third.xlsx', 4, 1)
+    ]
+    assert [f['New_Shared_Keys'] for f in result['stats']['files']] == [0, 2, 1]
+    assert result['stats']['distinct_keys'] == 7
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from core import ColumnExpression
+
+DF = pd.DataFrame({'Ho': ['a', 'b'], 'Đơn giá': [2, 3], 'Số lượng': [4, 5]})
+
+def test_brackets_name_columns_with_spaces():
+    expression = ColumnExpression('[Đơn giá] * [Số lượng]')
+
+    assert expression.columns == {'Đơn giá', 'Số lượng'}
+    assert expression.evaluate(DF).tolist() == [8, 15]
+
+@pytest.mark.parametrize('text, expected', [
+    ('concat([Ho], "[x]")', ['a[x]', 'b[x]']),
+    ("replace([Ho], 'a', '[Ho]')", ['[Ho]', 'b']),
+    (r'concat([Ho], "\"[Ho]\"")', ['a"[Ho]"', 'b"[Ho]"'])
+])
+def test_brackets_inside_string_literals_are_text(text, expected):
+    expression = ColumnExpression(text)
+
+    assert expression.columns == {'Ho'}
+    assert expression.evaluate(DF).tolist() == expected
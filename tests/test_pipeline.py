@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from core import Pipeline
+
+def test_run_chains_steps(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({
+        'MSSV': [1, 2, 1],
+        'Ho': ['Nguyen', 'Tran', 'Nguyen'],
+        'Ten': ['An', 'Binh', 'An'],
+        'Ma': ['A;B', 'C', 'A;B']
+    }))
+    output_path = str(tmp_path / 'out.xlsx')
+    recipe = {
+        'name': 'Kiểm thử',
+        'steps': [
+            {'operation': 'merge_columns', 'params': {'merge_configs': [[['Ho', 'Ten'], 'Ho_Ten', ' ']]}},
+            {'operation': 'deduplicate', 'params': {'columns': ['MSSV']}},
+            {'operation': 'explode_rows', 'params': {'split_column': 'Ma', 'id_columns': ['MSSV', 'Ho_Ten']}}
+        ]
+    }
+
+    result = Pipeline().run(recipe, file_path, output_path)
+
+    assert result['success'], result
+    assert [step['rows_after'] for step in result['stats']['steps']] == [3, 2, 3]
+    output = pd.read_excel(output_path)
+    assert output['Ho_Ten'].tolist() == ['Nguyen An', 'Nguyen An', 'Tran Binh']
+    assert output['Ma'].tolist() == ['A', 'B', 'C']
+
+def test_run_reports_failing_step(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({'MSSV': [1]}))
+    recipe = {'steps': [{'operation': 'deduplicate', 'params': {'columns': ['Khong_Co']}}]}
+
+    result = Pipeline().run(recipe, file_path, str(tmp_path / 'out.xlsx'))
+
+    assert not result['success']
+    assert result['error'].startswith('Bước 1')
+
+def test_validate_recipe_rejects_unknown_operation():
+    assert Pipeline().validate_recipe({'steps': [{'operation': 'xoa_het'}]})
+
+@pytest.mark.parametrize('step', [
+    {'operation': 'merge_columns',
+     'params': {'merge_configs': [[['Ho', 'Ten'], 'Ho_Ten', ' '], [['Lop', 'Khoa'], 'Lop_Khoa', '-']]}},
+    {'operation': 'compute_columns',
+     'params': {'expressions': [['Ho_Ten', 'concat([Ho], " ", [Ten])'], ['Lop_Khoa', 'concat([Lop], "-", [Khoa])']]}}
+])
+def test_unused_step_outputs_keep_their_sources(make_excel, tmp_path, step):
+    file_path = make_excel(pd.DataFrame({
+        'MSSV': [1], 'Ho': ['Nguyen'], 'Ten': ['An'], 'Lop': ['L1'], 'Khoa': ['K1'], 'Diem': [7]
+    }))
+    recipe = {'steps': [
+        step,
+        {'operation': 'split_rows', 'params': {'id_columns': ['Ho_Ten'], 'value_columns': ['Diem']}}
+    ]}
+
+    result = Pipeline().run(recipe, file_path, str(tmp_path / 'out.xlsx'))
+
+    assert result['success'], result
+    assert Pipeline().plan(recipe, file_path)['input_columns'] == ['Ho', 'Ten', 'Lop', 'Khoa', 'Diem']
@@ -0,0 +1,86 @@
+import os
+
+from core.result_cache import ResultCache
+
+class Operation:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, file_path, output_path, factor=1, progress_callback=None, cancel_token=None):
+        self.calls += 1
+        with open(output_path, 'w') as f:
+            f.write(str(factor))
+        return {'success': True, 'stats': {'output_file': output_path, 'factor': factor}}
+
+def cached_call(cache, operation, *args):
+    result = cache.get(operation, args)
+    if result is None:
+        result = operation(*args)
+        cache.put(operation, args, result)
+    return result
+
+def test_hit_restores_output_under_the_new_path(tmp_path):
+    input_path = tmp_path / 'input.xlsx'
+    input_path.write_bytes(b'data')
+    cache = ResultCache(str(tmp_path / 'cache'))
+    operation = Operation()
+
+    cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out_1.xlsx'), 2)
+    result = cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out_2.xlsx'), 2)
+
+    assert operation.calls == 1
+    assert result['cached']
+    assert result['stats']['output_file'] == str(tmp_path / 'out_2.xlsx')
+    assert (tmp_path / 'out_2.xlsx').read_text() == '2'
+    assert cache.stats()['hits'] == 1
+
+def test_changed_parameters_or_input_miss(tmp_path):
+    input_path = tmp_path / 'input.xlsx'
+    input_path.write_bytes(b'data')
+    cache = ResultCache(str(tmp_path / 'cache'))
+    operation = Operation()
+
+    cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out.xlsx'), 2)
+    cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out.xlsx'), 3)
+    input_path.write_bytes(b'other data')
+    cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out.xlsx'), 3)
+
+    assert operation.calls == 3
+
+def test_result_is_kept_on_disk_and_counted(tmp_path):
+    input_path = tmp_path / 'input.xlsx'
+    input_path.write_bytes(b'data')
+    cache = ResultCache(str(tmp_path / 'cache'))
+
+    cached_call(cache, Operation().run, str(input_path), str(tmp_path / 'out.xlsx'))
+
+    (key,) = cache.entries
+    entry_folder = tmp_path / 'cache' / key
+    assert sorted(os.listdir(entry_folder)) == ['out.xlsx', ResultCache.RESULT_NAME]
+    assert cache.stats()['bytes'] == sum(os.path.getsize(entry_folder / name) for name in os.listdir(entry_folder))
+
+def test_unsuccessful_results_are_not_cached(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+
+    def fail(file_path, output_path):
+        return {'success': False, 'error': 'lỗi'}
+
+    cache.put(fail, ('a', str(tmp_path / 'out.xlsx')), fail('a', 'b'))
+
+    assert cache.stats()['entries'] == 0
+
+def test_eviction_and_restart_leave_foreign_files(tmp_path):
+    input_path = tmp_path / 'input.xlsx'
+    input_path.write_bytes(b'data')
+    folder = tmp_path / 'cache'
+    cache = ResultCache(str(folder), max_entries=1)
+    operation = Operation()
+
+    cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out.xlsx'), 1)
+    cached_call(cache, operation.run, str(input_path), str(tmp_path / 'out.xlsx'), 2)
+    assert cache.stats()['entries'] == 1
+
+    (folder / 'notes.txt').write_text('keep')
+    ResultCache(str(folder))
+
+    assert os.listdir(folder) == ['notes.txt']
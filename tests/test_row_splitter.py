@@ -0,0 +1,47 @@
+import pandas as pd
+
+from core import RowSplitter
+
+def test_explode_rows_numbers_source_rows(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({'Lop': ['L1', 'L2'], 'Ma': ['A01;A02;A03', 'B01']}))
+    output_path = str(tmp_path / 'out.xlsx')
+
+    result = RowSplitter().explode_rows(file_path, 'Ma', output_path)
+
+    assert result['success'], result
+    assert result['stats']['final_rows'] == 4
+    assert result['stats']['cells_split'] == 1
+    output = pd.read_excel(output_path)
+    assert output['Ma'].tolist() == ['A01', 'A02', 'A03', 'B01']
+    assert output['Excel_Row'].tolist() == [2, 2, 2, 3]
+
+def test_pivot_rows_first_takes_first_value(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({
+        'MSSV': [1, 1, 2, 1],
+        'Nam': [2021, 2022, 2021, 2021],
+        'Diem': [7, 8, 9, 5]
+    }))
+    output_path = str(tmp_path / 'out.xlsx')
+
+    result = RowSplitter().pivot_rows(file_path, ['MSSV'], 'Nam', 'Diem', output_path, 'first')
+
+    assert result['success'], result
+    assert result['stats']['collisions'] == 1
+    output = pd.read_excel(output_path)
+    assert output.columns.tolist() == ['MSSV', '2021', '2022']
+    assert output['2021'].tolist() == [7, 9]
+
+def test_pivot_frame_of_empty_frame():
+    df = pd.DataFrame(columns=['MSSV', 'Nam', 'Diem'])
+
+    df_pivot, info = RowSplitter().pivot_frame(df, ['MSSV'], 'Nam', 'Diem', 'first', ', ')
+
+    assert len(df_pivot) == 0
+    assert info['new_columns'] == []
+
+def test_pivot_rows_rejects_unknown_aggregation(make_excel, tmp_path):
+    file_path = make_excel(pd.DataFrame({'MSSV': [1], 'Nam': [2021], 'Diem': [7]}))
+
+    result = RowSplitter().pivot_rows(file_path, ['MSSV'], 'Nam', 'Diem', str(tmp_path / 'out.xlsx'), 'median')
+
+    assert not result['success']
@@ -0,0 +1,60 @@
+import os
+import time
+
+from core import StorageManager
+
+def make_file(folder, name, size, age):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+def test_sweep_evicts_expired_files(tmp_path):
+    old = make_file(tmp_path, 'old.xlsx', 10, 3600)
+    new = make_file(tmp_path, 'new.xlsx', 10, 300)
+    storage = StorageManager(ttl_seconds=1800)
+    storage.add_area('results', str(tmp_path))
+
+    assert storage.sweep() == {'files': 1, 'bytes': 10}
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+def test_sweep_evicts_least_recently_used_over_quota(tmp_path):
+    first = make_file(tmp_path, 'first.xlsx', 100, 900)
+    second = make_file(tmp_path, 'second.xlsx', 100, 600)
+    third = make_file(tmp_path, 'third.xlsx', 100, 300)
+    storage = StorageManager(ttl_seconds=None, quota_bytes=250)
+    storage.add_area('results', str(tmp_path))
+    storage.touch(first)
+
+    storage.sweep()
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+    assert os.path.exists(third)
+    assert storage.stats()['total_bytes'] == 200
+
+def test_pinned_and_recent_files_are_kept(tmp_path):
+    pinned = make_file(tmp_path, 'pinned.xlsx', 10, 3600)
+    recent = make_file(tmp_path, 'recent.xlsx', 10, 0)
+    storage = StorageManager(ttl_seconds=0)
+    storage.add_area('results', str(tmp_path))
+
+    with storage.pinned({'file_path': pinned}):
+        assert storage.sweep()['files'] == 0
+    assert os.path.exists(recent)
+    assert storage.sweep()['files'] == 1
+    assert not os.path.exists(pinned)
+
+def test_area_remove_hook_and_exclude(tmp_path):
+    removed = []
+    make_file(tmp_path, 'index.json', 10, 3600)
+    stale = make_file(tmp_path, 'stale.xlsx', 10, 3600)
+    storage = StorageManager(ttl_seconds=60)
+    storage.add_area('uploads', str(tmp_path), remove=removed.append, exclude=['index.json'])
+
+    storage.sweep()
+
+    assert removed == [os.path.abspath(stale)]
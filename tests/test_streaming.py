@@ -0,0 +1,71 @@
+import json
+import time
+
+import pytest
+
+import web_interface
+from web_interface import app, ndjson_records, result_response
+
+RESULT = {
+    'success': True,
+    'stats': {'matched': 1, 'unmatched_data': [{'id': 2}, {'id': 3}]},
+    'unmatched_data': [{'id': 2}, {'id': 3}],
+    'duplicate_groups': [{'value': 'a', 'count': 2}]
+}
+
+def parse(lines):
+    return [json.loads(line) for line in lines if line.strip()]
+
+def rebuild(records):
+    """Client-side reassembly of an NDJSON stream"""
+    result = records[0]['header']
+    arrays = {}
+
+    def target(path):
+        value = result
+        for key in path:
+            value = value[key]
+        return value
+
+    for record in records[1:-1]:
+        path = tuple(record['path'])
+        if 'alias' in record:
+            target(path).extend(arrays[tuple(record['alias'])])
+        else:
+            target(path).append(record['item'])
+        arrays[path] = target(path)
+    return result
+
+def test_stream_round_trips_with_aliases():
+    with app.app_context():
+        records = parse(ndjson_records(RESULT))
+
+    assert records[0]['header']['unmatched_data'] == []
+    assert records[-1] == {'end': True}
+    assert {'path': ['stats', 'unmatched_data'], 'alias': ['unmatched_data']} in records
+    assert sum(1 for record in records if record.get('path') == ['unmatched_data']) == 2
+    assert rebuild(records) == RESULT
+
+@pytest.mark.parametrize('query, mimetype', [('', 'application/json'), ('?stream=1', 'application/x-ndjson')])
+def test_result_response_honours_stream_flag(query, mimetype):
+    with app.test_request_context('/api/jobs/x/result' + query):
+        response = result_response(RESULT)
+        response.direct_passthrough = False
+        body = response.get_data(as_text=True)
+
+    assert response.mimetype == mimetype
+    if query:
+        assert rebuild(parse(body.splitlines())) == RESULT
+    else:
+        assert json.loads(body) == RESULT
+
+def test_job_result_streams_over_http():
+    job_id = web_interface.job_manager.submit(lambda progress_callback, cancel_token: RESULT, name='test')
+    deadline = time.time() + 10
+    while web_interface.job_manager.get(job_id)['status'] != 'done' and time.time() < deadline:
+        time.sleep(0.01)
+
+    response = app.test_client().get(f'/api/jobs/{job_id}/result?stream=1')
+
+    assert response.status_code == 200
+    assert rebuild(parse(response.get_data(as_text=True).splitlines())) == RESULT
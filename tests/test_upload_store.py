@@ -0,0 +1,58 @@
+import os
+
+from core import UploadStore
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+def test_same_content_is_stored_once(tmp_path):
+    store = UploadStore(str(tmp_path / 'store'))
+
+    first = store.add(write(tmp_path / 'a.xlsx', b'data'), 'a.xlsx')
+    second = store.add(write(tmp_path / 'b.xlsx', b'data'), 'b.xlsx')
+
+    assert first['content_id'] == second['content_id'] == UploadStore.hash_file(first['file_path'])
+    assert first['file_path'] == second['file_path']
+    assert not os.path.exists(tmp_path / 'b.xlsx')
+    assert store.get(first['content_id'])['names'] == ['a.xlsx', 'b.xlsx']
+    assert store.lookup('b.xlsx') == first['content_id']
+
+def test_index_survives_a_restart(tmp_path):
+    store = UploadStore(str(tmp_path / 'store'))
+    entry = store.add(write(tmp_path / 'a.xlsx', b'data'), 'a.xlsx')
+    store.set_info(entry['content_id'], {'rows': 3})
+
+    reopened = UploadStore(str(tmp_path / 'store'))
+
+    assert reopened.get(entry['content_id'])['info'] == {'rows': 3}
+    assert UploadStore.content_id_of(entry['file_path']) == entry['content_id']
+
+def test_discard_removes_upload_with_its_parse_cache(tmp_path):
+    store = UploadStore(str(tmp_path / 'store'))
+    entry = store.add(write(tmp_path / 'a.xlsx', b'data'), 'a.xlsx')
+    cache_path = write(UploadStore.parsed_cache_path(entry['file_path']), b'cache')
+
+    store.discard(entry['file_path'])
+
+    assert store.get(entry['content_id']) is None
+    assert store.lookup('a.xlsx') is None
+    assert not os.path.exists(entry['file_path'])
+    assert not os.path.exists(cache_path)
+
+def test_discard_of_a_parse_cache_keeps_the_upload(tmp_path):
+    store = UploadStore(str(tmp_path / 'store'))
+    entry = store.add(write(tmp_path / 'a.xlsx', b'data'), 'a.xlsx')
+    cache_path = write(UploadStore.parsed_cache_path(entry['file_path']), b'cache')
+
+    store.discard(cache_path)
+
+    assert not os.path.exists(cache_path)
+    assert store.get(entry['content_id']) is not None
+
+def test_files_outside_a_store_have_no_content_id(tmp_path):
+    path = write(tmp_path / ('0' * 64 + '.xlsx'), b'data')
+
+    assert UploadStore.content_id_of(path) is None
+    assert UploadStore.parsed_cache_path(path) is None
@@ -1,19 +1,181 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, g, Response
 import os
-from core import FileComparator, FileJoiner, ColumnMerger, RowSplitter, DuplicateFinder, ExcelUtils  
+from core import (FileComparator, FileJoiner, ColumnMerger, RowSplitter, DuplicateFinder, ExcelUtils, Pipeline,
+                  JobManager, ProcessRunner, ChunkedUploadManager, UploadStore, StorageManager,
+                  ResultCache)
 import tempfile
 import traceback
-import time
+import re
+import functools
+import uuid
 
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
+# Own folder (not the shared temp dir itself): everything in it is managed by `storage`
+app.config['UPLOAD_FOLDER'] = os.path.join(tempfile.gettempdir(), 'excel_tool')
+os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Saved recipes are kept outside the managed folder, so they are never evicted
+app.config['RECIPE_FOLDER'] = os.path.join(tempfile.gettempdir(), 'excel_tool_recipes')
+os.makedirs(app.config['RECIPE_FOLDER'], exist_ok=True)
+# Files above MAX_CONTENT_LENGTH go through /api/upload/chunked in parts, up to MAX_UPLOAD_SIZE
+app.config['CHUNK_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'excel_tool_chunks')
+app.config['MAX_UPLOAD_SIZE'] = 2 * 1024 * 1024 * 1024
+# Uploads are stored once per content (SHA-256), whatever their name
+app.config['STORE_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'excel_tool_uploads')
+# Results and uploads not accessed for STORAGE_TTL seconds are deleted, and the least
+# recently used ones while the total exceeds STORAGE_QUOTA bytes
+app.config['STORAGE_TTL'] = 24 * 3600
+app.config['STORAGE_QUOTA'] = 10 * 1024 * 1024 * 1024
+# Memoized operation results (output copies included) are kept up to this size
+app.config['RESULT_CACHE_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'excel_tool_result_cache')
+app.config['RESULT_CACHE_BYTES'] = 2 * 1024 * 1024 * 1024
 
 comparator = FileComparator()
 joiner = FileJoiner()
 merger = ColumnMerger()
 splitter = RowSplitter()
 duplicate_finder = DuplicateFinder()  
+pipeline = Pipeline()
+upload_store = UploadStore(app.config['STORE_FOLDER'])
+# Stored uploads never change, so their parsed frames can be cached by content id
+ExcelUtils.set_parse_cache(UploadStore.parsed_cache_path)
+result_cache = ResultCache(app.config['RESULT_CACHE_FOLDER'], app.config['RESULT_CACHE_BYTES'])
+
+def evict_upload(path):
+    """Storage eviction of an upload: results computed from it are forgotten too"""
+    content_id = UploadStore.content_id_of(path)
+    upload_store.discard(path)
+    if content_id is not None:
+        result_cache.invalidate_input(content_id)
+
+storage = StorageManager(app.config['STORAGE_TTL'], app.config['STORAGE_QUOTA'])
+storage.add_area('results', app.config['UPLOAD_FOLDER'])
+storage.add_area('uploads', app.config['STORE_FOLDER'], recursive=True, remove=evict_upload,
+                 exclude=[UploadStore.INDEX_NAME, 'incoming_*', '*.tmp'])
+storage.add_area('result_cache', app.config['RESULT_CACHE_FOLDER'], recursive=True, remove=result_cache.discard)
+storage.start()
+job_manager = JobManager()
+# Set by configure_workers (serve mode): operations then run in worker processes
+process_runner = None
+
+def configure_workers(workers=None, queue_depth=None):
+    """Run operations in `workers` processes; at most queue_depth background jobs may wait"""
+    global job_manager, process_runner
+    process_runner = ProcessRunner(workers, initializer=ExcelUtils.set_parse_cache,
+                                   initargs=(UploadStore.parsed_cache_path,))
+    # One job thread per process: each waits on its operation's process
+    job_manager = JobManager(process_runner.max_workers, queue_depth)
+
+def background_job(view):
+    """Let a heavy route run in the job pool when the client sends {"async": true}
+
+    The client then gets a job_id right away and polls /api/jobs/<job_id>;
+    the route itself runs unchanged inside a copy of the request.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True) or {}
+        if not data.get('async'):
+            return view(*args, **kwargs)
+        
+        path = request.path
+        
+        def run(progress_callback, cancel_token):
+            # The job's input files stay on disk while it runs
+            with storage.pinned(data), app.test_request_context(path, method='POST', json=data):
+                g.progress_callback = progress_callback
+                g.cancel_token = cancel_token
+                return view(*args, **kwargs).get_json()
+        
+        job_id = job_manager.submit(run, name=path)
+        if job_id is None:
+            return jsonify({'success': False, 'error': 'Máy chủ đang bận, vui lòng thử lại sau ít phút'}), 503
+        return jsonify({'success': True, 'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'})
+    return wrapper
+
+# Result arrays that grow with the data; ?stream=1 sends them item by item
+STREAMED_ARRAYS = ('unmatched_data', 'unmatched_samples', 'unmatched_details', 'duplicate_groups', 'clusters')
+
+def ndjson_records(result):
+    """NDJSON lines of a result: a header with the STREAMED_ARRAYS emptied, then their items
+
+    Item lines are {"path": [keys leading to the array], "item": ...}; an array equal to one
+    already sent is announced as {"path": [...], "alias": [path of the first]} instead. The
+    last line is {"end": true}, so clients can tell a complete stream from a cut one.
+    
+    The result dict is already complete in memory (operations return it whole, and it may
+    come from the result cache); only its serialization, transfer and rendering are
+    incremental, so peak server memory is that of the result itself.
+    """
+    streams = []
+    
+    def strip(value, path):
+        if not isinstance(value, dict):
+            return value
+        header = {}
+        for key, item in value.items():
+            if key in STREAMED_ARRAYS and isinstance(item, list):
+                header[key] = []
+                streams.append((path + [key], item))
+            else:
+                header[key] = strip(item, path + [key])
+        return header
+    
+    yield app.json.dumps({'header': strip(result, [])}) + '\n'
+    sent = []
+    # Top-level arrays first: they are the ones clients render, nested copies become aliases
+    for path, items in sorted(streams, key=lambda stream: len(stream[0])):
+        same = next((first for first, other in sent if other is items or other == items), None)
+        if same is not None:
+            yield app.json.dumps({'path': path, 'alias': same}) + '\n'
+            continue
+        sent.append((path, items))
+        for item in items:
+            yield app.json.dumps({'path': path, 'item': item}) + '\n'
+    yield app.json.dumps({'end': True}) + '\n'
+
+def result_response(result):
+    """jsonify(result), or its NDJSON stream (see ndjson_records) for ?stream=1
+    
+    Either way result is built in full before the response starts.
+    """
+    if request.args.get('stream'):
+        return Response(ndjson_records(result), mimetype='application/x-ndjson')
+    return jsonify(result)
+
+def output_path_for(prefix, source_path, ext=None):
+    """Result path in UPLOAD_FOLDER named after the operation and its input
+
+    A random part keeps concurrent runs on the same upload (e.g. two background jobs
+    with different parameters) from overwriting each other's output.
+    """
+    name = os.path.basename(source_path)
+    if ext:
+        name = os.path.splitext(name)[0] + ext
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{prefix}_{uuid.uuid4().hex[:12]}_{name}")
+
+def job_hooks():
+    """Progress callback and cancel token of the job running this request (none when synchronous)"""
+    return {'progress_callback': g.get('progress_callback'), 'cancel_token': g.get('cancel_token')}
+
+def run_operation(operation, *args):
+    """Call a core operation with the job hooks, in a worker process when configured
+
+    Input and output paths among args are pinned so the storage sweep leaves them alone.
+    A call repeating an earlier one (same input contents and parameters) returns the
+    memoized result and output file instead of running again.
+    """
+    with storage.pinned(args):
+        result = result_cache.get(operation, args)
+        if result is not None:
+            return result
+        
+        if process_runner is not None:
+            result = process_runner.call(operation, *args, **job_hooks())
+        else:
+            result = operation(*args, **job_hooks())
+        result_cache.put(operation, args, result)
+        return result
 
 @app.route('/')
 def index():
@@ -31,53 +193,137 @@ def upload_file():
             return jsonify({'success': False, 'error': 'No file selected'})
         
         if file and allowed_file(file.filename):
-            # Create a safe filename
-            safe_filename = "upload_" + str(hash(file.filename))[-8:] + os.path.splitext(file.filename)[1]
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
-            file.save(file_path)
+            # Stored by content: the same file uploaded again is neither copied nor parsed again
+            entry = upload_store.save(file)
+            file_path = entry['file_path']
+            storage.touch(file_path)
+            file_info = entry['info']
             
-            # Validate the file first
-            valid, msg = ExcelUtils.validate_excel_file(file_path)
-            if not valid:
-                # Clean up invalid file
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                return jsonify({'success': False, 'error': f'File không hợp lệ: {msg}'})
-            
-            # Get file info using ExcelUtils
-            file_info = ExcelUtils.get_file_info(file_path)
-            
-            if 'error' in file_info:
-                # Clean up problematic file
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                return jsonify({'success': False, 'error': file_info['error']})
+            if file_info is None:
+                # Validate the file first (the parse is cached for get_file_info and later operations)
+                valid, msg = ExcelUtils.validate_excel_file(file_path)
+                if not valid:
+                    # Clean up invalid file
+                    upload_store.remove(entry['content_id'])
+                    return jsonify({'success': False, 'error': f'File không hợp lệ: {msg}'})
+                
+                # Get file info using ExcelUtils
+                file_info = ExcelUtils.get_file_info(file_path)
+                
+                if 'error' in file_info:
+                    # Clean up problematic file
+                    upload_store.remove(entry['content_id'])
+                    return jsonify({'success': False, 'error': file_info['error']})
+                upload_store.set_info(entry['content_id'], file_info)
             
             return jsonify({
                 'success': True,
-                'filename': file_info['filename'],
+                'filename': entry['filename'],
                 'rows': file_info['rows'],
                 'columns': file_info['column_names'],
                 'file_path': file_path,
-                'file_info': file_info
+                'content_id': entry['content_id'],
+                'file_info': dict(file_info, filename=entry['filename'])
             })
         
         return jsonify({'success': False, 'error': 'Invalid file type'})
     
     except Exception as e:
-        # Clean up on any error
+        # Clean up a file nobody has parsed successfully
         try:
-            if 'file_path' in locals():
-                os.remove(file_path)
+            if 'entry' in locals() and entry['info'] is None:
+                upload_store.remove(entry['content_id'])
         except:
             pass
         
         return jsonify({'success': False, 'error': f'Upload error: {str(e)}'})
 
+def probe_upload(file_path, filename, sha256):
+    """Store a fully received chunked upload and return /api/upload's response for it"""
+    entry = upload_store.add(file_path, filename, sha256)
+    file_path = entry['file_path']
+    storage.touch(file_path)
+    if entry['info'] is not None:
+        file_info = entry['info']
+        return {
+            'success': True,
+            'rows': file_info['rows'],
+            'columns': file_info['column_names'],
+            'file_path': file_path,
+            'content_id': entry['content_id'],
+            'file_info': dict(file_info, filename=filename)
+        }
+    
+    valid, msg = ExcelUtils.validate_excel_file(file_path, read_content=False)
+    if not valid:
+        upload_store.remove(entry['content_id'])
+        return {'success': False, 'error': f'File không hợp lệ: {msg}'}
+    
+    try:
+        # Header, sample rows and the row count (estimated when possible): no full parse of a large file
+        file_info = ExcelUtils.get_file_summary(file_path)
+    except Exception as e:
+        upload_store.remove(entry['content_id'])
+        return {'success': False, 'error': f'Không thể đọc file: {str(e)}'}
+    upload_store.set_info(entry['content_id'], file_info)
+    
+    return {
+        'success': True,
+        'rows': file_info['rows'],
+        'columns': file_info['column_names'],
+        'file_path': file_path,
+        'content_id': entry['content_id'],
+        'file_info': dict(file_info, filename=filename)
+    }
+
+chunked_uploads = ChunkedUploadManager(app.config['CHUNK_FOLDER'], probe=probe_upload,
+                                       max_chunk_size=app.config['MAX_CONTENT_LENGTH'] - 1024 * 1024,
+                                       max_size=app.config['MAX_UPLOAD_SIZE'])
+# Abandoned uploads (never completed or never finalized) expire with the other files
+storage.add_area('chunks', app.config['CHUNK_FOLDER'], remove=chunked_uploads.discard, exclude=['*.tmp'])
+
+@app.route('/api/upload/chunked', methods=['POST'])
+def init_chunked_upload():
+    """Start (or resume, given upload_id) an upload sent in chunks"""
+    try:
+        data = request.json or {}
+        filename = data.get('filename', '')
+        size = data.get('size')
+        
+        if not filename or not allowed_file(filename):
+            return jsonify({'success': False, 'error': 'Invalid file type'})
+        if not isinstance(size, int):
+            return jsonify({'success': False, 'error': 'Thiếu kích thước file'})
+        
+        return jsonify(chunked_uploads.init(filename, size, data.get('chunk_size'),
+                                            data.get('sha256'), data.get('upload_id')))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Upload error: {str(e)}'})
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Chunks received so far, for resuming after a dropped connection"""
+    return jsonify(chunked_uploads.status(upload_id))
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    """Drop an unfinished upload"""
+    if not chunked_uploads.abort(upload_id):
+        return jsonify({'success': False, 'error': 'Không tìm thấy phiên tải lên'}), 404
+    return jsonify({'success': True})
+
+@app.route('/api/upload/chunked/<upload_id>/<int:index>', methods=['PUT'])
+def put_upload_chunk(upload_id, index):
+    """Stream one chunk (raw request body) to disk; X-Chunk-CRC32 is checked when sent"""
+    return jsonify(chunked_uploads.write_chunk(upload_id, index, request.stream, request.content_length,
+                                               request.headers.get('X-Chunk-CRC32')))
+
+@app.route('/api/upload/chunked/<upload_id>/finalize', methods=['POST'])
+def finalize_chunked_upload(upload_id):
+    """Wait for the metadata probe started by the last chunk and return the file info"""
+    return jsonify(chunked_uploads.finalize(upload_id))
+
 @app.route('/api/simple-upload', methods=['POST'])
 def simple_upload_file():
     """Simplified upload for problematic files - only basic info"""
@@ -90,21 +336,25 @@ def simple_upload_file():
             return jsonify({'success': False, 'error': 'No file selected'})
         
         if file and allowed_file(file.filename):
-            safe_filename = "upload_" + str(hash(file.filename))[-8:] + os.path.splitext(file.filename)[1]
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
-            file.save(file_path)
+            entry = upload_store.save(file)
+            file_path = entry['file_path']
+            storage.touch(file_path)
             
             try:
-                # Try to get basic info without detailed processing
-                df = ExcelUtils.read_excel(file_path)
+                # Try to get basic info without detailed processing (or reuse the stored info)
+                if entry['info'] is not None:
+                    rows, column_names = entry['info']['rows'], entry['info']['column_names']
+                else:
+                    df = ExcelUtils.read_excel(file_path)
+                    rows, column_names = len(df), [str(col) for col in df.columns]
                 
                 basic_info = {
                     'filename': file.filename,
                     'file_path': file_path,
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'column_names': [str(col) for col in df.columns],
-                    'file_size': os.path.getsize(file_path)
+                    'rows': rows,
+                    'columns': len(column_names),
+                    'column_names': column_names,
+                    'file_size': entry['size']
                 }
                 
                 return jsonify({
@@ -113,13 +363,14 @@ def simple_upload_file():
                     'rows': basic_info['rows'],
                     'columns': basic_info['column_names'],
                     'file_path': basic_info['file_path'],
+                    'content_id': entry['content_id'],
                     'basic_info': basic_info
                 })
                 
             except Exception as e:
                 # Clean up problematic file
                 try:
-                    os.remove(file_path)
+                    upload_store.remove(entry['content_id'])
                 except:
                     pass
                 return jsonify({'success': False, 'error': f'Không thể đọc file: {str(e)}'})
@@ -130,6 +381,7 @@ def simple_upload_file():
         return jsonify({'success': False, 'error': f'Upload error: {str(e)}'})
 
 @app.route('/api/compare', methods=['POST'])
+@background_job
 def compare_files():
     """Compare two Excel files with fallback mechanisms"""
     try:
@@ -144,16 +396,16 @@ def compare_files():
             return jsonify({'success': False, 'error': 'Missing file paths'})
         
         # Generate output filename
-        output_filename = f"comparison_result_{os.path.basename(file1_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('comparison_result', file1_path)
         
         # Try the main method first
         if compare_type == 'full_row':
-            result = comparator.compare_full_rows(file1_path, file2_path, output_path)
+            result = run_operation(comparator.compare_full_rows, file1_path, file2_path, output_path)
         else:
             if not col1 or not col2:
                 return jsonify({'success': False, 'error': 'Missing columns for comparison'})
-            result = comparator.compare_specific_columns(file1_path, file2_path, col1, col2, output_path)
+            result = run_operation(comparator.compare_specific_columns,
+                                   file1_path, file2_path, col1, col2, output_path)
         
         # If main method fails, try fallback
         if not result['success'] and compare_type == 'full_row':
@@ -171,6 +423,7 @@ def compare_files():
         return jsonify({'success': False, 'error': f'Comparison error: {str(e)}'})
 
 @app.route('/api/join', methods=['POST'])
+@background_job
 def join_files():
     """Join two Excel files"""
     try:
@@ -186,10 +439,9 @@ def join_files():
             return jsonify({'success': False, 'error': 'No join columns specified'})
         
         # Generate output filename
-        output_filename = f"join_result_{os.path.basename(file1_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('join_result', file1_path)
         
-        result = joiner.join_files(file1_path, file2_path, join_columns, output_path)
+        result = run_operation(joiner.join_files, file1_path, file2_path, join_columns, output_path)
         
         if result['success']:
             result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
@@ -213,20 +465,24 @@ def upload_join_file():
             return jsonify({'success': False, 'error': 'No file selected'})
         
         if file and allowed_file(file.filename):
-            # Create unique filename for join
-            safe_filename = "upload_join_" + str(hash(file.filename))[-8:] + "_" + str(hash(str(time.time())))[-8:] + os.path.splitext(file.filename)[1]
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
-            file.save(file_path)
+            # Content-addressed: different files never share a name
+            entry = upload_store.save(file)
+            file_path = entry['file_path']
+            storage.touch(file_path)
             
             try:
-                # Get basic file info
-                df = ExcelUtils.read_excel(file_path)
+                # Get basic file info (or reuse the stored info)
+                if entry['info'] is not None:
+                    rows, columns = entry['info']['rows'], entry['info']['column_names']
+                else:
+                    df = ExcelUtils.read_excel(file_path)
+                    rows, columns = len(df), [str(col) for col in df.columns]
                 file_info = {
                     'filename': file.filename,
                     'file_path': file_path,
-                    'rows': len(df),
-                    'columns': [str(col) for col in df.columns],
-                    'file_size': os.path.getsize(file_path)
+                    'rows': rows,
+                    'columns': columns,
+                    'file_size': entry['size']
                 }
                 
                 return jsonify({
@@ -235,13 +491,14 @@ def upload_join_file():
                     'rows': file_info['rows'],
                     'columns': file_info['columns'],
                     'file_path': file_info['file_path'],
+                    'content_id': entry['content_id'],
                     'file_info': file_info
                 })
                 
             except Exception as e:
                 # Clean up on error
                 try:
-                    os.remove(file_path)
+                    upload_store.remove(entry['content_id'])
                 except:
                     pass
                 return jsonify({'success': False, 'error': f'Không thể đọc file: {str(e)}'})
@@ -286,6 +543,7 @@ def download_file(filename):
     try:
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         if os.path.exists(file_path):
+            storage.touch(file_path)
             # Sanitize download name
             safe_filename = filename
             if len(filename) > 100:  # Truncate very long filenames
@@ -297,6 +555,7 @@ def download_file(filename):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 @app.route('/api/compare-detailed', methods=['POST'])
+@background_job
 def compare_files_detailed():
     """Compare two Excel files with detailed unmatched information"""
     try:
@@ -311,18 +570,18 @@ def compare_files_detailed():
             return jsonify({'success': False, 'error': 'Missing file paths'})
         
         # First do the normal comparison
-        output_filename = f"comparison_result_{os.path.basename(file1_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('comparison_result', file1_path)
         
         result = None
         
         if compare_type == 'full_row':
-            result = comparator.compare_full_rows(file1_path, file2_path, output_path)
+            result = run_operation(comparator.compare_full_rows, file1_path, file2_path, output_path)
         else:
             if not col1 or not col2:
                 return jsonify({'success': False, 'error': 'Missing columns for comparison'})
             
-            result = comparator.compare_specific_columns(file1_path, file2_path, col1, col2, output_path)
+            result = run_operation(comparator.compare_specific_columns,
+                                   file1_path, file2_path, col1, col2, output_path)
         
         # If successful with main method, add download URL
         if result['success']:
@@ -333,12 +592,13 @@ def compare_files_detailed():
                 result['unmatched_samples'] = result['stats']['unmatched_data']  # Truyền toàn bộ dữ liệu
                 result['unmatched_count'] = result['stats']['unmatched_count']
         
-        return jsonify(result)
+        return result_response(result)
     
     except Exception as e:
         return jsonify({'success': False, 'error': f'Detailed comparison error: {str(e)}'})
 
 @app.route('/api/unmatched-rows', methods=['POST'])
+@background_job
 def get_unmatched_rows():
     """Get only the unmatched rows information"""
     try:
@@ -352,8 +612,8 @@ def get_unmatched_rows():
         if not file1_path or not file2_path:
             return jsonify({'success': False, 'error': 'Missing file paths'})
         
-        result = comparator.get_unmatched_details(file1_path, file2_path, compare_type, col1, col2)
-        return jsonify(result)
+        result = run_operation(comparator.get_unmatched_details, file1_path, file2_path, compare_type, col1, col2)
+        return result_response(result)
     
     except Exception as e:
         return jsonify({'success': False, 'error': f'Unmatched rows error: {str(e)}'})
@@ -366,6 +626,7 @@ def allowed_file(filename):
 
 # THÊM CÁC ROUTE MỚI CHO MERGE COLUMNS
 @app.route('/api/merge-columns', methods=['POST'])
+@background_job
 def merge_columns():
     """Merge columns in Excel file"""
     try:
@@ -380,10 +641,10 @@ def merge_columns():
             return jsonify({'success': False, 'error': 'No merge configurations specified'})
         
         # Generate output filename
-        output_filename = f"merged_columns_{os.path.basename(file_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('merged_columns', file_path)
         
-        result = merger.merge_columns(file_path, merge_configs, output_path)
+        result = run_operation(merger.merge_columns, file_path, merge_configs, output_path,
+                               data.get('null_mode', 'skip'), data.get('placeholder', ''))
         
         if result['success']:
             result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
@@ -414,13 +675,62 @@ def preview_merge():
         if not os.path.exists(file_path):
             return jsonify({'success': False, 'error': f'File không tồn tại: {file_path}'})
         
-        result = merger.preview_merge(file_path, merge_configs)
+        result = merger.preview_merge(file_path, merge_configs,
+                                      data.get('null_mode', 'skip'), data.get('placeholder', ''))
         return jsonify(result)
     
     except Exception as e:
         print(f"Preview error: {str(e)}")  # Debug log
         return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
 
+@app.route('/api/compute-columns', methods=['POST'])
+@background_job
+def compute_columns():
+    """Add computed columns from expressions"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        expressions = data.get('expressions', [])
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not expressions:
+            return jsonify({'success': False, 'error': 'No expressions specified'})
+        
+        # Generate output filename
+        output_path = output_path_for('computed_columns', file_path)
+        
+        result = run_operation(merger.compute_columns, file_path, expressions, output_path)
+        
+        if result['success']:
+            result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Compute error: {str(e)}'})
+
+@app.route('/api/preview-compute', methods=['POST'])
+def preview_compute():
+    """Preview computed columns without saving"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        expressions = data.get('expressions', [])
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not expressions:
+            return jsonify({'success': False, 'error': 'No expressions specified'})
+        
+        result = merger.preview_compute(file_path, expressions)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
+
 @app.route('/api/merge-file-info', methods=['POST'])
 def get_merge_file_info():
     """Get file info for merge operations"""
@@ -440,6 +750,7 @@ def get_merge_file_info():
 
 # THÊM CÁC ROUTE MỚI CHO SPLIT ROWS
 @app.route('/api/split-rows', methods=['POST'])
+@background_job
 def split_rows():
     """Split rows by unpivoting columns"""
     try:
@@ -460,10 +771,10 @@ def split_rows():
             return jsonify({'success': False, 'error': 'Chọn ít nhất một cột giá trị để tách'})
         
         # Generate output filename
-        output_filename = f"split_rows_{os.path.basename(file_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('split_rows', file_path)
         
-        result = splitter.split_rows(file_path, id_columns, value_columns, var_name, value_name, output_path)
+        result = run_operation(splitter.split_rows, file_path, id_columns, value_columns,
+                               var_name, value_name, output_path)
         
         if result['success']:
             result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
@@ -499,6 +810,124 @@ def preview_split():
     except Exception as e:
         return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
 
+@app.route('/api/explode-rows', methods=['POST'])
+@background_job
+def explode_rows():
+    """Split delimited cell values into rows"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        split_column = data.get('split_column')
+        delimiter = data.get('delimiter', ';')
+        id_columns = data.get('id_columns') or None
+        use_regex = bool(data.get('use_regex', False))
+        keep_empty = bool(data.get('keep_empty', False))
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not split_column:
+            return jsonify({'success': False, 'error': 'Chọn cột cần tách giá trị'})
+        
+        # Generate output filename
+        output_path = output_path_for('exploded_rows', file_path)
+        
+        result = run_operation(splitter.explode_rows, file_path, split_column, output_path, delimiter,
+                               id_columns, use_regex, keep_empty)
+        
+        if result['success']:
+            result['download_url'] = f"/api/download/{os.path.basename(result['stats']['output_file'])}"
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Explode error: {str(e)}'})
+
+@app.route('/api/preview-explode', methods=['POST'])
+def preview_explode():
+    """Preview splitting delimited cell values without saving"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        split_column = data.get('split_column')
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not split_column:
+            return jsonify({'success': False, 'error': 'Chọn cột cần tách giá trị'})
+        
+        result = splitter.preview_explode(file_path, split_column, data.get('delimiter', ';'),
+                                          data.get('id_columns') or None,
+                                          bool(data.get('use_regex', False)),
+                                          bool(data.get('keep_empty', False)))
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
+
+@app.route('/api/pivot-rows', methods=['POST'])
+@background_job
+def pivot_rows():
+    """Turn rows into columns (inverse of split rows)"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        id_columns = data.get('id_columns', [])
+        column_variable = data.get('column_variable')
+        value_column = data.get('value_column')
+        aggregation = data.get('aggregation', 'sum')
+        separator = data.get('separator', ', ')
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not id_columns:
+            return jsonify({'success': False, 'error': 'Chọn ít nhất một cột định danh'})
+        
+        if not column_variable or not value_column:
+            return jsonify({'success': False, 'error': 'Chọn cột tạo tên cột và cột giá trị'})
+        
+        # Generate output filename
+        output_path = output_path_for('pivot_rows', file_path)
+        
+        result = run_operation(splitter.pivot_rows, file_path, id_columns, column_variable, value_column,
+                               output_path, aggregation, separator)
+        
+        if result['success']:
+            result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Pivot error: {str(e)}'})
+
+@app.route('/api/preview-pivot', methods=['POST'])
+def preview_pivot():
+    """Preview pivot result without saving"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        id_columns = data.get('id_columns', [])
+        column_variable = data.get('column_variable')
+        value_column = data.get('value_column')
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not id_columns:
+            return jsonify({'success': False, 'error': 'Chọn ít nhất một cột định danh'})
+        
+        if not column_variable or not value_column:
+            return jsonify({'success': False, 'error': 'Chọn cột tạo tên cột và cột giá trị'})
+        
+        result = splitter.preview_pivot(file_path, id_columns, column_variable, value_column,
+                                        data.get('aggregation', 'sum'), data.get('separator', ', '))
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
+
 @app.route('/api/split-file-info', methods=['POST'])
 def get_split_file_info():
     """Get file info for split operations"""
@@ -516,6 +945,7 @@ def get_split_file_info():
         return jsonify({'success': False, 'error': f'File info error: {str(e)}'})
 # THÊM CÁC ROUTE MỚI CHO DUPLICATE FINDER
 @app.route('/api/find-duplicate-values', methods=['POST'])
+@background_job
 def find_duplicate_values():
     """Find duplicate values in specific columns"""
     try:
@@ -530,20 +960,20 @@ def find_duplicate_values():
             return jsonify({'success': False, 'error': 'Chọn ít nhất một cột để kiểm tra'})
         
         # Generate output filename
-        output_filename = f"duplicate_values_{os.path.basename(file_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('duplicate_values', file_path)
         
-        result = duplicate_finder.find_duplicate_values(file_path, columns, output_path)
+        result = run_operation(duplicate_finder.find_duplicate_values, file_path, columns, output_path)
         
         if result['success']:
             result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
         
-        return jsonify(result)
+        return result_response(result)
     
     except Exception as e:
         return jsonify({'success': False, 'error': f'Duplicate values error: {str(e)}'})
 
 @app.route('/api/find-duplicate-rows', methods=['POST'])
+@background_job
 def find_duplicate_rows():
     """Find completely duplicate rows"""
     try:
@@ -554,19 +984,45 @@ def find_duplicate_rows():
             return jsonify({'success': False, 'error': 'Missing file path'})
         
         # Generate output filename
-        output_filename = f"duplicate_rows_{os.path.basename(file_path)}"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+        output_path = output_path_for('duplicate_rows', file_path)
         
-        result = duplicate_finder.find_duplicate_rows(file_path, output_path)
+        result = run_operation(duplicate_finder.find_duplicate_rows, file_path, output_path)
         
         if result['success']:
             result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
         
-        return jsonify(result)
+        return result_response(result)
     
     except Exception as e:
         return jsonify({'success': False, 'error': f'Duplicate rows error: {str(e)}'})
 
+@app.route('/api/find-near-duplicate-rows', methods=['POST'])
+@background_job
+def find_near_duplicate_rows():
+    """Find near-duplicate rows (MinHash LSH)"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        columns = data.get('columns') or None
+        threshold = float(data.get('threshold', 0.8))
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        # Generate output filename
+        output_path = output_path_for('near_duplicate_rows', file_path)
+        
+        result = run_operation(duplicate_finder.find_near_duplicate_rows, file_path, output_path,
+                               columns, threshold)
+        
+        if result['success']:
+            result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
+        
+        return result_response(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Near duplicate rows error: {str(e)}'})
+
 @app.route('/api/preview-duplicates', methods=['POST'])
 def preview_duplicates():
     """Preview duplicate values without saving"""
@@ -587,6 +1043,231 @@ def preview_duplicates():
     except Exception as e:
         return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
 
+@app.route('/api/find-duplicate-keys', methods=['POST'])
+@background_job
+def find_duplicate_keys():
+    """Find rows duplicated on a combination of columns"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        columns = data.get('columns', [])
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not columns:
+            return jsonify({'success': False, 'error': 'Chọn ít nhất một cột làm khóa'})
+        
+        # Generate output filename
+        output_path = output_path_for('duplicate_keys', file_path)
+        
+        result = run_operation(duplicate_finder.find_duplicate_keys, file_path, columns, output_path)
+        
+        if result['success']:
+            result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
+        
+        return result_response(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Duplicate keys error: {str(e)}'})
+
+@app.route('/api/preview-duplicate-keys', methods=['POST'])
+def preview_duplicate_keys():
+    """Preview composite-key duplicates without saving"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        columns = data.get('columns', [])
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if not columns:
+            return jsonify({'success': False, 'error': 'Chọn ít nhất một cột làm khóa'})
+        
+        result = duplicate_finder.preview_duplicate_keys(file_path, columns)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Preview error: {str(e)}'})
+
+@app.route('/api/find-cross-file-duplicates', methods=['POST'])
+@background_job
+def find_cross_file_duplicates():
+    """Find records that appear in more than one uploaded file"""
+    try:
+        data = request.json
+        file_paths = data.get('file_paths', [])
+        file_names = data.get('file_names') or None
+        columns = data.get('columns') or None
+        
+        if len(file_paths) < 2:
+            return jsonify({'success': False, 'error': 'Cần ít nhất 2 file'})
+        
+        # Generate output filename
+        output_path = output_path_for('cross_file_duplicates', file_paths[0])
+        
+        result = run_operation(duplicate_finder.find_cross_file_duplicates, file_paths, output_path,
+                               columns, file_names)
+        
+        if result['success']:
+            result['download_url'] = f'/api/download/{os.path.basename(output_path)}'
+        
+        return result_response(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Cross-file duplicates error: {str(e)}'})
+
+@app.route('/api/deduplicate', methods=['POST'])
+@background_job
+def deduplicate():
+    """Export the file with duplicate rows removed"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        columns = data.get('columns') or None
+        keep = data.get('keep', 'first')
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        # Generate output filename
+        output_path = output_path_for('deduplicated', file_path, '.xlsx')
+        
+        result = run_operation(duplicate_finder.deduplicate, file_path, output_path, columns, keep)
+        
+        if result['success']:
+            result['download_url'] = f'/api/download/{os.path.basename(result["stats"]["output_file"])}'
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Deduplicate error: {str(e)}'})
+
+# PIPELINE / RECIPE ROUTES
+def recipe_path(name):
+    """Path of a saved recipe; the name is reduced to safe filename characters"""
+    safe_name = re.sub(r'[^\w\-]+', '_', name).strip('_')
+    return os.path.join(app.config['RECIPE_FOLDER'], f"{safe_name}.json")
+
+@app.route('/api/recipes', methods=['GET'])
+def list_recipes():
+    """List saved recipes"""
+    try:
+        recipes = []
+        for filename in sorted(os.listdir(app.config['RECIPE_FOLDER'])):
+            if filename.endswith('.json'):
+                recipe = Pipeline.load_recipe(os.path.join(app.config['RECIPE_FOLDER'], filename))
+                recipes.append({
+                    'name': recipe.get('name', filename[:-5]),
+                    'steps': len(recipe.get('steps', []))
+                })
+        return jsonify({'success': True, 'recipes': recipes})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Recipe list error: {str(e)}'})
+
+@app.route('/api/recipes', methods=['POST'])
+def save_recipe():
+    """Save a recipe so it can be re-run on new files"""
+    try:
+        data = request.json
+        name = (data.get('name') or '').strip()
+        recipe = data.get('recipe')
+        
+        if not name:
+            return jsonify({'success': False, 'error': 'Tên quy trình không được để trống'})
+        
+        error = pipeline.validate_recipe(recipe)
+        if error:
+            return jsonify({'success': False, 'error': error})
+        
+        recipe['name'] = name
+        Pipeline.save_recipe(recipe, recipe_path(name))
+        return jsonify({'success': True, 'name': name, 'message': 'Đã lưu quy trình'})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Recipe save error: {str(e)}'})
+
+@app.route('/api/recipes/<name>', methods=['GET'])
+def get_recipe(name):
+    """Load a saved recipe"""
+    try:
+        path = recipe_path(name)
+        if not os.path.exists(path):
+            return jsonify({'success': False, 'error': f"Không tìm thấy quy trình '{name}'"})
+        return jsonify({'success': True, 'recipe': Pipeline.load_recipe(path)})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Recipe load error: {str(e)}'})
+
+@app.route('/api/run-pipeline', methods=['POST'])
+@background_job
+def run_pipeline():
+    """Run a recipe (inline or saved by name) on an uploaded file"""
+    try:
+        data = request.json
+        file_path = data.get('file_path')
+        recipe = data.get('recipe')
+        recipe_name = data.get('recipe_name')
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'Missing file path'})
+        
+        if recipe is None and recipe_name:
+            path = recipe_path(recipe_name)
+            if not os.path.exists(path):
+                return jsonify({'success': False, 'error': f"Không tìm thấy quy trình '{recipe_name}'"})
+            recipe = Pipeline.load_recipe(path)
+        
+        if recipe is None:
+            return jsonify({'success': False, 'error': 'Chưa có quy trình để chạy'})
+        
+        # Generate output filename
+        output_path = output_path_for('pipeline', file_path)
+        
+        result = run_operation(pipeline.run, recipe, file_path, output_path)
+        
+        if result['success']:
+            result['download_url'] = f"/api/download/{os.path.basename(result['stats']['output_file'])}"
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Pipeline error: {str(e)}'})
+
+@app.route('/api/storage')
+def storage_stats():
+    """Disk usage of uploads and results, limits and eviction counters"""
+    return jsonify({'success': True, 'storage': storage.stats(), 'result_cache': result_cache.stats()})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Status, timing and (once finished) result of a background job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Không tìm thấy công việc (có thể đã hết hạn)'})
+    if request.args.get('stream') and job['status'] == 'done':
+        # The client fetches the (possibly large) result as NDJSON instead
+        job['result'] = None
+        job['result_url'] = f"/api/jobs/{job_id}/result"
+    return jsonify({'success': True, **job})
+
+@app.route('/api/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Result of a finished job as an NDJSON stream (see ndjson_records)"""
+    job = job_manager.get(job_id)
+    if job is None or job['status'] != 'done':
+        return jsonify({'success': False, 'error': 'Không tìm thấy kết quả công việc (có thể đã hết hạn)'})
+    return Response(ndjson_records(job['result']), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Ask a queued or running job to stop (it stops at its next chunk)"""
+    if not job_manager.cancel(job_id):
+        return jsonify({'success': False, 'error': 'Không tìm thấy công việc hoặc công việc đã kết thúc'})
+    return jsonify({'success': True, 'message': 'Đã yêu cầu hủy'})
+
 @app.route('/api/duplicate-file-info', methods=['POST'])
 def get_duplicate_file_info():
     """Get file info for duplicate operations"""
@@ -604,7 +1285,11 @@ def get_duplicate_file_info():
         return jsonify({'success': False, 'error': f'File info error: {str(e)}'})
 @app.errorhandler(413)
 def too_large(e):
-    return jsonify({'success': False, 'error': 'File too large. Maximum size is 16MB'}), 413
+    # Only single requests are capped at MAX_CONTENT_LENGTH; larger files are sent in chunks
+    request_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    upload_mb = app.config['MAX_UPLOAD_SIZE'] // (1024 * 1024)
+    return jsonify({'success': False, 'error': f'Request too large. Maximum size is {request_mb}MB per request; '
+                                               f'larger files (up to {upload_mb}MB) are uploaded in chunks'}), 413
 
 @app.errorhandler(500)
 def internal_error(error):